@@ -1,27 +1,151 @@
 # app.py
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import logging
 import os
+import sys
+import threading
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 from config import Config
 from controllers.student_controller import student_bp
+from controllers.transaction import init_app as init_transaction
+from models.database import init_app as init_database, start_health_monitor, test_connection
+from models.metrics import init_app as init_metrics
+from models.statistics import start_reconciler
+
+# 导入应用依赖的全部模块所用的时间
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+logger = logging.getLogger(__name__)
+
+def configure_logging(level=None):
+    """配置日志输出（日志级别默认取 LOG_LEVEL）"""
+    logging.basicConfig(
+        level=getattr(logging, level or Config.LOG_LEVEL, logging.INFO),
+        format='%(asctime)s %(levelname)s [%(name)s] %(message)s'
+    )
+
+def precompile_templates(app):
+    """编译全部模板（进入 Jinja 的内存缓存，启用了字节码缓存时同时写入缓存目录），返回模板数"""
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
 
-def create_app():
-    """应用工厂函数"""
+def warmup(app):
+    """预热：校验配置、建立连接池的常驻连接、预编译模板，各步耗时记入 startup_timings"""
+    timings = app.extensions['startup_timings']
+    
+    started = time.perf_counter()
+    Config.validate()
+    if not test_connection():
+        logger.warning("预热时无法连接数据库，将在收到请求时重试")
+    timings['warmup_database'] = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    count = precompile_templates(app)
+    timings['warmup_templates'] = time.perf_counter() - started
+    logger.info(f"预热完成: 数据库 {timings['warmup_database'] * 1000:.0f} ms，"
+                f"{count} 个模板 {timings['warmup_templates'] * 1000:.0f} ms")
+
+def create_app(fast_start=None, warmup_in_background=True, background_tasks=False):
+    """应用工厂函数
+    
+    fast_start（默认取 FAST_START）为 True 时按冷启动优化：
+    - 配置校验、数据库连接检查和模板编译放到后台预热线程中，create_app 立即返回；
+    - 模板编译结果（字节码）保存在 JINJA_CACHE_DIR，之后启动的进程直接加载，不再编译。
+    各阶段耗时记录在 app.extensions['startup_timings']，并在 /metrics 中输出。
+    background_tasks 为 True 时启动统计校正线程和数据库健康检查，只有开发服务器（main）这样做：
+    测试、命令行脚本和多进程服务的主进程都不需要后台数据库线程，多进程服务在 worker 中启动（见 server.py）。
+    create_app 不配置日志，由入口调用 configure_logging()。
+    """
+    started = time.perf_counter()
+    fast_start = Config.FAST_START if fast_start is None else fast_start
     app = Flask(__name__)
     app.config.from_object(Config)
+    timings = app.extensions['startup_timings'] = {'imports': IMPORT_SECONDS}
+    
+    if fast_start and Config.JINJA_CACHE_DIR:
+        os.makedirs(Config.JINJA_CACHE_DIR, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(Config.JINJA_CACHE_DIR)}
     
     # 确保templates文件夹存在
     if not os.path.exists('templates'):
         os.makedirs('templates')
     
+    # 启用请求级数据库工作单元（一个请求共享一条连接和一个事务），响应发出之前提交
+    init_database(app)
+    init_transaction(app)
+    
+    # 请求耗时、查询数等性能指标（/metrics）
+    init_metrics(app)
+    
     # 注册蓝图
     app.register_blueprint(student_bp)
     
+    # 定期用真实聚合结果校正统计汇总表；后台检查数据库健康状态（熔断器）
+    if background_tasks:
+        start_reconciler(Config.STATS_RECONCILE_INTERVAL)
+        start_health_monitor()
+    
+    if fast_start:
+        # 先在当前线程创建 Jinja 环境，避免预热线程和第一个请求同时创建
+        app.jinja_env
+        if warmup_in_background:
+            threading.Thread(target=warmup, args=(app,), name='app-warmup', daemon=True).start()
+    else:
+        Config.validate()
+    
+    timings['create_app'] = time.perf_counter() - started
+    logger.info(f"启动耗时: 导入 {IMPORT_SECONDS * 1000:.0f} ms，创建应用 {timings['create_app'] * 1000:.0f} ms")
     return app
 
-if __name__ == '__main__':
-    app = create_app()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='学生信息管理系统')
+    parser.add_argument('--precompile', action='store_true',
+                        help='把全部模板编译到 JINJA_CACHE_DIR 后退出（用于构建镜像或部署时预热）')
+    subparsers = parser.add_subparsers(dest='command')
+    serve_parser = subparsers.add_parser('serve', help='生产环境多进程服务（见 server.py）')
+    serve_parser.add_argument('--bind', help='监听地址 host:port（默认 SERVER_BIND）')
+    serve_parser.add_argument('--workers', type=int, help='worker 进程数（默认 SERVER_WORKERS，0 为 CPU 核数）')
+    serve_parser.add_argument('--threads', type=int, help='每个 worker 的线程数（默认 SERVER_THREADS）')
+    serve_parser.add_argument('--max-requests', type=int, help='worker 处理多少个请求后重启（默认 SERVER_MAX_REQUESTS）')
+    serve_parser.add_argument('--max-requests-jitter', type=int, help='重启请求数的随机抖动（默认 SERVER_MAX_REQUESTS_JITTER）')
+    serve_parser.add_argument('--graceful-timeout', type=float, help='平滑退出的最长等待时间（秒）')
+    serve_parser.add_argument('--engine', choices=('auto', 'gunicorn', 'builtin'), default='auto',
+                              help='auto：安装了 gunicorn 时使用 gunicorn，否则使用内置实现')
+    args = parser.parse_args(argv)
+    configure_logging()
+    
+    if args.command == 'serve':
+        from server import serve
+        # 主进程只创建应用、编译模板，不连接数据库；统计校正由其中一个 worker 运行
+        app = create_app(fast_start=False)
+        precompile_templates(app)
+        return serve(app, bind=args.bind, workers=args.workers, threads=args.threads,
+                     max_requests=args.max_requests, max_requests_jitter=args.max_requests_jitter,
+                     graceful_timeout=args.graceful_timeout, engine=args.engine)
+    
+    if args.precompile:
+        if not Config.JINJA_CACHE_DIR:
+            print("❌ 未设置 JINJA_CACHE_DIR")
+            return 1
+        app = create_app(fast_start=True, warmup_in_background=False)
+        started = time.perf_counter()
+        count = precompile_templates(app)
+        print(f"✅ 已编译 {count} 个模板到 {Config.JINJA_CACHE_DIR}（{(time.perf_counter() - started) * 1000:.0f} ms）")
+        return 0
+    
+    app = create_app(background_tasks=True)
     print("="*50)
     print("学生信息管理系统 (MVC模式) 启动成功！")
     print(f"访问地址：http://127.0.0.1:5000")
     print("="*50)
-    app.run(debug=Config.DEBUG)
\ No newline at end of file
+    app.run(debug=Config.DEBUG)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""性能基准测试与负载测试（合成数据见 dataset；除注明只在内存中计算的以外，需要可用的 MySQL，会写入并清理以 BENCH 开头学号的测试数据）"""
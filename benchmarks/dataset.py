@@ -0,0 +1,152 @@
+# benchmarks/dataset.py
+"""合成测试数据：学号以 BENCH 开头的学生及其成绩
+
+每个学生的数据只由随机种子和序号决定，同一规模重复生成的数据完全相同，
+已有的测试数据不会重复写入（规模从 1 万补齐到 10 万时只写入新增的 9 万）。
+
+用法：
+    python -m benchmarks.dataset --scale 100000            # 补齐到 10 万学生，每人 8 条成绩
+    python -m benchmarks.dataset --scale 1000000 --courses 4 --semesters 2
+    python -m benchmarks.dataset --cleanup                 # 删除全部测试数据
+"""
+import argparse
+import datetime
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from models.database import get_pool
+from models.migrations import init_db
+from models.score_model import ScoreModel
+from models.statistics import StatisticsModel
+
+PREFIX = 'BENCH'
+SURNAMES = '张王李赵刘陈杨黄周吴徐孙马朱胡郭何林罗高梁宋郑谢韩唐冯于董萧程曹袁邓许傅沈曾彭吕'
+GIVEN = '伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红娥玲建国文辉力宇浩然子涵欣怡梓轩'
+MAJORS = ['计算机科学', '软件工程', '人工智能', '数据科学', '网络工程', '信息安全', '电子信息', '自动化',
+          '数学', '物理学', '金融学', '会计学', '法学', '汉语言文学', '英语', '临床医学']
+COURSES = ['高等数学', '线性代数', '概率论', '大学英语', 'Python编程', '数据结构', '数据库系统', '操作系统',
+           '计算机网络', '编译原理', '软件工程', '人工智能导论', '大学物理', '思想道德与法治', '体育', '马克思主义原理']
+SEMESTERS = ['2024-2025-1', '2024-2025-2', '2025-2026-1', '2025-2026-2']
+PHONE_PREFIXES = ['130', '131', '132', '135', '136', '137', '138', '139', '150', '151', '152', '158',
+                  '159', '177', '180', '186', '187', '188', '189', '199']
+
+BATCH_SIZE = 5000
+
+def student_id(index: int) -> str:
+    return f'{PREFIX}{index:07d}'
+
+def generate_student(index: int, seed: int = 0) -> Dict[str, Any]:
+    """第 index 个测试学生（同样的 seed 和 index 总是得到同样的数据）"""
+    rng = random.Random(seed * 1000003 + index)
+    return {
+        'student_id': student_id(index),
+        'name': rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.choice((1, 2, 2)))),
+        'gender': rng.choices(('男', '女', '其他'), weights=(49, 49, 2))[0],
+        'age': rng.randint(17, 25) if rng.random() > 0.05 else None,
+        'major': rng.choice(MAJORS) if rng.random() > 0.02 else None,
+        'phone': rng.choice(PHONE_PREFIXES) + f'{rng.randrange(10 ** 8):08d}' if rng.random() > 0.1 else None,
+    }
+
+def generate_scores(index: int, courses: int, semesters: int, seed: int = 0) -> List[Tuple[Any, ...]]:
+    """第 index 个测试学生的成绩 (学号, 课程, 分数, 学分, 学期, 考试日期)"""
+    rng = random.Random((seed * 1000003 + index) * 31 + 7)
+    ability = rng.gauss(0, 6)
+    rows = []
+    for term, semester in enumerate(SEMESTERS[:semesters]):
+        exam_date = datetime.date(2025 + term // 2, 1 if term % 2 == 0 else 6, 10) + datetime.timedelta(days=rng.randrange(14))
+        for course in rng.sample(COURSES, min(courses, len(COURSES))):
+            score = None if rng.random() < 0.01 else round(min(100.0, max(0.0, rng.gauss(76 + ability, 10))), 1)
+            rows.append((student_id(index), course, score, rng.choice((1, 2, 3, 4)), semester, exam_date))
+    return rows
+
+def count_students() -> int:
+    """已有的测试学生数（序号连续，从 0 开始）"""
+    connection = get_pool().acquire()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) as count FROM students WHERE student_id LIKE %s', (PREFIX + '0%',))
+            return cursor.fetchone()['count']
+    finally:
+        connection.close()
+
+def seed_students(cursor, count: int, courses: int = 0, semesters: int = 0, seed: int = 0) -> int:
+    """把测试学生补齐到 count 个（可选同时生成成绩），返回新写入的学生数（调用方提交事务）"""
+    cursor.execute('SELECT COUNT(*) as count FROM students WHERE student_id LIKE %s', (PREFIX + '0%',))
+    existing = cursor.fetchone()['count']
+    for start in range(existing, count, BATCH_SIZE):
+        indexes = range(start, min(count, start + BATCH_SIZE))
+        students = [generate_student(index, seed) for index in indexes]
+        cursor.executemany('''
+            INSERT INTO students (student_id, name, gender, age, major, phone)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        ''', [(s['student_id'], s['name'], s['gender'], s['age'], s['major'], s['phone']) for s in students])
+        if courses and semesters:
+            scores = [row for index in indexes for row in generate_scores(index, courses, semesters, seed)]
+            cursor.executemany('''
+                INSERT INTO scores (student_id, course_name, score, credit, semester, exam_date)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', scores)
+    return max(0, count - existing)
+
+def build(scale: int, courses: int = 4, semesters: int = 2, seed: int = 0) -> Dict[str, Any]:
+    """建表并把测试数据补齐到 scale 个学生，返回写入情况"""
+    init_db()
+    started = time.perf_counter()
+    connection = get_pool().acquire()
+    try:
+        with connection.cursor() as cursor:
+            inserted = 0
+            # 分段提交，避免一个事务过大
+            for target in range(BATCH_SIZE * 10, scale + BATCH_SIZE * 10, BATCH_SIZE * 10):
+                inserted += seed_students(cursor, min(target, scale), courses, semesters, seed)
+                connection.commit()
+    finally:
+        connection.close()
+    # 测试数据绕过了模型层，校正统计汇总表、清空绩点缓存
+    StatisticsModel.reconcile()
+    ScoreModel.invalidate()
+    return {'scale': scale, 'inserted': inserted, 'elapsed': round(time.perf_counter() - started, 3)}
+
+def cleanup() -> int:
+    """删除全部测试数据（分批删除，避免长事务），返回删除的学生数"""
+    deleted = 0
+    connection = get_pool().acquire()
+    try:
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute('''
+                    SELECT student_id FROM students WHERE student_id LIKE %s
+                    ORDER BY student_id LIMIT %s
+                ''', (PREFIX + '%', BATCH_SIZE))
+                ids = [row['student_id'] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                placeholders = ', '.join(['%s'] * len(ids))
+                cursor.execute(f'DELETE FROM scores WHERE student_id IN ({placeholders})', ids)
+                cursor.execute(f'DELETE FROM students WHERE student_id IN ({placeholders})', ids)
+                deleted += cursor.rowcount
+                connection.commit()
+    finally:
+        connection.close()
+    StatisticsModel.reconcile()
+    ScoreModel.invalidate()
+    return deleted
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成合成测试数据')
+    parser.add_argument('--scale', type=int, default=10000, help='测试学生数')
+    parser.add_argument('--courses', type=int, default=4, help='每学期课程数（0 表示不生成成绩）')
+    parser.add_argument('--semesters', type=int, default=2, choices=range(0, len(SEMESTERS) + 1), help='学期数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--cleanup', action='store_true', help='删除全部测试数据')
+    args = parser.parse_args(argv)
+
+    if args.cleanup:
+        print(f'已删除 {cleanup()} 个测试学生')
+        return
+    result = build(args.scale, args.courses, args.semesters, args.seed)
+    print(f"测试学生已补齐到 {result['scale']} 个（新写入 {result['inserted']} 个），用时 {result['elapsed']} 秒")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/gpa_benchmark.py
+"""学期绩点计算基准：一个学期的 GPA、平均分、课程排名和百分位的计算耗时
+
+用法：
+    python -m benchmarks.gpa_benchmark --students 50000 --courses 8
+    python -m benchmarks.gpa_benchmark --semester 2024-2025-1   # 使用数据库中的真实成绩
+
+不指定学期时在内存中生成随机成绩，只测量计算部分；
+指定学期时测量完整的重新计算（读取该学期全部成绩 + 计算）。
+"""
+import argparse
+import random
+import time
+
+from models.score_model import ScoreModel, compute_semester
+
+COURSES = ['高等数学', '线性代数', '概率论', '大学英语', 'Python编程', '数据结构',
+           '数据库系统', '操作系统', '计算机网络', '编译原理', '软件工程', '人工智能']
+
+def generate(students, courses, seed=0):
+    """生成 (id, 学号, 课程名, 分数, 学分) 形式的随机成绩"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(students):
+        for course in rng.sample(COURSES, min(courses, len(COURSES))):
+            rows.append((len(rows) + 1, f'BENCH{i:07d}', course,
+                         round(min(100.0, max(0.0, rng.gauss(78, 10))), 1), rng.choice([2, 3, 4])))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='学期绩点计算基准测试')
+    parser.add_argument('--students', type=int, default=50000, help='学生数')
+    parser.add_argument('--courses', type=int, default=8, help='每个学生的课程数')
+    parser.add_argument('--semester', help='使用数据库中这个学期的成绩')
+    args = parser.parse_args()
+
+    if args.semester:
+        result = ScoreModel.compute_semester(args.semester)
+        print(f"学期 {args.semester}：{len(result['students'])} 名学生，"
+              f"{len(result['ranks'])} 条成绩，用时 {result['elapsed']} 秒")
+        return
+
+    rows = generate(args.students, args.courses)
+    started = time.perf_counter()
+    result = compute_semester(rows)
+    elapsed = time.perf_counter() - started
+    print(f"{args.students} 名学生 × {args.courses} 门课程（{len(rows)} 条成绩）："
+          f"计算用时 {elapsed:.3f} 秒，{len(result['courses'])} 门课程的排名")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+# benchmarks/load_test.py
+"""负载测试：并发客户端压测学生页面和 StudentModel，输出吞吐量和延迟分位数（JSON）
+
+用法：
+    python -m benchmarks.dataset --scale 100000                       # 先准备测试数据
+    python -m benchmarks.load_test --clients 16 --duration 20 --output base.json
+    python -m benchmarks.load_test --clients 16 --duration 20 --compare base.json
+    python -m benchmarks.load_test --base-url http://127.0.0.1:5000   # 压测运行中的服务
+
+场景（--scenarios 选择，默认全部，依次执行，每个场景单独计时）：
+    routes-read   GET /（随机排序）、GET /search、GET /edit/<学号>
+    routes-write  POST /add -> POST /edit/<学号> -> GET /delete/<学号>（新增的学生随后删除）
+    model-read    get_students_page、search_students、get_student_by_id、get_statistics
+    model-write   add_student -> update_student -> delete_student
+
+默认在本进程内用 Flask 测试客户端发请求（不经过网络，客户端与服务端共用 GIL）；
+指定 --base-url 时通过 HTTP 请求运行中的服务，更接近真实部署。model-* 场景总是在本进程内执行。
+页面把异常显示为提示信息时仍返回 200，这类失败不计入错误数，请同时查看服务日志或 /metrics。
+
+--compare 与之前的结果比较，任一操作的 p95 变慢或吞吐量下降超过 --tolerance 时以状态码 1 退出。
+"""
+import argparse
+import datetime
+import http.client
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks import dataset
+from config import Config
+from models.database import get_pool
+from models.pagination import SORTABLE_COLUMNS
+from models.statistics import StatisticsModel
+from models.student_model import StudentModel
+
+SCENARIOS = ('routes-read', 'routes-write', 'model-read', 'model-write')
+KEYWORDS = ['张伟', '王', '软件', '人工智能', '计算机科学', 'BENCH00012', 'BENCH0000042']
+# 写入场景新增的学生（同样以 BENCH 开头，dataset --cleanup 也会删除）
+WRITE_PREFIX = dataset.PREFIX + 'W'
+
+class InProcessClient:
+    """本进程内的 Flask 测试客户端（不保存 cookie，避免提示信息在会话中堆积）"""
+
+    def __init__(self, app):
+        self._client = app.test_client(use_cookies=False)
+
+    def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                data: Optional[Dict[str, Any]] = None) -> int:
+        response = self._client.open(path, method=method, query_string=params, data=data)
+        response.close()
+        return response.status_code
+
+class HttpClient:
+    """HTTP 客户端（每个并发客户端一个长连接，不跟随重定向）"""
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self._connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                  else http.client.HTTPConnection)
+        self._host, self._port = parts.hostname, parts.port
+        self._prefix = parts.path.rstrip('/')
+        self._connection = None
+
+    def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                data: Optional[Dict[str, Any]] = None) -> int:
+        url = self._prefix + path + ('?' + urlencode(params) if params else '')
+        body = urlencode(data) if data is not None else None
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'} if body is not None else {}
+        reused = self._connection is not None
+        if self._connection is None:
+            self._connection = self._connection_class(self._host, self._port, timeout=60)
+        try:
+            self._connection.request(method, url, body=body, headers=headers)
+            response = self._connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            self._connection.close()
+            self._connection = None
+            if not reused:
+                raise
+            # 服务端关闭了空闲的长连接，重新连接后再发一次
+            return self.request(method, path, params, data)
+        if response.will_close:
+            self._connection.close()
+            self._connection = None
+        return response.status
+
+class Worker:
+    """一个并发客户端：循环执行场景，记录每个操作的耗时"""
+
+    def __init__(self, number: int, client, scale: int, seed: int = 0):
+        self.number = number
+        self.client = client
+        self.scale = max(1, scale)
+        self.rng = random.Random(seed * 1000 + number)
+        self.recording = False
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._sequence = 0
+
+    def timed(self, operation: str, func: Callable[[], bool]) -> None:
+        started = time.perf_counter()
+        try:
+            ok = func()
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        if self.recording:
+            self.latencies[operation].append(elapsed)
+            if not ok:
+                self.errors[operation] += 1
+
+    def route(self, operation: str, method: str, path: str, params=None, data=None) -> None:
+        self.timed(operation, lambda: self.client.request(method, path, params, data) < 400)
+
+    def random_id(self) -> str:
+        return dataset.student_id(self.rng.randrange(self.scale))
+
+    def new_id(self) -> str:
+        self._sequence += 1
+        return f'{WRITE_PREFIX}{self.number:02d}{self._sequence:08d}'
+
+    def student_data(self) -> Dict[str, Any]:
+        student = dataset.generate_student(self.rng.randrange(10 ** 6), seed=self.number)
+        del student['student_id']
+        return student
+
+    def student_form(self, student_id: Optional[str] = None) -> Dict[str, str]:
+        form = {key: '' if value is None else str(value) for key, value in self.student_data().items()}
+        if student_id:
+            form['student_id'] = student_id
+        return form
+
+    def routes_read(self) -> None:
+        self.route('GET /', 'GET', '/', {'sort': self.rng.choice(SORTABLE_COLUMNS),
+                                         'order': self.rng.choice(('asc', 'desc'))})
+        self.route('GET /search', 'GET', '/search', {'q': self.rng.choice(KEYWORDS)})
+        self.route('GET /edit', 'GET', f'/edit/{self.random_id()}')
+
+    def routes_write(self) -> None:
+        student_id = self.new_id()
+        self.route('POST /add', 'POST', '/add', data=self.student_form(student_id))
+        self.route('POST /edit', 'POST', f'/edit/{student_id}', data=self.student_form())
+        self.route('GET /delete', 'GET', f'/delete/{student_id}')
+
+    def model_read(self) -> None:
+        self.timed('model.get_students_page', lambda: StudentModel.get_students_page(
+            self.rng.choice(SORTABLE_COLUMNS), self.rng.choice(('asc', 'desc'))) is not None)
+        self.timed('model.search_students',
+                   lambda: StudentModel.search_students(self.rng.choice(KEYWORDS)) is not None)
+        self.timed('model.get_student_by_id',
+                   lambda: StudentModel.get_student_by_id(self.random_id()) is not None)
+        self.timed('model.get_statistics', lambda: StudentModel.get_statistics() is not None)
+
+    def model_write(self) -> None:
+        student_id = self.new_id()
+        self.timed('model.add_student',
+                   lambda: StudentModel.add_student({'student_id': student_id, **self.student_data()}))
+        self.timed('model.update_student',
+                   lambda: StudentModel.update_student(student_id, self.student_data()))
+        self.timed('model.delete_student', lambda: StudentModel.delete_student(student_id))
+
+    def run(self, scenario: str, stop: threading.Event) -> None:
+        step = getattr(self, scenario.replace('-', '_'))
+        while not stop.is_set():
+            step()
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """最近秩法百分位数（sorted_values 已升序排列）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """一个操作的统计：次数、错误数、吞吐量（次/秒）和延迟（毫秒）"""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'count': count,
+        'errors': errors,
+        'throughput': round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        'mean_ms': round(sum(values) * 1000 / count, 3) if count else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """与之前的结果比较，返回退化的操作说明（p95 变慢或吞吐量下降超过 tolerance）"""
+    regressions = []
+    for operation, result in current['operations'].items():
+        before = baseline.get('operations', {}).get(operation)
+        if not before or not before['count'] or not result['count']:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{operation}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if result['throughput'] < before['throughput'] * (1 - tolerance):
+            regressions.append(f"{operation}: 吞吐量 {before['throughput']} -> {result['throughput']} 次/秒")
+    return regressions
+
+def run_scenario(workers: List[Worker], scenario: str, duration: float, warmup: float) -> Dict[str, Any]:
+    """所有客户端并发执行一个场景：先预热 warmup 秒（不计入结果），再计时 duration 秒"""
+    for worker in workers:
+        worker.recording = False
+        worker.latencies.clear()
+        worker.errors.clear()
+    stop = threading.Event()
+    threads = [threading.Thread(target=worker.run, args=(scenario, stop), name=f'load-{worker.number}')
+               for worker in workers]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    for worker in workers:
+        worker.recording = True
+    started = time.perf_counter()
+    time.sleep(duration)
+    for worker in workers:
+        worker.recording = False
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for worker in workers:
+        for operation, values in worker.latencies.items():
+            latencies[operation].extend(values)
+        for operation, count in worker.errors.items():
+            errors[operation] += count
+    return {operation: summarize(values, errors[operation], elapsed)
+            for operation, values in sorted(latencies.items())}
+
+def _delete_written_students() -> None:
+    """删除写入场景遗留的学生（中途失败或被中断时）"""
+    connection = get_pool().acquire()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM students WHERE student_id LIKE %s', (WRITE_PREFIX + '%',))
+            deleted = cursor.rowcount
+        connection.commit()
+    finally:
+        connection.close()
+    if deleted:
+        StatisticsModel.reconcile()
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(scenarios: List[str], clients: int, duration: float, warmup: float,
+        base_url: Optional[str] = None, seed: int = 0) -> Dict[str, Any]:
+    """执行负载测试，返回完整结果（可直接写成 JSON）"""
+    _delete_written_students()
+    scale = dataset.count_students()
+    if base_url:
+        make_client = lambda: HttpClient(base_url)
+    else:
+        from app import create_app
+        app = create_app()
+        make_client = lambda: InProcessClient(app)
+    workers = [Worker(number, make_client(), scale, seed) for number in range(clients)]
+
+    operations = {}
+    try:
+        for scenario in scenarios:
+            print(f'场景 {scenario}：{clients} 个客户端，{duration} 秒 ...', file=sys.stderr)
+            operations.update(run_scenario(workers, scenario, duration, warmup))
+    finally:
+        _delete_written_students()
+
+    return {
+        'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'target': base_url or 'in-process',
+        'scale': scale,
+        'clients': clients,
+        'duration': duration,
+        'scenarios': list(scenarios),
+        'config': {
+            'MYSQL_POOL_MAX_SIZE': Config.MYSQL_POOL_MAX_SIZE,
+            'MYSQL_POOL_MAX_OVERFLOW': Config.MYSQL_POOL_MAX_OVERFLOW,
+            'QUERY_EXECUTOR_WORKERS': Config.QUERY_EXECUTOR_WORKERS,
+            'PAGE_SIZE': Config.PAGE_SIZE,
+        },
+        'operations': operations,
+    }
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"{'操作':<26} {'次数':>8} {'错误':>6} {'吞吐(次/秒)':>12} "
+          f"{'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'max(ms)':>9}")
+    for operation, stats in result['operations'].items():
+        print(f"{operation:<26} {stats['count']:>8} {stats['errors']:>6} {stats['throughput']:>12} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['max_ms']:>9}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='负载测试')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--clients', type=int, default=8, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=10.0, help='每个场景的计时秒数')
+    parser.add_argument('--warmup', type=float, default=2.0, help='每个场景的预热秒数（不计入结果）')
+    parser.add_argument('--base-url', help='压测运行中的服务，例如 http://127.0.0.1:5000')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--output', help='结果写入的 JSON 文件')
+    parser.add_argument('--compare', help='与之前的 JSON 结果比较')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='比较时允许的退化比例')
+    args = parser.parse_args(argv)
+
+    result = run(args.scenarios, max(1, args.clients), args.duration, args.warmup, args.base_url, args.seed)
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f'结果已写入 {args.output}')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f'退化 {line}')
+        if regressions:
+            sys.exit(1)
+        print('与基线相比没有超过允许范围的退化')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/row_benchmark.py
+"""行对象基准：DictCursor 的 dict 行与元组游标 + 紧凑记录（models/records.py）的内存和构造速度
+
+用法：
+    python -m benchmarks.row_benchmark                       # 合成 100 万行，不需要数据库
+    python -m benchmarks.row_benchmark --rows 200000
+    python -m benchmarks.row_benchmark --live                # 再用 StudentModel.get_all_students 读取真实表
+
+合成部分先生成 rows 个元组（与 students 表的列相同，值对象两种方式共用），
+再分别按 DictCursor 的方式（dict(zip(列名, 行))）和紧凑记录构造全部行，
+输出行对象本身占用的内存（tracemalloc，不含共用的值）和构造耗时；
+紧凑记录是 GC 跟踪的对象，大量构造时会触发分代回收，因此另外给出关闭 GC 时的纯构造耗时。
+端到端部分先用 python -m benchmarks.dataset --scale 1000000 准备数据，
+比较 get_all_students() 与 get_all_students(compact=True) 的耗时和内存峰值。
+"""
+import argparse
+import datetime
+import gc
+import time
+import tracemalloc
+
+from benchmarks.dataset import generate_student, student_id
+from models.records import record_class, to_records
+
+COLUMNS = ('student_id', 'name', 'gender', 'age', 'major', 'phone', 'created_at', 'updated_at')
+# 只生成这么多个不同的学生，其余行复用它们的值（学号仍各不相同）
+DISTINCT = 1000
+
+def synthetic_rows(count):
+    """与 SELECT * FROM students 结果相同形状的元组行"""
+    created = datetime.datetime(2025, 9, 1, 8, 0, 0)
+    templates = [generate_student(index) for index in range(DISTINCT)]
+    rows = []
+    for index in range(count):
+        student = templates[index % DISTINCT]
+        rows.append((student_id(index), student['name'], student['gender'], student['age'],
+                     student['major'], student['phone'], created, created))
+    return rows
+
+def build_dicts(rows):
+    # 与 pymysql.cursors.DictCursor 构造每一行的方式相同
+    return [dict(zip(COLUMNS, row)) for row in rows]
+
+def build_records(rows):
+    return list(to_records(record_class(COLUMNS), rows))
+
+def _timed(build, rows, collect):
+    gc.collect()
+    if not collect:
+        gc.disable()
+    try:
+        started = time.perf_counter()
+        build(rows)
+        return time.perf_counter() - started
+    finally:
+        gc.enable()
+
+def measure(build, rows):
+    """(构造耗时秒, 关闭 GC 时的构造耗时秒, 行对象占用的字节数)"""
+    elapsed = _timed(build, rows, True)
+    construct = _timed(build, rows, False)
+    gc.collect()
+
+    tracemalloc.start()
+    result = build(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, construct, size
+
+def _header(memory):
+    print(f"{'行对象':<16} {'耗时(s)':>9} {'百万行/秒':>11} {'不计GC(s)':>11} {memory:>11} {'字节/行':>9}")
+
+def _report(name, elapsed, construct, size, count):
+    construct = '-' if construct is None else f'{construct:.3f}'
+    print(f"{name:<16} {elapsed:>9.3f} {count / elapsed / 1e6:>11.2f} {construct:>11} "
+          f"{size / 1024 / 1024:>11.1f} {size / count:>9.0f}")
+
+def run_offline(count):
+    print(f"生成 {count} 行合成数据...")
+    rows = synthetic_rows(count)
+    _header('内存(MiB)')
+    for name, build in (('dict (DictCursor)', build_dicts), ('紧凑记录', build_records)):
+        elapsed, construct, size = measure(build, rows)
+        _report(name, elapsed, construct, size, count)
+
+def run_live():
+    from models.student_model import StudentModel
+
+    print('\nget_all_students:')
+    _header('峰值(MiB)')
+    for name, compact in (('dict (DictCursor)', False), ('紧凑记录', True)):
+        gc.collect()
+        started = time.perf_counter()
+        count = len(StudentModel.get_all_students(compact=compact))
+        elapsed = time.perf_counter() - started
+        if not count:
+            print("没有读到学生，请先运行 python -m benchmarks.dataset --scale 1000000")
+            return
+        # 内存峰值单独测一次（tracemalloc 会明显拖慢读取）
+        gc.collect()
+        tracemalloc.start()
+        StudentModel.get_all_students(compact=compact)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        _report(name, elapsed, None, peak, count)
+
+def main():
+    parser = argparse.ArgumentParser(description='行对象内存和构造速度基准测试')
+    parser.add_argument('--rows', type=int, default=1000000, help='合成数据的行数')
+    parser.add_argument('--live', action='store_true', help='连接数据库读取真实的学生表')
+    args = parser.parse_args()
+
+    run_offline(args.rows)
+    if args.live:
+        run_live()
+
+if __name__ == '__main__':
+    main()
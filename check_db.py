@@ -40,7 +40,8 @@ except Exception as e:
     sys.exit(1)
 
 try:
-    from models.database import test_connection, init_db, execute_query
+    from models.database import test_connection, execute_query
+    from models.migrations import init_db
     print("\n🔌 测试数据库连接:")
     
     # 测试连接
@@ -1,8 +1,17 @@
 # config.py
+"""应用配置
+
+导入本模块只读取环境变量（和 .env 文件），不打印任何内容、不连接数据库；
+读取时发现的问题在 Config.validate() 中统一输出，由 create_app() 调用
+（冷启动优化模式下在后台预热线程中调用）。
+"""
+import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # 获取项目根目录
 basedir = Path(__file__).parent.absolute()
 env_path = basedir / '.env'
@@ -10,10 +19,31 @@ env_path = basedir / '.env'
 # 加载环境变量
 if env_path.exists():
     load_dotenv(dotenv_path=env_path)
-    print(f"✅ 加载配置文件: {env_path}")
-else:
-    print(f"⚠️ 警告: 找不到 .env 文件，使用默认配置")
-    print(f"   期望路径: {env_path}")
+
+# 读取配置时发现的问题（由 Config.validate() 输出）
+_warnings = []
+
+def _get_int_env(name, default):
+    """读取整数类型的环境变量，非法值时回退到默认值"""
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        _warnings.append(f"{name} 不是有效的数字: {value}，使用默认值 {default}")
+        return default
+
+def _get_float_env(name, default):
+    """读取浮点数类型的环境变量，非法值时回退到默认值"""
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        _warnings.append(f"{name} 不是有效的数字: {value}，使用默认值 {default}")
+        return default
 
 class Config:
     """应用配置类"""
@@ -27,28 +57,116 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', '')
     MYSQL_DB = os.getenv('MYSQL_DB', 'student_db')
     
-    # 处理 MySQL 端口 - 确保是整数
-    mysql_port = os.getenv('MYSQL_PORT', '3306')
-    try:
-        MYSQL_PORT = int(mysql_port)
-    except ValueError:
-        print(f"⚠️ MYSQL_PORT 不是有效的数字: {mysql_port}，使用默认值 3306")
-        MYSQL_PORT = 3306
+    MYSQL_PORT = _get_int_env('MYSQL_PORT', 3306)
+    
+    # 连接池配置
+    MYSQL_POOL_MIN_SIZE = _get_int_env('MYSQL_POOL_MIN_SIZE', 1)            # 启动时预建的连接数
+    MYSQL_POOL_MAX_SIZE = _get_int_env('MYSQL_POOL_MAX_SIZE', 10)           # 常驻连接上限
+    MYSQL_POOL_MAX_OVERFLOW = _get_int_env('MYSQL_POOL_MAX_OVERFLOW', 5)    # 高峰期允许的临时连接数
+    MYSQL_POOL_TIMEOUT = _get_float_env('MYSQL_POOL_TIMEOUT', 10.0)         # 获取连接的等待超时（秒）
+    MYSQL_POOL_RECYCLE = _get_int_env('MYSQL_POOL_RECYCLE', 3600)           # 连接最长存活时间（秒），0 表示不回收
+    MYSQL_POOL_PING_INTERVAL = _get_int_env('MYSQL_POOL_PING_INTERVAL', 30) # 空闲超过该秒数的连接取出时先 ping
+
+    # 主库健康检查与熔断：后台每隔 DB_HEALTH_CHECK_INTERVAL 秒探测一次（0 表示不启动），探测的连接、读取超时（秒）；
+    # 连续 DB_BREAKER_FAILURE_THRESHOLD 次连接失败后熔断，DB_BREAKER_RESET_TIMEOUT 秒内请求直接失败
+    DB_HEALTH_CHECK_INTERVAL = _get_float_env('DB_HEALTH_CHECK_INTERVAL', 5.0)
+    DB_HEALTH_CHECK_TIMEOUT = _get_float_env('DB_HEALTH_CHECK_TIMEOUT', 2.0)
+    DB_BREAKER_FAILURE_THRESHOLD = _get_int_env('DB_BREAKER_FAILURE_THRESHOLD', 3)
+    DB_BREAKER_RESET_TIMEOUT = _get_float_env('DB_BREAKER_RESET_TIMEOUT', 10.0)
+
+    # 读写分离：只读查询分发到从库（逗号分隔的 host[:port]，用户名、密码、库名与主库相同；留空表示不使用从库）
+    MYSQL_REPLICAS = os.getenv('MYSQL_REPLICAS', '')
+    MYSQL_REPLICA_STRATEGY = os.getenv('MYSQL_REPLICA_STRATEGY', 'round_robin')          # round_robin 或 least_latency
+    MYSQL_REPLICA_MAX_LAG = _get_float_env('MYSQL_REPLICA_MAX_LAG', 5.0)                 # 复制延迟超过该秒数的从库暂不使用
+    MYSQL_REPLICA_CHECK_INTERVAL = _get_float_env('MYSQL_REPLICA_CHECK_INTERVAL', 5.0)   # 检查复制延迟的间隔（秒）
+    MYSQL_REPLICA_RETRY_INTERVAL = _get_float_env('MYSQL_REPLICA_RETRY_INTERVAL', 30.0)  # 连接失败的从库暂停使用的秒数
+
+    # 结构迁移：DDL 等待元数据锁的最长秒数，超时后放弃并重试（见 models.migrations）
+    MIGRATION_LOCK_WAIT_TIMEOUT = _get_int_env('MIGRATION_LOCK_WAIT_TIMEOUT', 10)
+
+    # 合并写入队列：并发的添加、修改请求合并为多行语句，在一个事务中提交（见 models.write_queue）
+    WRITE_QUEUE_ENABLED = os.getenv('WRITE_QUEUE_ENABLED', 'False').lower() == 'true'
+    WRITE_QUEUE_MAX_DELAY_MS = _get_float_env('WRITE_QUEUE_MAX_DELAY_MS', 5.0)  # 一批最多等待的毫秒数
+    WRITE_QUEUE_MAX_BATCH = _get_int_env('WRITE_QUEUE_MAX_BATCH', 200)          # 一批最多写入的条数
+    WRITE_QUEUE_MAX_PENDING = _get_int_env('WRITE_QUEUE_MAX_PENDING', 5000)     # 队列上限，超过时改为同步写入
+    WRITE_QUEUE_TIMEOUT = _get_float_env('WRITE_QUEUE_TIMEOUT', 5.0)            # 请求等待写入结果的最长秒数
+
+    # 准入控制：每个进程同时处理的数据库请求数（0 表示 (MYSQL_POOL_MAX_SIZE + MYSQL_POOL_MAX_OVERFLOW) // 2，
+    # 一个请求最多同时占用 2 条连接）、等待队列长度、最长排队秒数，
+    # 排不上时返回 503，Retry-After 为 ADMISSION_RETRY_AFTER 秒（见 controllers.admission）
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_MAX_CONCURRENT = _get_int_env('ADMISSION_MAX_CONCURRENT', 0)
+    ADMISSION_QUEUE_SIZE = _get_int_env('ADMISSION_QUEUE_SIZE', 20)
+    ADMISSION_QUEUE_TIMEOUT = _get_float_env('ADMISSION_QUEUE_TIMEOUT', 1.0)
+    ADMISSION_RETRY_AFTER = _get_int_env('ADMISSION_RETRY_AFTER', 2)
+
+    # 批量导入配置
+    IMPORT_BATCH_SIZE = _get_int_env('IMPORT_BATCH_SIZE', 1000)    # 每批校验、查重、写入的行数
+    IMPORT_COMMIT_SIZE = _get_int_env('IMPORT_COMMIT_SIZE', 5000)  # 每个事务写入的行数
+    
+    # 并发查询配置
+    QUERY_EXECUTOR_WORKERS = _get_int_env('QUERY_EXECUTOR_WORKERS', 0)  # 查询线程数，0 表示与连接池常驻连接数相同
+    QUERY_DEADLINE = _get_float_env('QUERY_DEADLINE', 3.0)              # 每个请求等待并发查询的最长时间（秒）
+    
+    # 批量删除、修改时每条 IN 语句包含的学号数
+    BATCH_CHUNK_SIZE = _get_int_env('BATCH_CHUNK_SIZE', 500)
+    
+    # 学期绩点计算结果的缓存时间（秒），0 表示一直缓存到成绩变化
+    GPA_CACHE_TTL = _get_int_env('GPA_CACHE_TTL', 600)
+    
+    # 统计汇总表后台校正间隔（秒），0 表示不启动后台校正
+    STATS_RECONCILE_INTERVAL = _get_int_env('STATS_RECONCILE_INTERVAL', 3600)
+    
+    # 变更流（/api/changes）：每页最多返回的变更数；压缩多少天前已被覆盖的变更记录（0 表示不压缩）
+    CHANGE_FEED_PAGE_SIZE = _get_int_env('CHANGE_FEED_PAGE_SIZE', 500)
+    CHANGE_FEED_COMPACT_DAYS = _get_int_env('CHANGE_FEED_COMPACT_DAYS', 7)
+    # 变更 ID 出现空缺时最多等待未提交事务的时间（秒），应大于最长的写入事务
+    CHANGE_FEED_SETTLE_SECONDS = _get_int_env('CHANGE_FEED_SETTLE_SECONDS', 60)
+    
+    # 搜索配置
+    SEARCH_RESULT_LIMIT = _get_int_env('SEARCH_RESULT_LIMIT', 200)  # 搜索最多返回的条数
+    SEARCH_NGRAM_SIZE = _get_int_env('SEARCH_NGRAM_SIZE', 2)        # 与 MySQL 的 ngram_token_size 保持一致
+    
+    # 搜索联想配置
+    SUGGEST_LIMIT = _get_int_env('SUGGEST_LIMIT', 8)                          # 联想结果条数
+    SUGGEST_REFRESH_INTERVAL = _get_int_env('SUGGEST_REFRESH_INTERVAL', 300)  # 联想索引后台重建间隔（秒）
+    
+    # 日志与性能指标
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()        # DEBUG 时输出每个请求的耗时和查询数
+    SLOW_QUERY_MS = _get_float_env('SLOW_QUERY_MS', 200.0)    # 慢查询阈值（毫秒），0 表示不记录
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'  # 是否开放 /metrics
+    
+    # 冷启动优化：配置校验、数据库连接和模板编译放到后台预热线程，模板字节码缓存到 JINJA_CACHE_DIR
+    FAST_START = os.getenv('FAST_START', 'False').lower() == 'true'
+    JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR', str(basedir / '.jinja_cache'))
+    
+    # 生产环境多进程服务（python app.py serve）：监听地址、worker 进程数（0 表示 CPU 核数）、每个 worker 的线程数、
+    # worker 处理多少个请求后重启（0 表示不重启）及随机抖动、平滑退出时等待处理中请求的最长时间（秒）
+    SERVER_BIND = os.getenv('SERVER_BIND', '127.0.0.1:8000')
+    SERVER_WORKERS = _get_int_env('SERVER_WORKERS', 0)
+    SERVER_THREADS = _get_int_env('SERVER_THREADS', 8)
+    SERVER_MAX_REQUESTS = _get_int_env('SERVER_MAX_REQUESTS', 0)
+    SERVER_MAX_REQUESTS_JITTER = _get_int_env('SERVER_MAX_REQUESTS_JITTER', 0)
+    SERVER_GRACEFUL_TIMEOUT = _get_float_env('SERVER_GRACEFUL_TIMEOUT', 30.0)
     
     # 应用配置
+    PAGE_SIZE = _get_int_env('PAGE_SIZE', 20)  # 学生列表每页条数
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     
     @classmethod
     def validate(cls):
-        """验证必要配置"""
+        """验证必要配置（同时输出读取配置时发现的问题）"""
+        if env_path.exists():
+            logger.info(f"加载配置文件: {env_path}")
+        else:
+            logger.warning(f"找不到 .env 文件，使用默认配置（期望路径: {env_path}）")
+        for message in _warnings:
+            logger.warning(message)
         if not cls.MYSQL_PASSWORD:
-            print("⚠️ 警告: MYSQL_PASSWORD 未设置")
+            logger.warning("MYSQL_PASSWORD 未设置")
             return False
-        print(f"✅ 数据库配置: {cls.MYSQL_HOST}:{cls.MYSQL_PORT}/{cls.MYSQL_DB}")
+        logger.info(f"数据库配置: {cls.MYSQL_HOST}:{cls.MYSQL_PORT}/{cls.MYSQL_DB}")
         return True
 
 # 创建配置实例
 config = Config()
-
-# 验证配置
-config.validate()
\ No newline at end of file
@@ -1,5 +1,14 @@
 # controllers/__init__.py
 """控制器包"""
 from controllers.student_controller import student_bp
+from controllers import (  # noqa: F401  注册准入控制钩子和导出、导入、JSON 接口、成绩单、性能指标路由
+    admission,
+    export_controller,
+    import_controller,
+    api_controller,
+    api_v1_controller,
+    score_controller,
+    metrics_controller
+)
 
 __all__ = ['student_bp']
\ No newline at end of file
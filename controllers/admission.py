@@ -0,0 +1,216 @@
+# controllers/admission.py
+"""准入控制：限制每个进程同时访问数据库的请求数，过载时快速返回 503
+
+MySQL 变慢时，如果不加限制，所有线程都会堵在取连接和执行查询上，请求越积越多，直到整个站点超时。
+student_bp 的请求在进入视图之前先取得一个名额（ADMISSION_MAX_CONCURRENT，默认见 default_limit()）：
+
+- 名额用完时进入一个很短的等待队列（最多 ADMISSION_QUEUE_SIZE 个、最长等待 ADMISSION_QUEUE_TIMEOUT 秒）；
+- 按学号查询、编辑、添加、删除等代价小的请求优先：名额释放时先交给它们，
+  队列满时还可以挤掉排在队尾的列表、搜索、导出等代价大的请求；
+- 排不上队或等待超时的请求立即返回 503 和 Retry-After（/api 下返回 JSON），
+  计入 /metrics 的 http_requests_shed_total；
+- 名额在响应发送完毕时释放（流式响应发送完才释放）；/metrics、搜索联想和 /test-db 不受限制。
+
+主库熔断器打开时（见 models.database.CircuitBreaker），视图没有处理的 DatabaseUnavailableError
+同样以 503 返回，Retry-After 为距离下一次试探的秒数。
+"""
+import collections
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from flask import Response, jsonify, request
+from config import Config
+from controllers.student_controller import student_bp
+from models.database import DatabaseUnavailableError, get_breaker
+from models.executor import CONNECTIONS_PER_REQUEST
+from models.metrics import ADMISSION_SHED, ADMISSION_WAIT
+
+logger = logging.getLogger(__name__)
+
+# 优先级（数值小的优先）
+PRIORITY_HIGH = 0  # 按主键的查询和单条写入
+PRIORITY_LOW = 1   # 全表列表、搜索、统计、导出、导入、批量操作
+
+PRIORITY_NAMES = ('high', 'low')
+
+EXPENSIVE_ENDPOINTS = frozenset({
+    'student.index', 'student.search', 'student.export', 'student.import_students', 'student.batch',
+    'student.init_database', 'student.list_students', 'student.list_changes',
+})
+# 不访问数据库（或用于监控）的路由
+EXEMPT_ENDPOINTS = frozenset({'student.metrics', 'student.suggest', 'student.test_database'})
+
+# 拒绝原因
+SHED_QUEUE_FULL = 'queue_full'
+SHED_TIMEOUT = 'timeout'
+SHED_EVICTED = 'evicted'
+
+_WAITING, _GRANTED, _EVICTED = range(3)
+
+def route_priority(endpoint: Optional[str]) -> Optional[int]:
+    """路由的优先级，不受限制的路由返回 None"""
+    if not endpoint or endpoint in EXEMPT_ENDPOINTS:
+        return None
+    return PRIORITY_LOW if endpoint in EXPENSIVE_ENDPOINTS else PRIORITY_HIGH
+
+class _Waiter:
+    __slots__ = ('priority', 'event', 'state')
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.event = threading.Event()
+        self.state = _WAITING
+
+class AdmissionLimiter:
+    """带优先级等待队列的并发名额（线程安全）"""
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queues = tuple(collections.deque() for _ in PRIORITY_NAMES)
+
+    def acquire(self, priority: int, timeout: Optional[float] = None) -> Optional[str]:
+        """取得名额时返回 None，被拒绝时返回原因（SHED_*）"""
+        with self._lock:
+            waiting = sum(len(queue) for queue in self._queues)
+            # 有请求在排队时不插队
+            if self._active < self.limit and not waiting:
+                self._active += 1
+                return None
+            if waiting >= self.queue_size:
+                victim = self._evictable(priority)
+                if victim is None:
+                    return SHED_QUEUE_FULL
+                victim.state = _EVICTED
+                victim.event.set()
+            waiter = _Waiter(priority)
+            self._queues[priority].append(waiter)
+
+        waiter.event.wait(self.timeout if timeout is None else timeout)
+        with self._lock:
+            if waiter.state == _GRANTED:
+                return None
+            if waiter.state == _EVICTED:
+                return SHED_EVICTED
+            self._queues[priority].remove(waiter)
+            return SHED_TIMEOUT
+
+    def release(self) -> None:
+        """归还名额：交给排在最前面的优先级最高的请求"""
+        with self._lock:
+            for queue in self._queues:
+                if queue:
+                    waiter = queue.popleft()
+                    waiter.state = _GRANTED
+                    waiter.event.set()
+                    return
+            self._active -= 1
+
+    def _evictable(self, priority: int) -> Optional[_Waiter]:
+        """队列已满时可以挤掉的请求：比 priority 优先级低的队列中最后到达的一个（调用方持有锁）"""
+        for queue in reversed(self._queues[priority + 1:]):
+            if queue:
+                return queue.pop()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'active': self._active,
+                'waiting': sum(len(queue) for queue in self._queues),
+            }
+
+class _Ticket:
+    """请求取得的名额，只归还一次"""
+
+    __slots__ = ('limiter', 'deferred', '_released')
+
+    def __init__(self, limiter: AdmissionLimiter):
+        self.limiter = limiter
+        self.deferred = False
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter.release()
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def default_limit() -> int:
+    """默认名额数：连接池的最大连接数（含临时连接）除以一个请求最多同时占用的连接数
+
+    首页、搜索页的请求占用自己的连接和一个查询线程的连接（见 models.executor），
+    名额按它计算，所有名额同时在用时连接池也不会被耗尽。
+    """
+    capacity = Config.MYSQL_POOL_MAX_SIZE + Config.MYSQL_POOL_MAX_OVERFLOW
+    return max(1, capacity // CONNECTIONS_PER_REQUEST)
+
+def get_limiter() -> AdmissionLimiter:
+    """进程内的准入限制（首次调用时按 Config 创建）"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdmissionLimiter(Config.ADMISSION_MAX_CONCURRENT or default_limit(),
+                                            Config.ADMISSION_QUEUE_SIZE, Config.ADMISSION_QUEUE_TIMEOUT)
+    return _limiter
+
+def get_admission_stats() -> Optional[Dict[str, Any]]:
+    """准入控制的当前状态（未启用或还没有请求时为 None）"""
+    return _limiter.stats() if Config.ADMISSION_ENABLED and _limiter is not None else None
+
+def overloaded_response(message: str = '服务繁忙，请稍后重试', retry_after: Optional[int] = None) -> Response:
+    """503 响应：/api 下为 JSON，其余为文本"""
+    if request.path.startswith('/api/'):
+        response = jsonify(error=message)
+    else:
+        response = Response(message, mimetype='text/plain')
+    response.status_code = 503
+    response.headers['Retry-After'] = str(Config.ADMISSION_RETRY_AFTER if retry_after is None else retry_after)
+    return response
+
+@student_bp.before_request
+def _admit():
+    if not Config.ADMISSION_ENABLED:
+        return None
+    priority = route_priority(request.endpoint)
+    if priority is None:
+        return None
+    limiter = get_limiter()
+    started = time.perf_counter()
+    reason = limiter.acquire(priority)
+    ADMISSION_WAIT.observe(time.perf_counter() - started, PRIORITY_NAMES[priority])
+    if reason is not None:
+        ADMISSION_SHED.inc(1, request.endpoint, reason)
+        logger.warning(f"过载，拒绝请求 {request.method} {request.path}（{reason}）")
+        return overloaded_response()
+    request.environ['admission.ticket'] = _Ticket(limiter)
+    return None
+
+@student_bp.after_request
+def _release_on_close(response):
+    ticket = request.environ.get('admission.ticket')
+    if ticket is not None:
+        # 流式响应在视图返回后才读取数据库，发送完毕时再归还名额
+        ticket.deferred = True
+        response.call_on_close(ticket.release)
+    return response
+
+@student_bp.teardown_request
+def _release(error=None):
+    ticket = request.environ.get('admission.ticket')
+    if ticket is not None and not ticket.deferred:
+        ticket.release()
+
+@student_bp.errorhandler(DatabaseUnavailableError)
+def _database_unavailable(error):
+    return overloaded_response('数据库暂时不可用，请稍后重试', max(1, math.ceil(get_breaker().retry_in())))
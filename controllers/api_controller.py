@@ -0,0 +1,32 @@
+# controllers/api_controller.py
+import logging
+from flask import request, jsonify
+from config import Config
+from controllers.student_controller import student_bp
+from models.suggest import suggest_index
+
+logger = logging.getLogger(__name__)
+
+# 联想接口单次最多返回的条数
+MAX_SUGGEST_LIMIT = 20
+
+class ApiController:
+    """JSON 接口控制器"""
+    
+    @staticmethod
+    @student_bp.route('/api/suggest')
+    def suggest():
+        """搜索框联想：按学号、姓名或拼音首字母前缀返回候选学生"""
+        query = request.args.get('q', '').strip()
+        try:
+            limit = min(max(int(request.args.get('limit', Config.SUGGEST_LIMIT)), 1), MAX_SUGGEST_LIMIT)
+        except ValueError:
+            limit = Config.SUGGEST_LIMIT
+        
+        if not query:
+            return jsonify(items=[])
+        try:
+            return jsonify(items=suggest_index.suggest(query, limit))
+        except Exception as e:
+            logger.error(f"搜索联想错误: {e}")
+            return jsonify(items=[], error='联想服务暂不可用'), 503
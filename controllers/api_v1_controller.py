@@ -0,0 +1,196 @@
+# controllers/api_v1_controller.py
+"""学生数据接口 /api/v1（供其他系统调用，不再需要解析 HTML 页面）
+
+    GET /api/v1/students                    学生列表（JSON，键集分页）
+        ?fields=student_id,name             只返回（也只查询）指定字段，默认全部
+        ?sort=&order=&limit=                排序与每页条数（最多 100 条）
+        ?after= / ?before=                  上一页返回的 next_cursor / prev_cursor
+        ?q=                                 关键词搜索（按相关度排序，不分页，最多 SEARCH_RESULT_LIMIT 条）
+    GET /api/v1/students?format=ndjson      流式返回全部（或全部匹配 q 的）学生，每行一个 JSON 对象；
+                                            也可以用请求头 Accept: application/x-ndjson
+    GET /api/v1/students/<student_id>       单个学生
+    GET /api/changes?since=<cursor>         游标之后的学生变更（增量同步，也可以用 /api/v1/changes）
+        ?since=latest                       只返回当前最新的游标（全量同步之前先取得）
+        ?limit=                             每页最多读取的变更数（默认 CHANGE_FEED_PAGE_SIZE，最多 5000）
+
+日期时间输出为 ISO 8601 字符串，Decimal 输出为数字；响应按 Accept-Encoding 使用 gzip / deflate 压缩，
+并带有 ETag（见 controllers.conditional），数据没有变化时返回 304。
+"""
+import json
+import logging
+from datetime import date
+from decimal import Decimal
+from itertools import chain
+
+from flask import Response, request
+from config import Config
+from controllers.compression import compressed
+from controllers.conditional import conditional_get
+from controllers.student_controller import student_bp
+from models.changes import ChangeFeed
+from models.pagination import decode_cursor
+from models.student_model import StudentModel, STUDENT_EXPORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+# 接口可以返回的字段
+API_FIELDS = STUDENT_EXPORT_COLUMNS
+# NDJSON 每积累这么多行输出一次
+FLUSH_ROWS = 500
+# 变更流每页最多读取的变更数
+MAX_CHANGES_LIMIT = 5000
+
+def _json_default(value):
+    # datetime 是 date 的子类
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # 分数等 DECIMAL 列的有效位数远少于 15 位，转为 float 不会丢失精度
+        return float(value)
+    raise TypeError(f'无法序列化 {type(value).__name__}')
+
+# 复用同一个编码器：紧凑分隔符、不转义中文，只有日期和 Decimal 才回调 Python 代码
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+def dumps(value) -> str:
+    """序列化为紧凑的 JSON 字符串"""
+    return _encoder.encode(value)
+
+def parse_fields(raw):
+    """解析 fields 参数（逗号分隔，去重保序），为空时返回全部字段，有未知字段时抛出 ValueError"""
+    fields = list(dict.fromkeys(field.strip() for field in (raw or '').split(',') if field.strip()))
+    if not fields:
+        return list(API_FIELDS)
+    unknown = [field for field in fields if field not in API_FIELDS]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}，可用字段: {', '.join(API_FIELDS)}")
+    return fields
+
+def _project(rows, fields):
+    return [{field: row.get(field) for field in fields} for row in rows]
+
+def _json_response(payload, status=200):
+    response = Response(dumps(payload), status=status, mimetype='application/json')
+    response.vary.add('Accept')
+    return response
+
+def _error(message, status):
+    return _json_response({'error': message}, status)
+
+def _wants_ndjson():
+    requested = request.args.get('format')
+    if requested in ('json', 'ndjson'):
+        return requested == 'ndjson'
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def _iter_ndjson(rows, fields):
+    lines = []
+    for row in rows:
+        lines.append(dumps({field: row[field] for field in fields}))
+        if len(lines) >= FLUSH_ROWS:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+class ApiV1Controller:
+    """学生数据接口控制器"""
+
+    @staticmethod
+    @student_bp.route('/api/v1/students')
+    @compressed
+    @conditional_get
+    def list_students():
+        """学生列表：JSON 分页或 NDJSON 流"""
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            for name in ('after', 'before'):
+                if request.args.get(name):
+                    decode_cursor(request.args[name])
+        except ValueError as e:
+            return _error(str(e), 400)
+
+        keyword = request.args.get('q', '').strip()
+        if _wants_ndjson():
+            return ApiV1Controller._stream_students(keyword, fields)
+
+        if keyword:
+            try:
+                limit = min(max(int(request.args.get('limit', Config.SEARCH_RESULT_LIMIT)), 1),
+                            Config.SEARCH_RESULT_LIMIT)
+            except ValueError:
+                limit = Config.SEARCH_RESULT_LIMIT
+            students = StudentModel.search_students(keyword, limit)
+            return _json_response({'items': _project(students, fields), 'q': keyword})
+
+        page = StudentModel.get_students_page(
+            request.args.get('sort'),
+            request.args.get('order'),
+            request.args.get('after'),
+            request.args.get('before'),
+            request.args.get('limit', Config.PAGE_SIZE),
+            columns=fields
+        )
+        return _json_response({
+            'items': _project(page['students'], fields),
+            'sort': page['sort'],
+            'order': page['order'],
+            'limit': page['limit'],
+            'next_cursor': page['next_cursor'],
+            'prev_cursor': page['prev_cursor'],
+        })
+
+    @staticmethod
+    def _stream_students(keyword, fields):
+        rows = StudentModel.iter_students(keyword=keyword or None, columns=fields)
+        try:
+            # 先取出第一行，让连接和查询错误在开始输出之前暴露出来
+            first = next(rows, None)
+        except Exception as e:
+            logger.error(f"接口查询学生错误: {e}")
+            return _error('查询失败，请稍后重试', 503)
+        if first is not None:
+            rows = chain([first], rows)
+        response = Response(_iter_ndjson(rows, fields), mimetype=NDJSON_MIMETYPE,
+                            headers={'X-Accel-Buffering': 'no'})
+        response.vary.add('Accept')
+        return response
+
+    @staticmethod
+    @student_bp.route('/api/v1/students/<student_id>')
+    @compressed
+    @conditional_get
+    def get_student(student_id):
+        """单个学生"""
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return _error(str(e), 400)
+        student = StudentModel.get_student_by_id(student_id)
+        if student is None:
+            return _error('学生不存在', 404)
+        return _json_response(_project([student], fields)[0])
+
+    @staticmethod
+    @student_bp.route('/api/changes')
+    @student_bp.route('/api/v1/changes')
+    @compressed
+    def list_changes():
+        """变更流：返回 since 游标之后的变更，下次请求把 next 作为 since，has_more 为 false 时已经追上
+
+        不做条件请求：返回哪些记录还取决于时间（空缺过了 CHANGE_FEED_SETTLE_SECONDS 才越过，数据版本不变），
+        按数据版本生成的 ETag 会让轮询的客户端一直停在 304。
+        """
+        try:
+            since = ChangeFeed.parse_cursor(request.args.get('since'))
+            limit = min(max(int(request.args.get('limit', Config.CHANGE_FEED_PAGE_SIZE)), 1), MAX_CHANGES_LIMIT)
+        except ValueError as e:
+            return _error(str(e), 400)
+        try:
+            if since is None:
+                return _json_response({'items': [], 'next': str(ChangeFeed.latest_cursor()), 'has_more': False})
+            return _json_response(ChangeFeed.changes_since(since, limit))
+        except Exception as e:
+            logger.error(f"变更流查询错误: {e}")
+            return _error('变更流暂不可用', 503)
@@ -0,0 +1,68 @@
+# controllers/compression.py
+"""按 Accept-Encoding 压缩响应（gzip / deflate）
+
+- 普通响应整体压缩，小于 COMPRESS_MIN_SIZE 字节的不压缩；
+- 流式响应逐块压缩，每块之后同步刷新（Z_SYNC_FLUSH），客户端可以边收边解压；
+- 客户端没有声明支持、或已经压缩过的响应原样返回。
+"""
+import functools
+import zlib
+
+from flask import make_response, request
+
+# 小于该字节数的响应不压缩（压缩收益抵不过开销）
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_LEVEL = 6
+
+# Content-Encoding -> zlib 的 wbits：gzip 格式为 16 + 15，HTTP 的 deflate 实际是 zlib 格式
+_WBITS = {'gzip': 31, 'deflate': 15}
+
+def negotiate_encoding():
+    """按 Accept-Encoding（含 q 值）选择压缩方式，不压缩时返回 None"""
+    return request.accept_encodings.best_match(list(_WBITS))
+
+def _compressor(encoding):
+    return zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, _WBITS[encoding])
+
+def _iter_compressed(chunks, encoding):
+    compressor = _compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if chunk:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def compress_response(response):
+    """按请求的 Accept-Encoding 压缩响应"""
+    response.vary.add('Accept-Encoding')
+    if response.status_code < 200 or response.status_code in (204, 304) or 'Content-Encoding' in response.headers:
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _iter_compressed(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        compressor = _compressor(encoding)
+        response.set_data(compressor.compress(data) + compressor.flush())
+    response.headers['Content-Encoding'] = encoding
+    # 压缩后的表示与原表示不同，强 ETag 需要区分；弱 ETag 保持不变
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    return response
+
+def compressed(view):
+    """视图装饰器：压缩视图返回的响应"""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        return compress_response(make_response(view(*args, **kwargs)))
+
+    return wrapper
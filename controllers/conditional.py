@@ -0,0 +1,101 @@
+# controllers/conditional.py
+"""只读页面的条件请求（ETag / Last-Modified）
+
+页面内容由数据版本（学生每次写入都加 1 的计数器和成绩的版本，见 models.statistics）
+和模板、代码决定。视图执行任何列表、统计查询和模板渲染之前，先读出数据版本，
+浏览器或反向代理带来的 If-None-Match / If-Modified-Since 仍然有效时直接返回 304。
+
+- ETag 是主要的验证方式；Last-Modified 只精确到秒，同一秒内的两次写入无法区分，
+  因此最后一次写入所在的那一秒（按数据库时钟）还没有过去时不发送 Last-Modified；
+- 会话中有待显示的提示信息（flash）时不做条件判断，保证提示信息能显示出来；
+- 读取数据版本失败时按普通请求处理；
+- 响应带 Cache-Control: no-cache，缓存每次都向服务端验证。
+"""
+import functools
+import hashlib
+import logging
+import math
+import os
+import threading
+
+from flask import get_flashed_messages, make_response, request, session
+from models.statistics import StatisticsModel
+
+logger = logging.getLogger(__name__)
+
+# 参与页面指纹计算的目录（相对项目根目录）：模板或代码变化后旧的 ETag 全部失效
+_FINGERPRINT_PATHS = ('templates', 'controllers', 'models', 'config.py')
+_fingerprint = None
+_fingerprint_lock = threading.Lock()
+
+def _render_fingerprint():
+    """模板和代码文件的指纹 (短哈希, 最新修改时间)，进程内只计算一次"""
+    global _fingerprint
+    if _fingerprint is None:
+        with _fingerprint_lock:
+            if _fingerprint is None:
+                root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                digest = hashlib.sha1()
+                latest = 0.0
+                for path in _FINGERPRINT_PATHS:
+                    path = os.path.join(root, path)
+                    files = [path] if os.path.isfile(path) else sorted(
+                        os.path.join(directory, name)
+                        for directory, _, names in os.walk(path)
+                        for name in names if name.endswith(('.py', '.html'))
+                    )
+                    for file in files:
+                        stat = os.stat(file)
+                        digest.update(f'{os.path.relpath(file, root)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+                        latest = max(latest, stat.st_mtime)
+                _fingerprint = (digest.hexdigest()[:12], latest)
+    return _fingerprint
+
+def _validators():
+    """当前页面的 (ETag, Last-Modified 时间戳)，不能发送 Last-Modified 时后者为 None"""
+    version, updated_at, now = StatisticsModel.get_version()
+    token, templates_modified = _render_fingerprint()
+    etag = f'{version}-{token}'
+    if updated_at is not None and now < math.floor(updated_at) + 1:
+        # 这一秒内还可能有写入，它们的 Last-Modified 与本次相同
+        return etag, None
+    return etag, int(max(updated_at or 0, templates_modified))
+
+def _not_modified(etag, last_modified):
+    # 有 If-None-Match 时以它为准，忽略 If-Modified-Since（RFC 9110 13.2.2）
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= int(since.timestamp())
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+def conditional_get(view):
+    """视图装饰器：GET 请求的页面加上 ETag / Last-Modified，缓存仍然有效时返回 304"""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+            return view(*args, **kwargs)
+        try:
+            etag, last_modified = _validators()
+        except Exception as e:
+            logger.warning(f"读取数据版本失败，不使用条件请求: {e}")
+            return view(*args, **kwargs)
+
+        if _not_modified(etag, last_modified):
+            return _set_validators(make_response('', 304), etag, last_modified)
+
+        response = make_response(view(*args, **kwargs))
+        # 重定向、出错页面不缓存；显示了提示信息（例如部分数据加载失败）的页面也不缓存
+        # （页面模板都会显示提示信息，这里取到的是本次渲染已经显示过的）
+        if response.status_code == 200 and not get_flashed_messages():
+            _set_validators(response, etag, last_modified)
+        return response
+
+    return wrapper
@@ -0,0 +1,196 @@
+# controllers/export_controller.py
+import csv
+import io
+import logging
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+from itertools import chain
+from xml.sax.saxutils import escape
+
+from flask import Response, request, redirect, url_for, flash
+from controllers.student_controller import student_bp
+from models.student_model import StudentModel, STUDENT_EXPORT_COLUMNS, SCORE_EXPORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# 导出文件中的列标题
+COLUMN_TITLES = {
+    'student_id': '学号',
+    'name': '姓名',
+    'gender': '性别',
+    'age': '年龄',
+    'major': '专业',
+    'phone': '电话',
+    'created_at': '创建时间',
+    'updated_at': '更新时间',
+    'course_name': '课程名称',
+    'score': '分数',
+    'credit': '学分',
+    'semester': '学期',
+    'exam_date': '考试日期',
+}
+
+# 每积累这么多行就向客户端输出一次
+FLUSH_ROWS = 500
+
+class ExportController:
+    """导出控制器 - 以流的方式导出学生（及成绩）数据"""
+
+    @staticmethod
+    @student_bp.route('/export')
+    def export():
+        """导出 CSV / Excel，支持与搜索相同的关键词过滤"""
+        file_format = request.args.get('format', 'csv').lower()
+        if file_format not in ('csv', 'xlsx'):
+            flash('不支持的导出格式', 'danger')
+            return redirect(url_for('student.index'))
+
+        keyword = request.args.get('q', '').strip() or None
+        include_scores = request.args.get('scores') == '1'
+        columns = SCORE_EXPORT_COLUMNS if include_scores else STUDENT_EXPORT_COLUMNS
+
+        rows = StudentModel.iter_students(keyword=keyword, include_scores=include_scores)
+        try:
+            # 先取出第一行，让连接和查询错误在开始输出之前暴露出来
+            first = next(rows, None)
+        except Exception as e:
+            logger.error(f"导出错误: {e}")
+            flash(f'导出失败：{str(e)}', 'danger')
+            return redirect(url_for('student.index'))
+        if first is not None:
+            rows = chain([first], rows)
+
+        if file_format == 'csv':
+            body = _iter_csv(rows, columns)
+            mimetype = 'text/csv; charset=utf-8'
+        else:
+            body = _iter_xlsx(rows, columns)
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+        filename = '{}_{}.{}'.format(
+            'scores' if include_scores else 'students',
+            datetime.now().strftime('%Y%m%d_%H%M%S'),
+            file_format
+        )
+        return Response(body, mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Accel-Buffering': 'no',
+        })
+
+def _iter_csv(rows, columns):
+    """逐批生成 CSV 内容（带 BOM，Excel 可直接打开中文）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow([COLUMN_TITLES.get(column, column) for column in columns])
+
+    pending = 0
+    for row in rows:
+        writer.writerow(['' if row[column] is None else row[column] for column in columns])
+        pending += 1
+        if pending >= FLUSH_ROWS:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode('utf-8')
+
+class _ChunkBuffer:
+    """只追加的写缓冲区，供 zipfile 在不可 seek 的输出流上写 xlsx"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+# XML 1.0 不允许的控制字符
+_XML_ILLEGAL = dict.fromkeys(i for i in range(32) if i not in (9, 10, 13))
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(str(value).translate(_XML_ILLEGAL))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+def _iter_xlsx(rows, columns):
+    """逐批生成 xlsx 内容
+
+    工作表使用内联字符串，行数据直接写入 zip 流，
+    不需要像常规 Excel 库那样把整张表保存在内存里。
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row(COLUMN_TITLES.get(column, column) for column in columns)
+            ).encode('utf-8'))
+
+            pending = []
+            for row in rows:
+                pending.append(_xlsx_row(row[column] for column in columns))
+                if len(pending) >= FLUSH_ROWS:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending = []
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            sheet.write((''.join(pending) + '</sheetData></worksheet>').encode('utf-8'))
+    yield buffer.drain()
@@ -0,0 +1,38 @@
+# controllers/import_controller.py
+import logging
+from flask import render_template, request, flash
+from controllers.student_controller import student_bp
+from models.student_import import StudentImporter, ImportFormatError
+
+logger = logging.getLogger(__name__)
+
+class ImportController:
+    """导入控制器 - 上传 CSV / Excel 批量添加学生"""
+    
+    @staticmethod
+    @student_bp.route('/import', methods=['GET', 'POST'])
+    def import_students():
+        """批量导入学生"""
+        if request.method == 'POST':
+            upload = request.files.get('file')
+            if not upload or not upload.filename:
+                flash('请选择要导入的文件', 'danger')
+                return render_template('import.html', title='批量导入')
+            
+            try:
+                report = StudentImporter().import_file(upload.stream, upload.filename)
+            except ImportFormatError as e:
+                flash(str(e), 'danger')
+                return render_template('import.html', title='批量导入')
+            except Exception as e:
+                logger.error(f"批量导入错误: {e}")
+                flash(f'导入失败：{str(e)}', 'danger')
+                return render_template('import.html', title='批量导入')
+            
+            if report['failed']:
+                flash(f"导入完成：成功 {report['inserted']} 行，失败 {report['failed']} 行", 'warning')
+            else:
+                flash(f"导入完成：成功 {report['inserted']} 行", 'success')
+            return render_template('import.html', report=report, title='批量导入')
+        
+        return render_template('import.html', title='批量导入')
@@ -0,0 +1,21 @@
+# controllers/metrics_controller.py
+from flask import Response, abort, current_app
+from config import Config
+from controllers.admission import get_admission_stats
+from controllers.student_controller import student_bp
+from models.database import get_breaker, get_pool_stats, get_replica_stats
+from models.metrics import render_prometheus
+
+class MetricsController:
+    """性能指标控制器"""
+    
+    @staticmethod
+    @student_bp.route('/metrics')
+    def metrics():
+        """Prometheus 文本格式的性能指标"""
+        if not Config.METRICS_ENABLED:
+            abort(404)
+        return Response(render_prometheus(get_pool_stats(), get_replica_stats(),
+                                          current_app.extensions.get('startup_timings'),
+                                          get_admission_stats(), get_breaker().stats()),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
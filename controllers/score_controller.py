@@ -0,0 +1,30 @@
+# controllers/score_controller.py
+import logging
+from flask import render_template, redirect, url_for, flash
+from controllers.student_controller import student_bp
+from models.student_model import StudentModel
+from models.score_model import ScoreModel
+
+logger = logging.getLogger(__name__)
+
+class ScoreController:
+    """成绩控制器 - 成绩单和绩点"""
+    
+    @staticmethod
+    @student_bp.route('/transcript/<student_id>')
+    def transcript(student_id):
+        """学生成绩单"""
+        student = StudentModel.get_student_by_id(student_id)
+        if not student:
+            flash('学生不存在！', 'danger')
+            return redirect(url_for('student.index'))
+        
+        try:
+            transcript = ScoreModel.get_transcript(student_id)
+        except Exception as e:
+            logger.error(f"成绩单查询错误: {e}")
+            flash(f'成绩查询失败：{str(e)}', 'danger')
+            transcript = {'semesters': [], 'gpa': None, 'average': None, 'credits': 0}
+        
+        return render_template('transcript.html', student=student, transcript=transcript,
+                               title=f'{student["name"]} 的成绩单')
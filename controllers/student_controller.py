@@ -1,7 +1,24 @@
 # controllers/student_controller.py
-from flask import render_template, request, redirect, url_for, flash, Blueprint
+import copy
+import logging
+from flask import render_template, request, redirect, url_for, flash, jsonify, Blueprint
+from config import Config
+from controllers.conditional import conditional_get
 from models.student_model import StudentModel
-from models.database import init_db, test_connection
+from models.score_model import ScoreModel
+from models.database import BREAKER_CLOSED, database_unavailable, get_database_health
+from models.migrations import init_db
+from models.executor import get_executor
+from models.statistics import DEFAULT_STATISTICS
+from models.write_queue import WRITE_DUPLICATE, WRITE_OK, WRITE_TIMEOUT
+from models.validators import (
+    validate_student_data,
+    build_student_data,
+    validate_batch_update,
+    build_batch_update
+)
+
+logger = logging.getLogger(__name__)
 
 # 创建蓝图
 student_bp = Blueprint('student', __name__, url_prefix='/')
@@ -11,22 +28,40 @@ class StudentController:
     
     @staticmethod
     @student_bp.route('/')
+    @conditional_get
     def index():
-        """首页：显示所有学生"""
+        """首页：分页显示学生"""
         try:
-            # 测试数据库连接
-            if not test_connection():
+            # 数据库的可用性由后台健康检查维护（熔断器），这里只读取状态，不再每次建立连接测试
+            if database_unavailable():
                 flash('数据库连接失败，请检查配置', 'danger')
                 return render_template('index.html', students=[], stats={}, title='学生列表')
             
-            students = StudentModel.get_all_students()
-            stats = StudentModel.get_statistics()
+            # 学生列表、统计信息互不依赖，并发查询（统计只读汇总表，在请求线程上用请求自己的连接执行）
+            results, failed = get_executor().gather({
+                'page': (StudentModel.get_students_page, (
+                    request.args.get('sort'),
+                    request.args.get('order'),
+                    request.args.get('after'),
+                    request.args.get('before'),
+                    request.args.get('per_page', Config.PAGE_SIZE)
+                ), None),
+                'stats': (StudentModel.get_statistics, (), copy.deepcopy(DEFAULT_STATISTICS)),
+            }, inline='stats')
+            
+            page, stats = results['page'], results['stats']
+            if page is None:
+                flash('学生列表加载失败或超时，请稍后刷新', 'warning')
+                return render_template('index.html', students=[], stats=stats, title='学生列表')
+            if 'stats' in failed:
+                flash('统计信息加载失败或超时，暂不显示', 'warning')
             return render_template('index.html', 
-                                 students=students, 
+                                 students=StudentController._attach_gpa(page['students']), 
+                                 page=page,
                                  stats=stats,
                                  title='学生列表')
         except Exception as e:
-            print(f"❌ 系统错误: {e}")
+            logger.error(f"系统错误: {e}")
             flash(f'系统错误：{str(e)}', 'danger')
             return render_template('index.html', students=[], stats={}, title='学生列表')
     
@@ -46,11 +81,19 @@ class StudentController:
     @staticmethod
     @student_bp.route('/test-db')
     def test_database():
-        """测试数据库连接"""
-        if test_connection():
-            flash('数据库连接成功！', 'success')
+        """数据库健康状态：熔断器状态和最近一次健康检查的耗时（请求 JSON 时返回全部状态）"""
+        health = get_database_health()
+        healthy = health['state'] == BREAKER_CLOSED and health['probe_ok'] is not False
+        if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+            return jsonify(health), 200 if healthy else 503
+        latency = health['probe_latency_ms']
+        probe = '尚未检查' if latency is None else f"{'成功' if health['probe_ok'] else '失败'}，{latency:.1f} ms"
+        if healthy:
+            flash(f'数据库连接成功！（熔断器：{health["state"]}，最近一次检查：{probe}）', 'success')
         else:
-            flash('数据库连接失败，请检查配置', 'danger')
+            retry = f'，{health["retry_in"]:.0f} 秒后重试' if health['state'] != BREAKER_CLOSED else ''
+            flash(f'数据库连接失败，请检查配置（熔断器：{health["state"]}{retry}，最近一次检查：{probe}；'
+                  f'{health["last_error"]}）', 'danger')
         return redirect(url_for('student.index'))
     
     @staticmethod
@@ -64,25 +107,18 @@ class StudentController:
                 flash(error, 'danger')
                 return render_template('add.html', title='添加学生')
             
-            # 检查学号是否已存在
-            if StudentModel.check_student_exists(request.form['student_id'].strip()):
-                flash('学号已存在，请使用其他学号', 'danger')
-                return render_template('add.html', title='添加学生')
-            
             # 准备数据
-            student_data = {
-                'student_id': request.form['student_id'].strip(),
-                'name': request.form['name'].strip(),
-                'gender': request.form['gender'],
-                'age': int(request.form['age']) if request.form.get('age') else None,
-                'major': request.form.get('major', '').strip() or None,
-                'phone': request.form.get('phone', '').strip() or None
-            }
+            student_data = build_student_data(request.form)
             
-            # 调用模型添加
-            if StudentModel.add_student(student_data):
+            # 调用模型添加（同时检查学号是否已存在）
+            result = StudentModel.create_student(student_data)
+            if result == WRITE_OK:
                 flash(f'学生 {student_data["name"]} 添加成功！', 'success')
                 return redirect(url_for('student.index'))
+            elif result == WRITE_DUPLICATE:
+                flash('学号已存在，请使用其他学号', 'danger')
+            elif result == WRITE_TIMEOUT:
+                flash('系统繁忙，添加结果未知，请稍后在列表中确认', 'warning')
             else:
                 flash('添加失败，请重试', 'danger')
         
@@ -90,6 +126,7 @@ class StudentController:
     
     @staticmethod
     @student_bp.route('/edit/<student_id>', methods=['GET', 'POST'])
+    @conditional_get
     def edit(student_id):
         """编辑学生"""
         if request.method == 'POST':
@@ -100,13 +137,7 @@ class StudentController:
                 return redirect(url_for('student.edit', student_id=student_id))
             
             # 准备数据
-            student_data = {
-                'name': request.form['name'].strip(),
-                'gender': request.form['gender'],
-                'age': int(request.form['age']) if request.form.get('age') else None,
-                'major': request.form.get('major', '').strip() or None,
-                'phone': request.form.get('phone', '').strip() or None
-            }
+            student_data = build_student_data(request.form, edit_mode=True)
             
             # 调用模型更新
             if StudentModel.update_student(student_id, student_data):
@@ -134,29 +165,65 @@ class StudentController:
         
         return redirect(url_for('student.index'))
     
+    @staticmethod
+    @student_bp.route('/batch', methods=['POST'])
+    def batch():
+        """批量删除或修改学生（勾选的学生，或全部搜索结果）"""
+        action = request.form.get('action')
+        keyword = request.form.get('q', '').strip()
+        back = url_for('student.search', q=keyword) if keyword else url_for('student.index')
+        
+        if request.form.get('scope') == 'filter':
+            student_ids, filters = None, {'keyword': keyword}
+            if not keyword:
+                flash('请先搜索，再对全部搜索结果执行批量操作', 'danger')
+                return redirect(back)
+        else:
+            student_ids, filters = request.form.getlist('student_ids'), None
+            if not student_ids:
+                flash('请先勾选要操作的学生', 'danger')
+                return redirect(back)
+        
+        try:
+            if action == 'delete':
+                summary = StudentModel.delete_students(student_ids, filters)
+                flash(f"批量删除完成：删除 {summary['deleted']} 名学生、{summary['scores_deleted']} 条成绩", 'success')
+            elif action == 'update':
+                error = validate_batch_update(request.form)
+                if error:
+                    flash(error, 'danger')
+                    return redirect(back)
+                summary = StudentModel.update_students(build_batch_update(request.form), student_ids, filters)
+                flash(f"批量修改完成：匹配 {summary['matched']} 名学生，修改 {summary['updated']} 名", 'success')
+            else:
+                flash('未知的批量操作', 'danger')
+        except ValueError as e:
+            flash(str(e), 'danger')
+        except Exception as e:
+            logger.error(f"批量操作错误: {e}")
+            flash(f'批量操作失败，已全部撤销：{str(e)}', 'danger')
+        
+        return redirect(back)
+    
     @staticmethod
     @student_bp.route('/search')
+    @conditional_get
     def search():
         """搜索学生"""
         keyword = request.args.get('q', '').strip()
         
-        # 获取默认的 stats 结构
-        default_stats = {
-            'total_students': 0,
-            'gender_distribution': [],
-            'major_distribution': [],
-            'age_stats': {'avg_age': 0, 'min_age': 0, 'max_age': 0}
-        }
-        
         if keyword:
             try:
-                students = StudentModel.search_students(keyword)
-                
-                # 获取统计信息（可选，如果不需要统计可以传空字典）
-                try:
-                    stats = StudentModel.get_statistics()
-                except:
-                    stats = default_stats
+                # 搜索和统计信息并发查询（统计在请求线程上执行），统计出错时使用默认值
+                results, failed = get_executor().gather({
+                    'students': (StudentModel.search_students, (keyword,), None),
+                    'stats': (StudentModel.get_statistics, (), copy.deepcopy(DEFAULT_STATISTICS)),
+                }, inline='stats')
+                if results['students'] is None:
+                    flash('搜索失败或超时，请缩小搜索范围后重试', 'warning')
+                    return redirect(url_for('student.index'))
+                students = StudentController._attach_gpa(results['students'])
+                stats = results['stats']
                 
                 return render_template('index.html', 
                                     students=students, 
@@ -164,46 +231,25 @@ class StudentController:
                                     search_keyword=keyword,
                                     title=f'搜索: {keyword}')
             except Exception as e:
-                print(f"❌ 搜索错误: {e}")
+                logger.error(f"搜索错误: {e}")
                 flash(f'搜索失败：{str(e)}', 'danger')
                 return redirect(url_for('student.index'))
         
         return redirect(url_for('student.index'))
     
+    @staticmethod
+    def _attach_gpa(students):
+        """为列表中的学生附加累计 GPA（整页一次分组查询）"""
+        try:
+            gpa = ScoreModel.get_gpa_map([student['student_id'] for student in students])
+        except Exception as e:
+            logger.error(f"GPA 查询错误: {e}")
+            gpa = {}
+        for student in students:
+            student['gpa'] = gpa.get(student['student_id'])
+        return students
+    
     @staticmethod
     def _validate_student_data(form_data, edit_mode=False):
         """验证学生数据"""
-        if not edit_mode and not form_data.get('student_id'):
-            return '学号不能为空'
-        
-        if not edit_mode and len(form_data.get('student_id', '').strip()) < 3:
-            return '学号至少需要3个字符'
-        
-        if not form_data.get('name'):
-            return '姓名不能为空'
-        
-        if len(form_data.get('name', '').strip()) < 2:
-            return '姓名至少需要2个字符'
-        
-        if not form_data.get('gender'):
-            return '请选择性别'
-        
-        # 验证年龄
-        age = form_data.get('age')
-        if age:
-            try:
-                age_int = int(age)
-                if age_int < 1 or age_int > 150:
-                    return '年龄必须在1-150之间'
-            except ValueError:
-                return '年龄必须是数字'
-        
-        # 验证电话（如果填写）
-        phone = form_data.get('phone')
-        if phone:
-            # 简单的电话验证
-            import re
-            if not re.match(r'^[\d\s\-+()]{7,20}$', phone.strip()):
-                return '电话号码格式不正确'
-        
-        return None
\ No newline at end of file
+        return validate_student_data(form_data, edit_mode=edit_mode)
\ No newline at end of file
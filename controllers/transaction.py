@@ -0,0 +1,32 @@
+# controllers/transaction.py
+"""请求事务的提交：视图返回之后、响应发出之前提交请求级工作单元（见 models.database.UnitOfWork）
+
+提交失败时撤回视图登记的成功提示，改为错误提示并返回上一页（/api 下返回 500），
+写入不会在用户看到成功后悄悄丢失。响应为 5xx 时回滚。
+"""
+from flask import flash, jsonify, redirect, request, session
+from models.database import CommitFailedError, commit_unit_of_work
+
+# 请求事务提交失败时的提示
+COMMIT_FAILED_MESSAGE = '保存失败：数据库提交出错，修改没有生效，请重试'
+
+def commit_failed_response():
+    """提交失败：撤回视图登记的提示信息，改为错误提示并返回上一页；/api 下返回 500"""
+    if request.path.startswith('/api/'):
+        response = jsonify(error=COMMIT_FAILED_MESSAGE)
+        response.status_code = 500
+        return response
+    session.pop('_flashes', None)
+    flash(COMMIT_FAILED_MESSAGE, 'danger')
+    return redirect(request.referrer or '/')
+
+def _commit_request(response):
+    try:
+        commit_unit_of_work(response.status_code)
+    except CommitFailedError:
+        return commit_failed_response()
+    return response
+
+def init_app(app) -> None:
+    """注册提交请求事务的钩子（需要先调用 models.database.init_app）"""
+    app.after_request(_commit_request)
@@ -0,0 +1,55 @@
+# import_students.py
+"""批量导入学生（命令行）
+
+用法：
+    python import_students.py students.csv
+    python import_students.py students.xlsx --batch-size 2000 --commit-size 10000
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 添加项目路径到系统路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models.student_import import StudentImporter, ImportAbortedError, ImportFormatError
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='从 CSV / Excel 文件批量导入学生')
+    parser.add_argument('file', help='要导入的 .csv 或 .xlsx 文件')
+    parser.add_argument('--batch-size', type=int, default=None, help='每批校验、写入的行数')
+    parser.add_argument('--commit-size', type=int, default=None, help='每个事务写入的行数')
+    parser.add_argument('--report', help='把完整的导入报告（JSON）写入该文件')
+    args = parser.parse_args(argv)
+    
+    path = Path(args.file)
+    if not path.exists():
+        print(f"❌ 文件不存在: {path}")
+        return 1
+    
+    importer = StudentImporter(batch_size=args.batch_size, commit_size=args.commit_size)
+    try:
+        with path.open('rb') as stream:
+            report = importer.import_file(stream, path.name)
+    except ImportFormatError as e:
+        print(f"❌ {e}")
+        return 1
+    except ImportAbortedError as e:
+        # 消息中已包含中断前提交的行数（e.committed）
+        print(f"❌ 导入中断: {e}")
+        return 1
+    
+    for error in report['errors'][:20]:
+        print(f"  第 {error['row']} 行 [{error['student_id'] or '-'}]: {error['error']}")
+    if report['failed'] > 20:
+        print(f"  ……共 {report['failed']} 行失败")
+    
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"📄 导入报告已写入: {args.report}")
+    
+    return 0 if not report['failed'] else 2
+
+if __name__ == '__main__':
+    sys.exit(main())
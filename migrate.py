@@ -0,0 +1,67 @@
+# migrate.py
+"""数据库结构迁移（命令行）
+
+用法：
+    python migrate.py status            查看每个迁移脚本是否已执行
+    python migrate.py up                执行全部未执行的迁移
+    python migrate.py up --to 1         只执行到版本 1
+    python migrate.py down --to 1       回滚到版本 1（回滚版本 1 之后的迁移）
+    python migrate.py down --to 0 --yes 全部回滚（删除所有表和数据）
+
+迁移脚本在 migrations/ 目录下，说明见 models/migrations.py。
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目路径到系统路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from models.migrations import MigrationError, downgrade, status, upgrade
+
+def _print_status():
+    rows = status()
+    for row in rows:
+        if row['applied_at'] is None:
+            state = '未执行'
+        else:
+            state = f"已执行 {row['applied_at']}（{row['duration_ms']} ms）"
+            if row['modified']:
+                state += ' ⚠️ 执行后脚本被修改过'
+        print(f"  {row['version']:04d}_{row['name']}  {row['description']}  {state}")
+    applied = [row['version'] for row in rows if row['applied_at'] is not None]
+    print(f"当前版本: {max(applied) if applied else 0}，共 {len(rows)} 个迁移")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='数据库结构迁移')
+    parser.add_argument('command', choices=('status', 'up', 'down'), help='status / up / down')
+    parser.add_argument('--to', type=int, default=None, help='目标版本（down 时必须指定）')
+    parser.add_argument('--yes', action='store_true', help='确认回滚到版本 0（会删除所有表和数据）')
+    args = parser.parse_args(argv)
+    
+    try:
+        if args.command == 'status':
+            _print_status()
+            return 0
+        if args.command == 'up':
+            done = upgrade(args.to)
+        else:
+            if args.to is None:
+                print("❌ down 需要用 --to 指定目标版本")
+                return 1
+            if args.to == 0 and not args.yes:
+                print("❌ 回滚到版本 0 会删除所有表和数据，确认请加 --yes")
+                return 1
+            done = downgrade(args.to)
+    except MigrationError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    if not done:
+        print("✅ 已是目标版本，无需迁移")
+    for migration in done:
+        print(f"✅ {'执行' if args.command == 'up' else '回滚'} {migration.version:04d}_{migration.name}: {migration.description}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# migrations/0001_initial_schema.py
+"""初始表结构：学生表、统计汇总表、成绩表、成绩视图和按专业统计的存储过程
+
+原来由 init_db.sql 和 models.database.init_db 分别维护；用旧方式建好的库执行本迁移时
+表和索引都已存在，不会有任何改动，只记录版本号。
+"""
+import logging
+
+import pymysql
+from models.database import STUDENT_STATS_DDL
+from models.migrations import add_indexes
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = '学生表、统计汇总表、成绩表及搜索索引'
+
+def up(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS students (
+            student_id VARCHAR(20) PRIMARY KEY COMMENT '学号',
+            name VARCHAR(50) NOT NULL COMMENT '姓名',
+            gender ENUM('男', '女', '其他') NOT NULL COMMENT '性别',
+            age INT COMMENT '年龄',
+            major VARCHAR(100) COMMENT '专业',
+            phone VARCHAR(20) COMMENT '电话',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间'
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='学生信息表'
+    """)
+    # 搜索使用的索引：姓名索引 + 学号/姓名/专业的 ngram 全文索引（支持中文，见 models.search）
+    add_indexes(cursor, 'students', [('idx_students_name', 'INDEX idx_students_name (name)')])
+    try:
+        # 全文索引不能在线建立（LOCK=NONE），建索引期间表只读
+        add_indexes(cursor, 'students', [
+            ('ft_students_search', 'FULLTEXT INDEX ft_students_search (student_id, name, major) WITH PARSER ngram'),
+        ], lock='SHARED')
+    except pymysql.Error as e:
+        # MySQL 5.7.6 以下不支持 ngram，搜索会回退到 LIKE 查询
+        logger.warning(f"创建全文索引 ft_students_search 失败: {e}")
+
+    cursor.execute(STUDENT_STATS_DDL)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scores (
+            id INT AUTO_INCREMENT PRIMARY KEY COMMENT '记录ID',
+            student_id VARCHAR(20) NOT NULL COMMENT '学号',
+            course_name VARCHAR(100) NOT NULL COMMENT '课程名称',
+            score DECIMAL(5,2) COMMENT '分数',
+            credit INT DEFAULT 0 COMMENT '学分',
+            semester VARCHAR(20) COMMENT '学期',
+            exam_date DATE COMMENT '考试日期',
+            FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+            INDEX idx_student (student_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='成绩表'
+    """)
+    # 按学期计算绩点时使用的索引（见 models.score_model）
+    add_indexes(cursor, 'scores', [('idx_scores_semester', 'INDEX idx_scores_semester (semester)')])
+
+    # 导出学生及成绩时使用的视图（见 StudentModel.iter_students）
+    cursor.execute("""
+        CREATE OR REPLACE VIEW student_scores_view AS
+        SELECT s.student_id, s.name, s.major,
+               sc.course_name, sc.score, sc.credit, sc.semester, sc.exam_date
+        FROM students s
+        LEFT JOIN scores sc ON s.student_id = sc.student_id
+    """)
+
+    cursor.execute('DROP PROCEDURE IF EXISTS GetStudentCountByMajor')
+    cursor.execute("""
+        CREATE PROCEDURE GetStudentCountByMajor()
+        BEGIN
+            SELECT major, COUNT(*) as student_count
+            FROM students
+            WHERE major IS NOT NULL AND major != ''
+            GROUP BY major
+            ORDER BY student_count DESC;
+        END
+    """)
+
+def down(cursor):
+    cursor.execute('DROP PROCEDURE IF EXISTS GetStudentCountByMajor')
+    cursor.execute('DROP VIEW IF EXISTS student_scores_view')
+    cursor.execute('DROP TABLE IF EXISTS scores')
+    cursor.execute('DROP TABLE IF EXISTS student_stats')
+    cursor.execute('DROP TABLE IF EXISTS students')
@@ -0,0 +1,27 @@
+# migrations/0002_hot_query_indexes.py
+"""常用查询的二级索引
+
+InnoDB 的二级索引隐含主键列，(col) 索引的实际顺序是 (col, student_id)：
+- 统计汇总表校正时按性别、专业、年龄的 GROUP BY 只读索引，不回表（覆盖索引）；
+- 列表按姓名以外的列（专业、年龄、创建时间）排序时，键集分页的
+  ORDER BY col, student_id LIMIT n 直接按索引顺序读取 n 行，不再全表扫描加排序；
+- 按 updated_at 查找最近修改的学生时走索引范围扫描。
+按学号排序的列表使用主键，按姓名排序使用 0001 中的 idx_students_name。
+"""
+from models.migrations import add_indexes, drop_indexes
+
+DESCRIPTION = '性别、专业、年龄、创建时间、修改时间索引'
+
+INDEXES = (
+    ('idx_students_gender', 'INDEX idx_students_gender (gender)'),
+    ('idx_students_major', 'INDEX idx_students_major (major)'),
+    ('idx_students_age', 'INDEX idx_students_age (age)'),
+    ('idx_students_created_at', 'INDEX idx_students_created_at (created_at)'),
+    ('idx_students_updated_at', 'INDEX idx_students_updated_at (updated_at)'),
+)
+
+def up(cursor):
+    add_indexes(cursor, 'students', INDEXES)
+
+def down(cursor):
+    drop_indexes(cursor, 'students', [name for name, _ in INDEXES])
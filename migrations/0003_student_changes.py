@@ -0,0 +1,31 @@
+# migrations/0003_student_changes.py
+"""学生变更记录表（变更流 /api/changes 的数据来源，见 models.changes）
+
+change_id 是游标，按主键顺序读取；(student_id, change_id) 索引用于压缩时查找同一学生之后的变更，
+changed_at 索引用于按时间选出可以压缩的旧记录。
+不设外键：学生删除后变更记录（tombstone）仍然保留。
+已有的学生各补一条 upsert 记录，下游系统从游标 0 开始读取即可得到全部学生。
+"""
+
+DESCRIPTION = '学生变更记录表'
+
+def up(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_changes (
+            change_id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY COMMENT '变更ID（游标）',
+            student_id VARCHAR(20) NOT NULL COMMENT '学号',
+            operation ENUM('upsert', 'delete') NOT NULL COMMENT '操作',
+            changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) COMMENT '变更时间',
+            INDEX idx_student_changes_student (student_id, change_id),
+            INDEX idx_student_changes_changed_at (changed_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='学生变更记录表'
+    """)
+    cursor.execute('SELECT 1 FROM student_changes LIMIT 1')
+    if cursor.fetchone() is None:
+        cursor.execute("""
+            INSERT INTO student_changes (student_id, operation)
+            SELECT student_id, 'upsert' FROM students ORDER BY student_id
+        """)
+
+def down(cursor):
+    cursor.execute('DROP TABLE IF EXISTS student_changes')
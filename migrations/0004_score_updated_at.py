@@ -0,0 +1,30 @@
+# migrations/0004_score_updated_at.py
+"""成绩的修改时间
+
+页面上的 GPA 由成绩计算，页面的 ETag 因此也要随成绩变化（见 models.statistics.get_version）。
+成绩由教务系统等外部系统写入，不经过本系统的模型层，只能从表本身得到版本：
+MAX(id) 反映新增、MAX(updated_at) 反映修改，两者都只读索引的一端。
+已有的成绩的修改时间为执行迁移的时间。
+"""
+from models.migrations import add_indexes, column_exists, drop_indexes, run_ddl
+
+DESCRIPTION = '成绩修改时间及索引'
+
+INDEXES = (
+    ('idx_scores_updated_at', 'INDEX idx_scores_updated_at (updated_at)'),
+)
+
+def up(cursor):
+    if not column_exists(cursor, 'scores', 'updated_at'):
+        run_ddl(cursor, """
+            ALTER TABLE scores
+            ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+                ON UPDATE CURRENT_TIMESTAMP(6) COMMENT '修改时间',
+            ALGORITHM=INPLACE, LOCK=NONE
+        """)
+    add_indexes(cursor, 'scores', INDEXES)
+
+def down(cursor):
+    drop_indexes(cursor, 'scores', [name for name, _ in INDEXES])
+    if column_exists(cursor, 'scores', 'updated_at'):
+        run_ddl(cursor, 'ALTER TABLE scores DROP COLUMN updated_at, ALGORITHM=INPLACE, LOCK=NONE')
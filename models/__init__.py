@@ -1,19 +1,27 @@
 # models/__init__.py
-"""模型包"""
-from models.database import (
-    get_db_connection, 
-    init_db, 
-    test_connection, 
-    execute_query,
-    execute_insert
-)
-from models.student_model import StudentModel
+"""模型包
 
-__all__ = [
-    'get_db_connection', 
-    'init_db', 
-    'test_connection', 
-    'execute_query',
-    'execute_insert',
-    'StudentModel'
-]
\ No newline at end of file
+包级名称按需导入（PEP 562）：import models 或导入某个子模块时不会连带导入全部模型。
+"""
+import importlib
+
+# 名称 -> 所在子模块
+_EXPORTS = {
+    'get_db_connection': 'models.database',
+    'test_connection': 'models.database',
+    'execute_query': 'models.database',
+    'execute_insert': 'models.database',
+    'get_pool_stats': 'models.database',
+    'init_db': 'models.migrations',
+    'StudentModel': 'models.student_model',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'models' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,188 @@
+# models/changes.py
+"""学生变更流（changes since），供图书馆、宿舍、缴费等下游系统增量同步
+
+所有写入学生表的路径都通过 StudentModel._record_changes 在同一个事务中向 student_changes
+追加记录（学号、操作、时间），删除也留下一条记录（tombstone）。下游系统保存上次读到的游标，
+之后只读取游标之后的变更，同步的代价与变更数成正比，而不是与学生总数成正比。
+
+游标是变更记录的自增 ID。ID 在插入时分配、提交顺序却不一定相同：较小的 ID 可能属于
+还没有提交的事务，此时读到的 ID 序列中间有空缺。读取时在空缺处停下，直到空缺之后的记录
+已经写入超过 CHANGE_FEED_SETTLE_SECONDS 秒（空缺来自回滚的事务、压缩删除的记录或
+auto_increment_increment 大于 1，不会再出现），按游标读取不会漏掉变更；
+写入事务不需要为此在同一行上排队。CHANGE_FEED_SETTLE_SECONDS 应大于最长的写入事务
+（批量导入为两次提交之间的时间）。
+
+每页中同一学生的多次变更只返回最后一次，内容取学生的当前数据（已删除时为 tombstone）。
+后台校正线程定期压缩 CHANGE_FEED_COMPACT_DAYS 天前、已被同一学生更新的变更所覆盖的记录：
+每个学生的最后一条变更总会保留，落后再久的下游系统也能得到一致的结果。
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import Config
+from models.database import get_db_connection, get_pool
+
+logger = logging.getLogger(__name__)
+
+CHANGE_UPSERT = 'upsert'
+CHANGE_DELETE = 'delete'
+
+# 变更记录中返回的学生字段
+CHANGE_FIELDS = ('student_id', 'name', 'gender', 'age', 'major', 'phone', 'created_at', 'updated_at')
+
+# 每次压缩最多删除的记录数（分批删除，避免长时间持有锁）
+COMPACT_BATCH = 5000
+
+class ChangeFeed:
+    """学生变更流"""
+
+    @staticmethod
+    def record(cursor, removed: Iterable[str], upserted: Iterable[str]) -> None:
+        """在调用方的事务中追加变更记录"""
+        rows = [(student_id, CHANGE_DELETE) for student_id in removed]
+        rows.extend((student_id, CHANGE_UPSERT) for student_id in upserted)
+        if rows:
+            cursor.executemany('INSERT INTO student_changes (student_id, operation) VALUES (%s, %s)', rows)
+
+    @staticmethod
+    def parse_cursor(value: Optional[str]) -> Optional[int]:
+        """解析游标：为空时从头开始（0），latest 表示当前最新位置（返回 None），格式不正确时抛出 ValueError"""
+        if value is None or value == '':
+            return 0
+        if value == 'latest':
+            return None
+        if not value.isdigit():
+            raise ValueError(f'无效的变更游标: {value}')
+        return int(value)
+
+    @staticmethod
+    def latest_cursor() -> int:
+        """当前最新的游标（下游系统全量同步之前先取得，之后从这里开始增量同步）
+
+        最近 CHANGE_FEED_SETTLE_SECONDS 秒内的记录之前可能还有未提交的事务，与 changes_since
+        一样停在第一个较新的空缺之前；因此返回的游标可能略早，下游会重复收到几条变更（按学号覆盖即可）。
+        """
+        connection = get_db_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT @@auto_increment_increment AS step')
+                step = cursor.fetchone()['step']
+                cursor.execute('''
+                    SELECT change_id, changed_at < NOW(6) - INTERVAL %s SECOND AS settled
+                    FROM student_changes
+                    WHERE changed_at >= NOW(6) - INTERVAL %s SECOND
+                    ORDER BY change_id
+                ''', (Config.CHANGE_FEED_SETTLE_SECONDS, Config.CHANGE_FEED_SETTLE_SECONDS))
+                recent = list(cursor.fetchall())
+                if recent:
+                    cursor.execute('SELECT MAX(change_id) AS change_id FROM student_changes WHERE change_id < %s',
+                                   (recent[0]['change_id'],))
+                else:
+                    cursor.execute('SELECT MAX(change_id) AS change_id FROM student_changes')
+                row = cursor.fetchone()
+        finally:
+            connection.close()
+        previous = (row or {}).get('change_id') or 0
+        visible = ChangeFeed.visible_prefix(recent, previous, step)
+        return visible[-1]['change_id'] if visible else previous
+
+    @staticmethod
+    def changes_since(since: int, limit: int) -> Dict[str, Any]:
+        """读取游标之后最多 limit 条变更
+
+        返回 {'items': [...], 'next': 下一次请求使用的游标, 'has_more': 是否还有更多变更}；
+        每项为 {'cursor', 'op', 'student_id', 'changed_at', 'student'}，op 为 delete 时 student 为 None。
+        读取主库：从库可能落后，而且并行复制时提交顺序不一定与主库相同。
+        """
+        columns = ', '.join(f's.{field} AS s_{field}' for field in CHANGE_FIELDS)
+        connection = get_db_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT @@auto_increment_increment AS step')
+                step = cursor.fetchone()['step']
+                cursor.execute(f'''
+                    SELECT c.change_id, c.student_id, c.changed_at,
+                           c.changed_at < NOW(6) - INTERVAL %s SECOND AS settled, {columns}
+                    FROM student_changes c
+                    LEFT JOIN students s ON s.student_id = c.student_id
+                    WHERE c.change_id > %s
+                    ORDER BY c.change_id
+                    LIMIT %s
+                ''', (Config.CHANGE_FEED_SETTLE_SECONDS, since, limit + 1))
+                rows = list(cursor.fetchall())
+        finally:
+            connection.close()
+
+        visible = ChangeFeed.visible_prefix(rows, since, step)
+        has_more = len(visible) == len(rows) and len(rows) > limit
+        visible = visible[:limit]
+        return {
+            'items': ChangeFeed.compact_page(visible),
+            'next': str(visible[-1]['change_id'] if visible else since),
+            'has_more': has_more,
+        }
+
+    @staticmethod
+    def visible_prefix(rows: List[Dict[str, Any]], since: int, step: int = 1) -> List[Dict[str, Any]]:
+        """按 ID 顺序排列的变更中可以交给下游的部分：遇到较新的空缺时停下（见模块说明）"""
+        previous = since
+        for index, row in enumerate(rows):
+            if row['change_id'] - previous > step and not row['settled']:
+                return rows[:index]
+            previous = row['change_id']
+        return rows
+
+    @staticmethod
+    def compact_page(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """同一学生只保留最后一次变更，按变更顺序排列"""
+        latest = {}
+        for row in rows:
+            latest.pop(row['student_id'], None)
+            latest[row['student_id']] = row
+        items = []
+        for row in latest.values():
+            exists = row['s_student_id'] is not None
+            items.append({
+                'cursor': str(row['change_id']),
+                'op': CHANGE_UPSERT if exists else CHANGE_DELETE,
+                'student_id': row['student_id'],
+                'changed_at': row['changed_at'],
+                'student': {field: row[f's_{field}'] for field in CHANGE_FIELDS} if exists else None,
+            })
+        return items
+
+    @staticmethod
+    def compact(days: Optional[int] = None) -> int:
+        """删除 days 天前、已被同一学生之后的变更覆盖的记录，返回删除的条数"""
+        days = Config.CHANGE_FEED_COMPACT_DAYS if days is None else days
+        if days <= 0:
+            return 0
+        removed = 0
+        while True:
+            connection = get_pool().acquire()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('''
+                        SELECT c.change_id FROM student_changes c
+                        WHERE c.changed_at < NOW() - INTERVAL %s DAY
+                          AND EXISTS (SELECT 1 FROM student_changes n
+                                      WHERE n.student_id = c.student_id AND n.change_id > c.change_id)
+                        ORDER BY c.change_id
+                        LIMIT %s
+                    ''', (days, COMPACT_BATCH))
+                    change_ids = [row['change_id'] for row in cursor.fetchall()]
+                    if change_ids:
+                        placeholders = ', '.join(['%s'] * len(change_ids))
+                        cursor.execute(f'DELETE FROM student_changes WHERE change_id IN ({placeholders})', change_ids)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.close()
+            removed += len(change_ids)
+            if len(change_ids) < COMPACT_BATCH:
+                break
+        if removed:
+            logger.info(f"变更流已压缩 {removed} 条被覆盖的记录")
+        return removed
@@ -1,77 +1,1027 @@
 # models/database.py
+import functools
+import logging
+import threading
+import time
+from collections import deque
+
 import pymysql
+from pymysql.constants import ER, SERVER_STATUS
 from pymysql.cursors import DictCursor
+from flask import current_app, g, has_app_context, has_request_context, session
 from config import Config
+from models.metrics import POOL_ACQUIRE, instrumented_cursor_class
 
-def get_db_connection():
-    """获取数据库连接"""
+logger = logging.getLogger(__name__)
+
+# 学生统计汇总表（由 migrations/0001 创建，models.statistics 维护）
+STUDENT_STATS_DDL = """
+    CREATE TABLE IF NOT EXISTS student_stats (
+        dimension VARCHAR(20) NOT NULL,
+        bucket VARCHAR(100) NOT NULL DEFAULT '',
+        count BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (dimension, bucket)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+class PoolTimeoutError(pymysql.err.OperationalError):
+    """在超时时间内没有从连接池获取到连接"""
+
+class DatabaseUnavailableError(pymysql.err.OperationalError):
+    """熔断器打开期间不再尝试连接数据库，直接失败"""
+
+class CommitFailedError(pymysql.err.OperationalError):
+    """请求结束时提交请求事务失败（修改没有生效）"""
+
+class _PoolEntry:
+    """连接池中的一条物理连接及其元数据"""
+    
+    __slots__ = ('raw', 'created_at', 'last_used')
+    
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+# 提交后回调保存在底层 pymysql 连接对象上的属性名
+_AFTER_COMMIT_ATTR = '_after_commit_callbacks'
+
+def after_commit(connection, callback):
+    """登记在当前事务提交后执行的回调
+    
+    connection 可以是模型层拿到的连接，也可以是游标的 cursor.connection；
+    事务回滚或连接未提交就归还时，回调被丢弃。用于在数据真正落库后
+    更新进程内的缓存和索引。同一个回调对象在一个事务中只登记一次。
+    """
+    raw = getattr(connection, '_raw_connection', connection)
+    callbacks = raw.__dict__.setdefault(_AFTER_COMMIT_ATTR, [])
+    if not any(registered is callback for registered in callbacks):
+        callbacks.append(callback)
+
+def _run_after_commit(raw):
+    for callback in raw.__dict__.pop(_AFTER_COMMIT_ATTR, None) or ():
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"提交后回调执行失败: {e}")
+
+class PooledConnection:
+    """从连接池借出的连接
+    
+    除 close() 之外的属性和方法都直接代理到底层的 pymysql 连接，
+    close() 不会断开连接，而是回滚未提交的事务后把连接归还连接池。
+    """
+    
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+    
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise pymysql.err.InterfaceError(0, '连接已归还连接池')
+        if name == '_raw_connection':
+            return entry.raw
+        return getattr(entry.raw, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @property
+    def closed(self):
+        return self._entry is None
+    
+    def cursor(self, cursor=None):
+        """创建游标（execute 计时、fetch 计数，见 models.metrics）
+        
+        语句走文本协议：PyMySQL 不支持 COM_STMT_PREPARE，缓存 SQL 模板每条只省 1–2 微秒（见 README“预处理语句”）。
+        """
+        raw = self.__getattr__('_raw_connection')
+        return raw.cursor(instrumented_cursor_class(cursor or raw.cursorclass))
+    
+    def commit(self):
+        """提交事务，然后执行通过 after_commit() 登记的回调"""
+        raw = self.__getattr__('_raw_connection')
+        raw.commit()
+        _run_after_commit(raw)
+    
+    def rollback(self):
+        """回滚事务，并丢弃登记的提交后回调"""
+        raw = self.__getattr__('_raw_connection')
+        raw.__dict__.pop(_AFTER_COMMIT_ATTR, None)
+        raw.rollback()
+    
+    def close(self):
+        """归还连接池（重复调用是安全的）"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+    
+    def invalidate(self):
+        """丢弃底层连接而不是归还，用于连接状态不可知的情况（例如未读完的流式结果集）"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry, discard=True)
+
+class ConnectionPool:
+    """线程安全的有界数据库连接池
+    
+    - min_size: 首次使用时预先建立的连接数
+    - max_size: 常驻连接上限，归还后保持空闲等待复用
+    - max_overflow: 高峰期允许额外创建的临时连接数，归还时直接关闭
+    - timeout: 连接数已满时等待空闲连接的最长秒数，超时抛出 PoolTimeoutError
+    - recycle: 连接存活超过该秒数后在取出时重建（0 表示不回收）
+    - ping_interval: 空闲超过该秒数的连接在取出时先 ping 一次，失效则重建
+    - breaker: 熔断器（可选），打开期间 acquire() 直接抛出 DatabaseUnavailableError；
+      建立、检查连接的结果计入熔断器（连接池繁忙超时不计入）
+    """
+    
+    def __init__(self, connect, min_size=1, max_size=10, max_overflow=5,
+                 timeout=10.0, recycle=3600, ping_interval=30, breaker=None):
+        if max_size < 1:
+            raise ValueError('max_size 必须大于 0')
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.breaker = breaker
+        
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._prefilled = False
+        self._closed = False
+        
+        # 统计信息
+        self._checkouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+    
+    def acquire(self, timeout=None):
+        """借出一个连接，用完后调用其 close() 归还"""
+        if self.breaker is not None and not self.breaker.allow():
+            raise DatabaseUnavailableError(0, f'数据库暂时不可用（熔断器已打开，{self.breaker.retry_in():.0f} 秒后重试）')
+        if not self._prefilled:
+            self._prefill()
+        
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        entry = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise pymysql.err.InterfaceError(0, '连接池已关闭')
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size + self.max_overflow:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        0, f'{timeout:g} 秒内未能从连接池获取连接（上限 {self.max_size + self.max_overflow}）'
+                    )
+                self._cond.wait(remaining)
+            self._checkouts += 1
+            self._wait_time += time.monotonic() - started
+        
+        try:
+            if entry is None:
+                entry = self._open_entry()
+            else:
+                entry = self._validate(entry)
+        except Exception as e:
+            if self.breaker is not None:
+                self.breaker.record_failure(e)
+            raise
+        if self.breaker is not None:
+            self.breaker.record_success()
+        POOL_ACQUIRE.observe(time.monotonic() - started)
+        return PooledConnection(self, entry)
+    
+    def release(self, entry, discard=False):
+        """归还连接；discard=True 或连接异常时直接关闭"""
+        # 未提交就归还的事务，其提交后回调不再执行
+        getattr(entry.raw, '__dict__', {}).pop(_AFTER_COMMIT_ATTR, None)
+        if not discard:
+            try:
+                # 非自动提交模式下任何语句都会开启事务，归还前回滚以释放锁和一致性快照
+                if entry.raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    entry.raw.rollback()
+            except Exception:
+                discard = True
+        
+        with self._cond:
+            keep = not discard and not self._closed and self._size <= self.max_size
+            if keep:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            else:
+                self._size -= 1
+            self._cond.notify()
+        
+        if not keep:
+            self._close_raw(entry.raw)
+    
+    def stats(self):
+        """连接池状态统计"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'overflow': max(0, self._size - self.max_size),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'max_overflow': self.max_overflow,
+                'checkouts': self._checkouts,
+                'created': self._created,
+                'recycled': self._recycled,
+                'timeouts': self._timeouts,
+                'avg_wait_ms': round(self._wait_time * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+            }
+    
+    def close(self):
+        """关闭连接池中所有空闲连接，借出中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_raw(entry.raw)
+    
+    def _prefill(self):
+        """预先建立 min_size 个连接，失败时留到真正使用时再报错"""
+        with self._cond:
+            if self._prefilled:
+                return
+            self._prefilled = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+        for opened in range(missing):
+            try:
+                entry = self._open_entry()
+            except Exception:
+                # _open_entry 已释放当前名额，其余预占的名额一并释放
+                with self._cond:
+                    self._size -= missing - opened - 1
+                    self._cond.notify_all()
+                break
+            self.release(entry)
+    
+    def _open_entry(self):
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return _PoolEntry(raw)
+    
+    def _validate(self, entry):
+        """检查借出的连接是否可用，过期或失效的连接会被重建"""
+        now = time.monotonic()
+        stale = self.recycle and now - entry.created_at > self.recycle
+        if not stale and now - entry.last_used >= self.ping_interval:
+            try:
+                entry.raw.ping(reconnect=False)
+            except Exception:
+                stale = True
+        if not stale:
+            return entry
+        
+        self._close_raw(entry.raw)
+        with self._cond:
+            self._recycled += 1
+        # 名额仍被占用，重建失败时由 _open_entry 释放
+        return self._open_entry()
+    
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """主库熔断器
+    
+    - closed: 正常访问数据库；连续失败 failure_threshold 次后打开
+    - open: 不再尝试连接，请求直接失败（不用等连接超时）；reset_timeout 秒后进入半开
+    - half_open: 每 reset_timeout 秒只放行一个请求试探，成功则关闭，失败则重新打开
+    
+    后台健康检查的结果也计入熔断器，探测成功时直接关闭。
+    state 只读取两个属性，路由可以在每个请求中查看而没有额外开销。
+    """
+    
+    def __init__(self, failure_threshold=3, reset_timeout=10.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_until = 0.0
+        self._last_error = None
+        self._opened = 0
+        # 最近一次健康检查
+        self._probe_at = None
+        self._probe_latency = None
+        self._probe_ok = None
+    
+    @property
+    def state(self):
+        opened_at = self._opened_at
+        if opened_at is None:
+            return BREAKER_CLOSED
+        return BREAKER_HALF_OPEN if time.monotonic() - opened_at >= self.reset_timeout else BREAKER_OPEN
+    
+    def allow(self):
+        """是否可以访问数据库（半开时只放行一个试探请求）"""
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if now - self._opened_at < self.reset_timeout or now < self._trial_until:
+                return False
+            # 试探请求没有结果（例如连接池繁忙）时，reset_timeout 秒后再放行下一个
+            self._trial_until = now + self.reset_timeout
+            return True
+    
+    def retry_in(self):
+        """距离下一次试探的秒数"""
+        opened_at = self._opened_at
+        if opened_at is None:
+            return 0.0
+        now = time.monotonic()
+        return max(0.0, opened_at + self.reset_timeout - now, self._trial_until - now)
+    
+    def record_success(self):
+        if self._failures == 0 and self._opened_at is None:
+            return
+        with self._lock:
+            reopened = self._opened_at is not None
+            self._failures = 0
+            self._opened_at = None
+            self._trial_until = 0.0
+        if reopened:
+            logger.info("数据库已恢复，熔断器关闭")
+    
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error)
+            if self._opened_at is not None:
+                # 试探失败，重新计时
+                self._opened_at = time.monotonic()
+                return
+            if self._failures < self.failure_threshold:
+                return
+            self._opened_at = time.monotonic()
+            self._opened += 1
+        logger.error(f"数据库连续 {self.failure_threshold} 次连接失败，熔断器打开，"
+                     f"{self.reset_timeout:g} 秒内请求直接失败（{error}）")
+    
+    def record_probe(self, latency, error=None):
+        """记录一次健康检查"""
+        with self._lock:
+            self._probe_at = time.time()
+            self._probe_latency = latency
+            self._probe_ok = error is None
+        if error is None:
+            self.record_success()
+        else:
+            self.record_failure(error)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self._failures,
+                'opened': self._opened,
+                'retry_in': round(self.retry_in(), 3),
+                'last_error': self._last_error,
+                'probe_at': self._probe_at,
+                'probe_ok': self._probe_ok,
+                'probe_latency_ms': None if self._probe_latency is None else round(self._probe_latency * 1000, 3),
+            }
+
+class HealthMonitor:
+    """后台健康检查：每隔 interval 秒用一条专用连接执行 SELECT 1，结果和耗时记入熔断器
+    
+    专用连接不占用连接池，连接池繁忙时也能检查；检查失败时关闭连接，下一次重新建立。
+    """
+    
+    def __init__(self, breaker, connect, interval):
+        self.breaker = breaker
+        self.interval = interval
+        self._connect = connect
+        self._connection = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def probe(self):
+        """检查一次，返回是否成功"""
+        with self._lock:
+            started = time.monotonic()
+            try:
+                if self._connection is None:
+                    self._connection = self._connect()
+                    self._connection.autocommit(True)
+                with self._connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            except Exception as e:
+                connection, self._connection = self._connection, None
+                if connection is not None:
+                    ConnectionPool._close_raw(connection)
+                self.breaker.record_probe(time.monotonic() - started, e)
+                return False
+            self.breaker.record_probe(time.monotonic() - started)
+            return True
+    
+    def start(self):
+        def run():
+            while True:
+                try:
+                    self.probe()
+                except Exception as e:
+                    logger.error(f"数据库健康检查失败: {e}")
+                if self._stop.wait(self.interval):
+                    break
+        
+        self._thread = threading.Thread(target=run, name='db-health-monitor', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            ConnectionPool._close_raw(connection)
+
+_pool = None
+_pool_lock = threading.Lock()
+_breaker = None
+_monitor = None
+
+def _create_connection(host=None, port=None, timeout=None):
+    """建立一条新的物理数据库连接（默认连接主库）；timeout 同时限制连接和读取的秒数（默认连接 5 秒、读取不限）"""
+    host = host or Config.MYSQL_HOST
+    port = port or Config.MYSQL_PORT
     try:
-        # 打印连接信息（调试用）
-        print(f"🔌 尝试连接数据库: {Config.MYSQL_HOST}:{Config.MYSQL_PORT}/{Config.MYSQL_DB}")
+        # 连接信息（调试用）
+        logger.debug(f"尝试连接数据库: {host}:{port}/{Config.MYSQL_DB}")
         
         connection = pymysql.connect(
-            host=Config.MYSQL_HOST,
+            host=host,
             user=Config.MYSQL_USER,
             password=Config.MYSQL_PASSWORD,
             database=Config.MYSQL_DB,
-            port=Config.MYSQL_PORT,
+            port=port,
             cursorclass=DictCursor,
             charset='utf8mb4',
             autocommit=False,
-            connect_timeout=5
+            connect_timeout=timeout or 5,
+            read_timeout=timeout
         )
-        print("✅ 数据库连接成功")
+        logger.debug("数据库连接成功")
         return connection
     except pymysql.Error as e:
-        print(f"❌ 数据库连接错误: {e}")
+        logger.error(f"数据库连接错误: {e}")
         raise e
 
-def init_db():
-    """初始化数据库表"""
-    connection = None
-    try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            # 创建students表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS students (
-                    student_id VARCHAR(20) PRIMARY KEY,
-                    name VARCHAR(50) NOT NULL,
-                    gender ENUM('男', '女', '其他') NOT NULL,
-                    age INT,
-                    major VARCHAR(100),
-                    phone VARCHAR(20),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-            
-            # 创建scores表（可选）
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS scores (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    student_id VARCHAR(20) NOT NULL,
-                    course_name VARCHAR(100) NOT NULL,
-                    score DECIMAL(5,2),
-                    credit INT DEFAULT 0,
-                    semester VARCHAR(20),
-                    exam_date DATE,
-                    FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
-                    INDEX idx_student (student_id)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
-            """)
-            
-        connection.commit()
-        print("✅ 数据库表初始化成功")
+def _create_pool(connect, breaker=None):
+    """按 Config 中的连接池配置创建连接池"""
+    return ConnectionPool(
+        connect,
+        min_size=Config.MYSQL_POOL_MIN_SIZE,
+        max_size=Config.MYSQL_POOL_MAX_SIZE,
+        max_overflow=Config.MYSQL_POOL_MAX_OVERFLOW,
+        timeout=Config.MYSQL_POOL_TIMEOUT,
+        recycle=Config.MYSQL_POOL_RECYCLE,
+        ping_interval=Config.MYSQL_POOL_PING_INTERVAL,
+        breaker=breaker
+    )
+
+def get_pool():
+    """获取全局（主库）连接池（首次调用时按 Config 创建）"""
+    global _pool
+    if _pool is None:
+        breaker = get_breaker()
+        with _pool_lock:
+            if _pool is None:
+                _pool = _create_pool(_create_connection, breaker)
+    return _pool
+
+def get_breaker():
+    """获取主库熔断器（首次调用时按 Config 创建）"""
+    global _breaker
+    if _breaker is None:
+        with _pool_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(Config.DB_BREAKER_FAILURE_THRESHOLD, Config.DB_BREAKER_RESET_TIMEOUT)
+    return _breaker
+
+def database_unavailable():
+    """熔断器是否打开（不访问数据库；半开时返回 False，由请求去试探）"""
+    return get_breaker().state == BREAKER_OPEN
+
+def _health_check_connect():
+    return _create_connection(timeout=Config.DB_HEALTH_CHECK_TIMEOUT)
+
+def start_health_monitor(interval=None):
+    """启动主库的后台健康检查（interval 默认取 DB_HEALTH_CHECK_INTERVAL，为 0 时不启动）"""
+    global _monitor
+    interval = Config.DB_HEALTH_CHECK_INTERVAL if interval is None else interval
+    if not interval or interval <= 0:
+        return None
+    breaker = get_breaker()
+    with _pool_lock:
+        if _monitor is None:
+            _monitor = HealthMonitor(breaker, _health_check_connect, interval).start()
+    return _monitor
+
+def stop_health_monitor():
+    """停止后台健康检查并关闭其专用连接"""
+    global _monitor
+    with _pool_lock:
+        monitor, _monitor = _monitor, None
+    if monitor is not None:
+        monitor.stop()
+
+def get_database_health():
+    """主库的健康状态：熔断器状态、最近一次健康检查的结果和耗时（没有启动后台检查时当场检查一次）"""
+    breaker = get_breaker()
+    monitor = _monitor
+    if monitor is None:
+        monitor = HealthMonitor(breaker, _health_check_connect, 0)
+        monitor.probe()
+        monitor.stop()
+        return {**breaker.stats(), 'monitor': False}
+    return {**breaker.stats(), 'monitor': True}
+
+def get_pool_stats():
+    """获取连接池统计信息"""
+    return get_pool().stats()
+
+def close_pool():
+    """关闭全局连接池和从库连接池"""
+    global _pool, _replicas
+    with _pool_lock:
+        pool, _pool = _pool, None
+        replicas, _replicas = _replicas, None
+    if pool is not None:
+        pool.close()
+    if replicas is not None:
+        replicas.close()
+
+def reset_after_fork():
+    """在 fork 出的子进程中丢弃从父进程继承的主库、从库连接池和熔断器，之后按需重新创建
+    （健康检查线程不会被 fork，需要重新调用 start_health_monitor）
+
+    继承的连接不调用 close()：close() 会发送 QUIT，断开父进程仍在使用的同一条连接；
+    这些连接对象被回收时只关闭子进程中的文件描述符。
+    """
+    global _pool, _replicas, _pool_lock, _breaker, _monitor
+    _pool, _replicas, _pool_lock, _breaker, _monitor = None, None, threading.Lock(), None, None
+
+def replication_lag(connection):
+    """从库的复制延迟（秒）
+    
+    不是从库时为 0，复制线程没有运行时为 inf，没有 REPLICATION CLIENT 权限时为 None（未知）。
+    """
+    with connection.cursor() as cursor:
+        for statement, column in (('SHOW REPLICA STATUS', 'Seconds_Behind_Source'),
+                                  ('SHOW SLAVE STATUS', 'Seconds_Behind_Master')):
+            try:
+                cursor.execute(statement)
+            except pymysql.err.ProgrammingError:
+                # MySQL 8.0.22 以下没有 SHOW REPLICA STATUS
+                continue
+            except pymysql.err.OperationalError as e:
+                if e.args[0] == ER.SPECIFIC_ACCESS_DENIED_ERROR:
+                    return None
+                raise
+            row = cursor.fetchone()
+            if row is None:
+                return 0.0
+            value = row.get(column)
+            return float('inf') if value is None else float(value)
+    return None
+
+class _Replica:
+    """一个从库及其健康状态"""
+    
+    __slots__ = ('name', 'pool', 'down_until', 'lag', 'checked_at', 'latency', 'checking', 'failures')
+    
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.down_until = 0.0
+        self.lag = None
+        self.checked_at = None
+        self.latency = None
+        self.checking = False
+        self.failures = 0
+
+class ReplicaSet:
+    """只读从库集合
+    
+    - strategy: round_robin 依次轮询；least_latency 优先使用延迟检查往返时间最短的从库
+    - max_lag: 复制延迟超过该秒数（或复制没有运行）的从库暂不使用，
+      每隔 check_interval 秒在借出连接时用这条连接重新检查一次
+    - retry_interval: 连接失败的从库在该秒数内不再尝试
+    
+    acquire() 在所有从库都不可用时返回 None，由调用方回退到主库。
+    """
+    
+    STRATEGIES = ('round_robin', 'least_latency')
+    
+    def __init__(self, pools, strategy='round_robin', max_lag=5.0, check_interval=5.0, retry_interval=30.0):
+        if strategy not in self.STRATEGIES:
+            logger.warning(f"未知的从库选择策略 {strategy}，使用 round_robin")
+            strategy = 'round_robin'
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self._replicas = [_Replica(name, pool) for name, pool in pools.items()]
+        self._lock = threading.Lock()
+        self._next = 0
+    
+    def __len__(self):
+        return len(self._replicas)
+    
+    def acquire(self, timeout=None):
+        """从一个可用的从库借出连接，全部不可用时返回 None"""
+        for replica in self._candidates():
+            try:
+                connection = replica.pool.acquire(timeout)
+            except PoolTimeoutError:
+                # 连接池繁忙不代表从库故障，换一个从库
+                continue
+            except Exception as e:
+                self._mark_down(replica, e)
+                continue
+            if self._should_check(replica) and not self._check(replica, connection):
+                continue
+            return connection
+        return None
+    
+    def stats(self):
+        """各从库的状态"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'name': replica.name,
+                'up': now >= replica.down_until,
+                'lagging': self._lagging(replica),
+                'lag': replica.lag,
+                'latency_ms': None if replica.latency is None else round(replica.latency * 1000, 3),
+                'failures': replica.failures,
+            } for replica in self._replicas]
+    
+    def close(self):
+        for replica in self._replicas:
+            replica.pool.close()
+    
+    def _lagging(self, replica):
+        return replica.lag is not None and replica.lag > self.max_lag
+    
+    def _candidates(self):
+        """按策略排好序的候选从库：延迟过大的从库排在最后，且只在到了重新检查的时间时才尝试"""
+        now = time.monotonic()
+        with self._lock:
+            available = [replica for replica in self._replicas if now >= replica.down_until]
+            if self.strategy == 'least_latency':
+                available.sort(key=lambda replica: replica.latency or 0.0)
+            elif available:
+                start = self._next % len(available)
+                self._next += 1
+                available = available[start:] + available[:start]
+            fresh = [replica for replica in available if not self._lagging(replica)]
+            recheck = [replica for replica in available
+                       if self._lagging(replica) and now - replica.checked_at >= self.check_interval]
+        return fresh + recheck
+    
+    def _should_check(self, replica):
+        """是否由当前线程检查复制延迟（同一时间每个从库只有一个线程检查）"""
+        now = time.monotonic()
+        with self._lock:
+            if replica.checking:
+                return False
+            if replica.checked_at is not None and now - replica.checked_at < self.check_interval:
+                return False
+            replica.checking = True
+            return True
+    
+    def _check(self, replica, connection):
+        """检查复制延迟，返回从库是否可用（不可用时连接已归还）"""
+        started = time.monotonic()
+        try:
+            lag = replication_lag(connection)
+        except Exception as e:
+            connection.invalidate()
+            self._mark_down(replica, e)
+            return False
+        elapsed = time.monotonic() - started
+        with self._lock:
+            replica.checking = False
+            replica.checked_at = time.monotonic()
+            replica.lag = lag
+            replica.latency = elapsed if replica.latency is None else replica.latency * 0.8 + elapsed * 0.2
+            lagging = self._lagging(replica)
+        if lagging:
+            logger.warning(f"从库 {replica.name} 复制延迟 {lag} 秒，超过 {self.max_lag} 秒，暂不使用")
+            connection.close()
+            return False
         return True
+    
+    def _mark_down(self, replica, error):
+        with self._lock:
+            replica.checking = False
+            replica.failures += 1
+            replica.down_until = time.monotonic() + self.retry_interval
+        logger.warning(f"从库 {replica.name} 不可用（{error}），{self.retry_interval:g} 秒内不再使用")
+
+_replicas = None
+
+def parse_replicas(value, default_port=3306):
+    """解析 MYSQL_REPLICAS：逗号分隔的 host[:port]，返回 [(host, port), ...]"""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(':') if ':' in item else (item, '', '')
+        try:
+            hosts.append((host, int(port) if port else default_port))
+        except ValueError:
+            logger.error(f"MYSQL_REPLICAS 中的端口无效: {item}，已忽略")
+    return hosts
+
+def get_replicas():
+    """获取从库集合（首次调用时按 Config 创建），没有配置从库时返回 None"""
+    global _replicas
+    if _replicas is None and Config.MYSQL_REPLICAS:
+        with _pool_lock:
+            if _replicas is None:
+                _replicas = ReplicaSet(
+                    {f'{host}:{port}': _create_pool(functools.partial(_create_connection, host, port))
+                     for host, port in parse_replicas(Config.MYSQL_REPLICAS, Config.MYSQL_PORT)},
+                    strategy=Config.MYSQL_REPLICA_STRATEGY,
+                    max_lag=Config.MYSQL_REPLICA_MAX_LAG,
+                    check_interval=Config.MYSQL_REPLICA_CHECK_INTERVAL,
+                    retry_interval=Config.MYSQL_REPLICA_RETRY_INTERVAL
+                )
+    return _replicas if _replicas else None
+
+def get_replica_stats():
+    """获取各从库的状态（没有配置从库时为空列表）"""
+    replicas = get_replicas()
+    return replicas.stats() if replicas is not None else []
+
+class UnitOfWork:
+    """请求级工作单元
+    
+    同一个请求内的所有模型调用共享一条连接和同一个事务：
+    连接在第一次使用时才从连接池借出，模型方法中的 commit() 被推迟到视图返回之后、
+    响应发出之前由 after_request 钩子统一提交（响应为 5xx 时回滚），close() 不再归还连接。
+    提交失败时 commit_unit_of_work() 抛出 CommitFailedError，由控制器层把响应换成错误提示
+    （见 controllers/transaction.py），写入不会在用户看到成功后悄悄丢失。
+    
+    模型方法的 rollback() 只回滚它自己的语句：本请求已经有写入“提交”过时，
+    之后借出的连接句柄先设置保存点，回滚到保存点，不会撤销前面已经成功的写入。
+    
+    只有创建工作单元的线程（处理请求的线程）使用这条连接；并发查询执行器的
+    工作线程虽然继承了请求的应用上下文，也会各自从连接池借出连接。
+    """
+    
+    def __init__(self):
+        self._connection = None
+        self.owner = threading.get_ident()
+        # 本请求是否写入过数据（之后的只读查询不再分发到从库）
+        self.wrote = False
+        self._savepoints = 0
+    
+    @property
+    def active(self):
+        """是否已经借出连接"""
+        return self._connection is not None
+    
+    def connection(self):
+        """获取本请求共享的连接（已有写入时先设置保存点）"""
+        if self._connection is None:
+            self._connection = get_pool().acquire()
+        savepoint = None
+        if self.wrote:
+            self._savepoints += 1
+            savepoint = f'uow_{self._savepoints}'
+            self._connection.query(f'SAVEPOINT {savepoint}')
+        return _UnitOfWorkConnection(self._connection, self, savepoint)
+    
+    def complete(self, error=None):
+        """结束工作单元：无异常时提交，否则回滚，然后归还连接"""
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            if error is None:
+                connection.commit()
+            else:
+                connection.rollback()
+        except Exception as e:
+            logger.error(f"请求事务{'提交' if error is None else '回滚'}失败: {e}")
+            connection.invalidate()
+            raise
+        else:
+            connection.close()
+
+class _UnitOfWorkConnection:
+    """工作单元内交给模型层使用的连接句柄"""
+    
+    def __init__(self, connection, unit_of_work, savepoint=None):
+        self._connection = connection
+        self._unit_of_work = unit_of_work
+        self._savepoint = savepoint
+        # 设置保存点时已经登记的提交后回调数，回滚到保存点时丢弃之后登记的回调
+        self._callbacks_mark = len(self._after_commit_callbacks())
+    
+    def _after_commit_callbacks(self):
+        raw = getattr(self._connection, '_raw_connection', self._connection)
+        return raw.__dict__.get(_AFTER_COMMIT_ATTR, [])
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def commit(self):
+        """推迟到请求结束时提交"""
+        self._unit_of_work.wrote = True
+        _stick_to_primary()
+    
+    def rollback(self):
+        """回滚本句柄执行的语句：有保存点时回滚到保存点，否则回滚整个请求事务（此前没有已提交的写入）"""
+        if self._savepoint is None:
+            self._connection.rollback()
+        else:
+            self._connection.query(f'ROLLBACK TO SAVEPOINT {self._savepoint}')
+            del self._after_commit_callbacks()[self._callbacks_mark:]
+    
+    def close(self):
+        """连接由工作单元在请求结束时归还"""
+
+def _get_unit_of_work():
+    """获取当前请求的工作单元（不存在时创建；请求已经结束时返回 None）"""
+    if g.get('_unit_of_work_closed'):
+        return None
+    unit_of_work = g.get('_unit_of_work')
+    if unit_of_work is None:
+        unit_of_work = g._unit_of_work = UnitOfWork()
+    return unit_of_work
+
+def _start_unit_of_work():
+    """在处理请求的线程上创建工作单元（连接仍在第一次使用时才借出）"""
+    _get_unit_of_work()
+
+def commit_unit_of_work(status_code=200):
+    """结束当前请求的工作单元：视图返回之后、响应发出之前提交（status_code 为 5xx 时回滚）
+    
+    提交失败时抛出 CommitFailedError（连接已作废），由调用方把响应换成错误提示。
+    之后本请求不再创建工作单元：超时后仍在运行的并发查询不会再借出一条没有人提交和归还的连接。
+    """
+    unit_of_work = g.pop('_unit_of_work', None)
+    g._unit_of_work_closed = True
+    if unit_of_work is None:
+        return
+    if status_code >= 500:
+        try:
+            unit_of_work.complete(RuntimeError(f'HTTP {status_code}'))
+        except Exception:
+            pass
+        return
+    try:
+        unit_of_work.complete()
     except Exception as e:
-        print(f"❌ 初始化数据库表失败: {e}")
-        if connection:
-            connection.rollback()
+        raise CommitFailedError(f'提交请求事务失败: {e}') from e
+
+def _teardown_unit_of_work(error=None):
+    """兜底：commit_unit_of_work() 没有被调用（或请求之外的应用上下文）时结束工作单元"""
+    unit_of_work = g.pop('_unit_of_work', None)
+    # 超时后仍在运行的并发查询不能再创建工作单元
+    g._unit_of_work_closed = True
+    if unit_of_work is not None:
+        try:
+            unit_of_work.complete(error)
+        except Exception:
+            # complete() 已记录日志；此时响应已经发出，无法再通知用户
+            pass
+
+def init_app(app):
+    """为 Flask 应用启用请求级工作单元
+    
+    请求事务在应用上下文结束时提交；要在响应发出之前提交并处理提交失败，
+    由控制器层的 after_request 钩子调用 commit_unit_of_work()（见 controllers/transaction.py）。
+    """
+    app.extensions['unit_of_work'] = True
+    app.before_request(_start_unit_of_work)
+    app.teardown_appcontext(_teardown_unit_of_work)
+
+def get_db_connection():
+    """获取数据库连接（主库）
+    
+    在启用了工作单元的 Flask 请求内、处理请求的线程上返回本请求共享的连接，
+    否则从连接池借出一个连接（close() 即归还）。
+    """
+    if has_app_context() and 'unit_of_work' in current_app.extensions:
+        unit_of_work = _get_unit_of_work()
+        if unit_of_work is not None and unit_of_work.owner == threading.get_ident():
+            return unit_of_work.connection()
+    return get_pool().acquire()
+
+# 会话中记录“在此时间之前读主库”的键
+_PRIMARY_UNTIL_KEY = '_read_primary_until'
+
+def _stick_to_primary():
+    """本请求写入了数据：本会话在 MYSQL_REPLICA_MAX_LAG 秒内的只读查询也走主库
+    
+    写入后重定向到的页面（例如添加学生后的首页）因此能读到刚写入的数据。
+    """
+    if get_replicas() is not None and has_request_context():
+        session[_PRIMARY_UNTIL_KEY] = time.time() + Config.MYSQL_REPLICA_MAX_LAG
+
+def has_uncommitted_writes():
+    """当前请求的工作单元中是否有尚未提交的写入（这些写入持有的行锁要到请求结束才释放）"""
+    if not has_app_context():
         return False
-    finally:
-        if connection:
-            connection.close()
+    unit_of_work = g.get('_unit_of_work')
+    return unit_of_work is not None and unit_of_work.wrote and unit_of_work.active
+
+def record_external_write():
+    """本请求通过工作单元以外的连接（例如合并写入队列）写入了数据，之后的只读查询同样走主库"""
+    _stick_to_primary()
+
+def _primary_required():
+    """只读查询是否必须走主库（本请求或本会话最近写入过数据）"""
+    if not has_app_context():
+        return False
+    unit_of_work = g.get('_unit_of_work')
+    if unit_of_work is not None and unit_of_work.wrote:
+        return True
+    return has_request_context() and session.get(_PRIMARY_UNTIL_KEY, 0) > time.time()
+
+def _acquire_replica():
+    replicas = get_replicas()
+    if replicas is None or _primary_required():
+        return None
+    return replicas.acquire()
+
+def get_read_connection():
+    """获取只读查询使用的连接
+    
+    配置了从库时从一个可用的从库借出；没有从库、从库全部不可用或延迟过大、
+    本请求（或本会话最近）写入过数据时，与 get_db_connection() 相同，使用主库。
+    """
+    connection = _acquire_replica()
+    return connection if connection is not None else get_db_connection()
+
+def acquire_read_connection():
+    """借出一条独立的只读连接（从库优先，不使用请求的工作单元）
+    
+    用于请求结束后才消费的流式读取和后台任务。
+    """
+    connection = _acquire_replica()
+    return connection if connection is not None else get_pool().acquire()
 
 def test_connection():
     """测试数据库连接"""
@@ -81,10 +1031,10 @@ def test_connection():
         with connection.cursor() as cursor:
             cursor.execute("SELECT 1")
             result = cursor.fetchone()
-            print("✅ 数据库连接测试成功")
+            logger.debug("数据库连接测试成功")
             return True
     except Exception as e:
-        print(f"❌ 数据库连接测试失败: {e}")
+        logger.error(f"数据库连接测试失败: {e}")
         return False
     finally:
         if connection:
@@ -110,7 +1060,7 @@ def execute_query(query, params=None):
                 connection.commit()
                 return cursor.rowcount
     except Exception as e:
-        print(f"❌ 执行查询失败: {e}")
+        logger.error(f"执行查询失败: {e}")
         if connection:
             connection.rollback()
         return None
@@ -131,7 +1081,7 @@ def execute_insert(query, params=None):
             connection.commit()
             return cursor.lastrowid
     except Exception as e:
-        print(f"❌ 执行插入失败: {e}")
+        logger.error(f"执行插入失败: {e}")
         if connection:
             connection.rollback()
         return None
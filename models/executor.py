@@ -0,0 +1,130 @@
+# models/executor.py
+"""并发执行相互独立的只读查询
+
+页面需要的几项数据（学生列表、统计信息等）互不依赖时，提交到线程池并发执行，
+页面耗时从各查询之和变为其中最慢的一个。
+
+- 每个任务在工作线程中执行，工作线程继承请求的上下文，但 get_db_connection()
+  只在处理请求的线程上返回工作单元的连接，工作线程借出独立的连接
+  （配置了从库时只读查询走从库），因此只适合只读查询；
+- 线程数不超过连接池容量减一，给请求线程自己的连接留出位置；
+- gather() 可以指定一个任务（inline）在请求线程上执行，使用请求自己的连接：
+  页面的 gather 只把另一项查询交给工作线程，一个请求最多同时占用
+  CONNECTIONS_PER_REQUEST 条连接（准入控制按它计算默认并发数，见 controllers.admission）；
+- 一个请求内的所有 gather() 共用同一个截止时间（QUERY_DEADLINE 秒），
+  超时或出错的任务使用调用方给出的降级值，页面显示部分结果。
+"""
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import g, has_app_context
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 使用 gather() 的请求最多同时占用的连接数：请求自己的连接 + 一项交给工作线程的查询
+CONNECTIONS_PER_REQUEST = 2
+
+class QueryExecutor:
+    """查询执行器（线程池）"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='query')
+
+    def submit(self, func: Callable, *args, **kwargs):
+        """提交一个查询，返回 Future
+
+        任务在提交时的 contextvars 上下文中执行，查询计入所属请求的指标。
+        """
+        return self._executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+    def gather(self, tasks: Dict[str, Tuple[Callable, Tuple, Any]],
+               timeout: Optional[float] = None, inline: Optional[str] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """并发执行 tasks = {名称: (函数, 参数元组, 降级值)}，最多等待 timeout 秒
+
+        返回 (结果字典, 使用了降级值的任务名称列表)。
+        timeout 为 None 时使用当前请求剩余的时间。
+        inline 指定的任务在调用线程上执行（与其他任务同时进行），使用请求自己的连接，
+        不占用额外的连接；它无法被中断，只适合很快的查询。
+        """
+        if timeout is None:
+            timeout = remaining_time()
+        deadline = time.monotonic() + timeout
+        futures = {name: self.submit(func, *args) for name, (func, args, _) in tasks.items() if name != inline}
+
+        results, failed = {}, []
+        if inline is not None:
+            func, args, fallback = tasks[inline]
+            try:
+                results[inline] = func(*args)
+            except Exception as e:
+                logger.error(f"查询 {inline} 失败: {e}")
+                results[inline] = fallback
+                failed.append(inline)
+        wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+
+        for name, future in futures.items():
+            fallback = tasks[name][2]
+            if not future.done():
+                # 还没开始的任务直接取消；已经在执行的查询无法中断，完成后连接自动归还
+                future.cancel()
+                logger.warning(f"查询 {name} 超时，使用降级结果")
+                results[name] = fallback
+                failed.append(name)
+            elif future.exception() is not None:
+                logger.error(f"查询 {name} 失败: {future.exception()}")
+                results[name] = fallback
+                failed.append(name)
+            else:
+                results[name] = future.result()
+        return {name: results[name] for name in tasks}, failed
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+def remaining_time() -> float:
+    """当前请求剩余的查询时间（秒）；在请求之外使用完整的 QUERY_DEADLINE"""
+    if not has_app_context():
+        return Config.QUERY_DEADLINE
+    if 'query_deadline' not in g:
+        g.query_deadline = time.monotonic() + Config.QUERY_DEADLINE
+    return g.query_deadline - time.monotonic()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def default_workers() -> int:
+    """线程数：QUERY_EXECUTOR_WORKERS，且不超过连接池容量减一
+
+    每个工作线程同时最多占用一条连接；页面请求自己再占用一条（CONNECTIONS_PER_REQUEST）。
+    """
+    capacity = Config.MYSQL_POOL_MAX_SIZE + Config.MYSQL_POOL_MAX_OVERFLOW
+    workers = Config.QUERY_EXECUTOR_WORKERS or Config.MYSQL_POOL_MAX_SIZE
+    return max(1, min(workers, capacity - 1))
+
+def get_executor() -> QueryExecutor:
+    """获取全局查询执行器（首次调用时创建）"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = QueryExecutor(default_workers())
+    return _executor
+
+def close_executor(wait: bool = True) -> None:
+    """关闭全局查询执行器（进程退出前调用）"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+def reset_after_fork() -> None:
+    """在 fork 出的子进程中丢弃继承的执行器（它的线程没有被复制到子进程）"""
+    global _executor, _executor_lock
+    _executor, _executor_lock = None, threading.Lock()
@@ -0,0 +1,307 @@
+# models/metrics.py
+"""请求与数据库查询的性能指标
+
+- 每个请求：按路由统计耗时直方图、请求数、每个请求执行的查询数和读取的行数；
+- 每条 SQL：执行耗时直方图（按语句类型），超过 SLOW_QUERY_MS 的记入慢查询日志
+  （SQL 归一化：字面量替换为 ?，IN 列表折叠），日志器为 models.metrics.slow_query；
+- 连接池：取连接的等待时间直方图，以及 /metrics 抓取时的连接池、熔断器和各从库的状态；
+- 准入控制：等待名额的时间、过载拒绝的请求数，以及抓取时的并发数和排队数。
+
+游标的计时由 database.PooledConnection.cursor() 返回的 instrumented_cursor_class() 子类完成；
+请求内的计数保存在 contextvars 中，并发查询执行器把它带到工作线程，工作线程中的查询也计入所属请求。
+render_prometheus() 输出 Prometheus 文本格式。
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(__name__ + '.slow_query')
+
+# 耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 每个请求的查询数、行数直方图的桶上界
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+class Histogram:
+    """带标签的直方图（线程安全），桶为累计计数，与 Prometheus 的 histogram 一致"""
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float],
+                 labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        # 标签值 -> [各桶计数..., +Inf 计数, 总和]
+        self._series = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += value
+
+    def collect(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le=le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+class Counter:
+    """带标签的计数器（线程安全）"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value}')
+        return lines
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], **extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra.items()]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+REQUEST_DURATION = Histogram('http_request_duration_seconds', '请求处理耗时（秒）',
+                             LATENCY_BUCKETS, ('route', 'method'))
+REQUESTS = Counter('http_requests_total', '请求数', ('route', 'method', 'status'))
+REQUEST_QUERIES = Histogram('http_request_db_queries', '每个请求执行的 SQL 语句数', COUNT_BUCKETS, ('route',))
+REQUEST_ROWS = Histogram('http_request_db_rows', '每个请求读取的行数', COUNT_BUCKETS, ('route',))
+QUERY_DURATION = Histogram('db_query_duration_seconds', 'SQL 执行耗时（秒）', LATENCY_BUCKETS, ('statement',))
+ROWS_FETCHED = Counter('db_rows_fetched_total', '读取的行数')
+SLOW_QUERIES = Counter('db_slow_queries_total', '慢查询数', ('statement',))
+POOL_ACQUIRE = Histogram('db_pool_acquire_seconds', '从连接池获取连接的等待时间（秒）', LATENCY_BUCKETS)
+WRITE_BATCH_ROWS = Histogram('db_write_batch_rows', '合并写入队列每个事务写入的条数', COUNT_BUCKETS)
+WRITE_QUEUE_RESULTS = Counter('db_write_queue_results_total', '合并写入队列的处理结果', ('operation', 'result'))
+ADMISSION_WAIT = Histogram('http_admission_wait_seconds', '请求等待准入名额的时间（秒）', LATENCY_BUCKETS, ('priority',))
+ADMISSION_SHED = Counter('http_requests_shed_total', '过载时拒绝（503）的请求数', ('route', 'reason'))
+
+METRICS = (REQUEST_DURATION, REQUESTS, REQUEST_QUERIES, REQUEST_ROWS,
+           QUERY_DURATION, ROWS_FETCHED, SLOW_QUERIES, POOL_ACQUIRE,
+           WRITE_BATCH_ROWS, WRITE_QUEUE_RESULTS, ADMISSION_WAIT, ADMISSION_SHED)
+
+class RequestStats:
+    """一个请求内的数据库计数"""
+
+    __slots__ = ('route', 'queries', 'rows', 'query_time')
+
+    def __init__(self, route: str):
+        self.route = route
+        self.queries = 0
+        self.rows = 0
+        self.query_time = 0.0
+
+_current_request = contextvars.ContextVar('request_stats', default=None)
+
+def current_request() -> Optional[RequestStats]:
+    return _current_request.get()
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+# pymysql 的参数占位符：%s、%(name)s
+_PLACEHOLDER = re.compile(r'%(?:\(\w+\))?s')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_sql(sql: str) -> str:
+    """把 SQL 归一化为语句模板：字面量和参数占位符替换为 ?，IN 列表和多行 VALUES 折叠，空白合并"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub(r'\1, ...', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+def statement_type(sql: str) -> str:
+    """SQL 的语句类型（select/insert/update/delete/other）"""
+    word = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ''
+    return word if word in ('select', 'insert', 'update', 'delete') else 'other'
+
+def observe_query(sql: Any, elapsed: float) -> None:
+    """记录一条 SQL 的执行"""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    statement = statement_type(sql)
+    QUERY_DURATION.observe(elapsed, statement)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+    if Config.SLOW_QUERY_MS and elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(1, statement)
+        slow_query_logger.warning('慢查询 %.1f ms [%s]: %s', elapsed * 1000,
+                                  stats.route if stats else '-', normalize_sql(sql))
+
+def observe_rows(count: int) -> None:
+    """记录读取的行数"""
+    if count:
+        ROWS_FETCHED.inc(count)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.rows += count
+
+class InstrumentedCursorMixin:
+    """为 pymysql 游标的 execute 计时、为 fetch* 计数
+
+    executemany 在 pymysql 内部也通过 execute 执行每一条（多行）语句，因此同样被计时。
+    """
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            observe_query(query, time.perf_counter() - started)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            observe_rows(1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size)
+        observe_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        observe_rows(len(rows))
+        return rows
+
+_cursor_classes = {}
+
+def instrumented_cursor_class(cursor_class: type) -> type:
+    """返回 cursor_class 的计时子类（每个游标类只生成一次）"""
+    instrumented = _cursor_classes.get(cursor_class)
+    if instrumented is None:
+        if issubclass(cursor_class, InstrumentedCursorMixin):
+            return cursor_class
+        instrumented = type(f'Instrumented{cursor_class.__name__}',
+                            (InstrumentedCursorMixin, cursor_class), {})
+        _cursor_classes[cursor_class] = instrumented
+    return instrumented
+
+def init_app(app) -> None:
+    """注册请求计时钩子"""
+    from flask import request
+
+    app.extensions['metrics'] = METRICS
+
+    @app.before_request
+    def _start_request_timer():
+        stats = RequestStats(request.endpoint or 'unmatched')
+        request.environ['metrics.started'] = time.perf_counter()
+        request.environ['metrics.token'] = _current_request.set(stats)
+        request.environ['metrics.stats'] = stats
+
+    @app.after_request
+    def _record_request(response):
+        stats = request.environ.get('metrics.stats')
+        started = request.environ.get('metrics.started')
+        if stats is not None and started is not None:
+            REQUEST_DURATION.observe(time.perf_counter() - started, stats.route, request.method)
+            REQUESTS.inc(1, stats.route, request.method, str(response.status_code))
+            REQUEST_QUERIES.observe(stats.queries, stats.route)
+            REQUEST_ROWS.observe(stats.rows, stats.route)
+            logger.debug('%s %s %s %.1f ms, %d 条查询, %d 行', request.method, request.path,
+                         response.status_code, (time.perf_counter() - started) * 1000,
+                         stats.queries, stats.rows)
+        return response
+
+    @app.teardown_request
+    def _reset_request_stats(error=None):
+        token = request.environ.pop('metrics.token', None)
+        if token is not None:
+            try:
+                _current_request.reset(token)
+            except ValueError:
+                # 在另一个上下文中结束（例如流式响应），直接清空
+                _current_request.set(None)
+
+def render_prometheus(pool_stats: Optional[Dict[str, Any]] = None,
+                      replica_stats: Optional[List[Dict[str, Any]]] = None,
+                      startup_timings: Optional[Dict[str, float]] = None,
+                      admission_stats: Optional[Dict[str, Any]] = None,
+                      breaker_stats: Optional[Dict[str, Any]] = None) -> str:
+    """输出全部指标（Prometheus 文本格式 0.0.4）"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.collect())
+    if startup_timings:
+        lines.append('# TYPE app_startup_seconds gauge')
+        for phase, seconds in sorted(startup_timings.items()):
+            lines.append(f'app_startup_seconds{_labels(("phase",), (phase,))} {seconds:.6f}')
+    if pool_stats:
+        for key, value in sorted(pool_stats.items()):
+            if isinstance(value, (int, float)):
+                name = f'db_pool_{key}'
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {value}')
+    if breaker_stats:
+        # 熔断器状态：0 关闭，1 半开，2 打开
+        state = ('closed', 'half_open', 'open').index(breaker_stats['state'])
+        lines.extend(['# TYPE db_breaker_state gauge', f'db_breaker_state {state}'])
+        if breaker_stats.get('probe_latency_ms') is not None:
+            lines.extend(['# TYPE db_health_probe_ok gauge', f"db_health_probe_ok {int(breaker_stats['probe_ok'])}",
+                          '# TYPE db_health_probe_latency_seconds gauge',
+                          f"db_health_probe_latency_seconds {breaker_stats['probe_latency_ms'] / 1000:.6f}"])
+    if admission_stats:
+        for key, value in sorted(admission_stats.items()):
+            name = f'http_admission_{key}'
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+    if replica_stats:
+        gauges = (('db_replica_up', lambda r: int(r['up'] and not r['lagging'])),
+                  ('db_replica_lag_seconds', lambda r: r['lag']),
+                  ('db_replica_failures', lambda r: r['failures']))
+        for name, value_of in gauges:
+            lines.append(f'# TYPE {name} gauge')
+            for replica in replica_stats:
+                value = value_of(replica)
+                if value is not None:
+                    lines.append(f'{name}{_labels(("replica",), (replica["name"],))} {value}')
+    return '\n'.join(lines) + '\n'
+
+def reset() -> None:
+    """清空全部指标（测试用）"""
+    for metric in METRICS:
+        with metric._lock:
+            if isinstance(metric, Histogram):
+                metric._series.clear()
+            else:
+                metric._values.clear()
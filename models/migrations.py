@@ -0,0 +1,251 @@
+# models/migrations.py
+"""数据库结构迁移
+
+表结构和索引只在 migrations/ 目录下的版本化脚本中定义（NNNN_说明.py，按编号顺序执行），
+已执行的版本记录在 schema_version 表中。每个脚本提供：
+
+    DESCRIPTION = '说明'
+    def up(cursor): ...      # 升级
+    def down(cursor): ...    # 回滚
+
+MySQL 的 DDL 会隐式提交，迁移无法整体回滚，因此脚本要写成可以重复执行的
+（建表用 IF NOT EXISTS、建索引用 add_indexes），失败后修复问题再执行一次即可。
+
+在线建索引：add_indexes / drop_indexes 使用 ALGORITHM=INPLACE, LOCK=NONE，
+建索引期间表仍然可以读写；服务器不支持在线执行时直接报错，而不是悄悄锁表。
+DDL 开始和结束时需要短暂的元数据锁，等待超过 MIGRATION_LOCK_WAIT_TIMEOUT 秒就放弃并重试，
+避免排在长事务后面、把之后的所有查询都堵住。
+
+多个进程同时执行迁移时用 GET_LOCK 互斥。命令行见 migrate.py。
+"""
+import hashlib
+import importlib.util
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pymysql
+from pymysql.constants import ER
+from config import Config
+from models.database import get_pool
+from models.search import StudentSearch
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+_FILENAME_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT NOT NULL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        checksum CHAR(40) NOT NULL,
+        duration_ms INT NOT NULL DEFAULT 0,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+# 元数据锁等待超时后重试 DDL 的次数
+DDL_RETRIES = 3
+
+class MigrationError(Exception):
+    """迁移脚本有误或无法执行"""
+
+class Migration:
+    """一个版本化的迁移脚本"""
+
+    __slots__ = ('version', 'name', 'description', 'checksum', 'module')
+
+    def __init__(self, version, name, description, checksum, module):
+        self.version = version
+        self.name = name
+        self.description = description
+        self.checksum = checksum
+        self.module = module
+
+    def up(self, cursor):
+        self.module.up(cursor)
+
+    def down(self, cursor):
+        down = getattr(self.module, 'down', None)
+        if down is None:
+            raise MigrationError(f'迁移 {self.version:04d}_{self.name} 不支持回滚')
+        down(cursor)
+
+def load_migrations(directory: Optional[Path] = None) -> List[Migration]:
+    """读取目录下的迁移脚本，按版本号排序；版本号重复时抛出 MigrationError"""
+    directory = Path(directory or MIGRATIONS_DIR)
+    migrations = {}
+    for path in sorted(directory.glob('*.py')):
+        match = _FILENAME_RE.match(path.name)
+        if not match:
+            continue
+        version, name = int(match.group(1)), match.group(2)
+        if version in migrations:
+            raise MigrationError(f'迁移版本号重复: {version:04d}')
+        source = path.read_bytes()
+        spec = importlib.util.spec_from_file_location(f'migrations.m{version:04d}_{name}', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not callable(getattr(module, 'up', None)):
+            raise MigrationError(f'{path.name} 缺少 up(cursor) 函数')
+        migrations[version] = Migration(version, name, getattr(module, 'DESCRIPTION', name),
+                                        hashlib.sha1(source).hexdigest(), module)
+    return [migrations[version] for version in sorted(migrations)]
+
+# ---- 迁移脚本使用的工具函数 ----
+
+def index_exists(cursor, table: str, index_name: str) -> bool:
+    """表上是否已有该索引"""
+    cursor.execute("""
+        SELECT COUNT(*) as count FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index_name))
+    return cursor.fetchone()['count'] > 0
+
+def column_exists(cursor, table: str, column: str) -> bool:
+    """表上是否已有该列"""
+    cursor.execute("""
+        SELECT COUNT(*) as count FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()['count'] > 0
+
+def run_ddl(cursor, sql: str) -> None:
+    """执行 DDL，等待元数据锁超时（ER_LOCK_WAIT_TIMEOUT）时稍后重试"""
+    for attempt in range(DDL_RETRIES + 1):
+        try:
+            cursor.execute(sql)
+            return
+        except pymysql.err.OperationalError as e:
+            if e.args[0] != ER.LOCK_WAIT_TIMEOUT or attempt == DDL_RETRIES:
+                raise
+            logger.warning(f"等待元数据锁超时，{attempt + 1} 秒后重试: {sql.strip().splitlines()[0]}")
+            time.sleep(attempt + 1)
+
+def add_indexes(cursor, table: str, indexes: Sequence[Tuple[str, str]], lock: str = 'NONE') -> List[str]:
+    """在线添加尚不存在的索引，返回实际创建的索引名
+
+    indexes 为 (索引名, 定义) 列表，定义如 'INDEX idx_x (a, b)'；
+    多个索引放在同一条 ALTER 中，只扫描一遍表。
+    FULLTEXT 索引不支持 LOCK=NONE，需要传 lock='SHARED'（建索引期间只读）。
+    """
+    missing = [(name, definition) for name, definition in indexes if not index_exists(cursor, table, name)]
+    if missing:
+        clauses = ', '.join(f'ADD {definition}' for _, definition in missing)
+        run_ddl(cursor, f'ALTER TABLE {table} {clauses}, ALGORITHM=INPLACE, LOCK={lock}')
+        logger.info(f"已在 {table} 上创建索引: {', '.join(name for name, _ in missing)}")
+    return [name for name, _ in missing]
+
+def drop_indexes(cursor, table: str, index_names: Sequence[str]) -> List[str]:
+    """在线删除存在的索引，返回实际删除的索引名"""
+    existing = [name for name in index_names if index_exists(cursor, table, name)]
+    if existing:
+        clauses = ', '.join(f'DROP INDEX {name}' for name in existing)
+        run_ddl(cursor, f'ALTER TABLE {table} {clauses}, ALGORITHM=INPLACE, LOCK=NONE')
+        logger.info(f"已删除 {table} 上的索引: {', '.join(existing)}")
+    return existing
+
+# ---- 执行迁移 ----
+
+class _MigrationLock:
+    """数据库级互斥锁，防止多个进程同时执行迁移"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.name = f'{Config.MYSQL_DB}.schema_migrations'
+
+    def __enter__(self):
+        self.cursor.execute('SELECT GET_LOCK(%s, %s) as locked', (self.name, Config.MIGRATION_LOCK_WAIT_TIMEOUT))
+        if self.cursor.fetchone()['locked'] != 1:
+            raise MigrationError('另一个进程正在执行迁移，请稍后再试')
+        return self
+
+    def __exit__(self, *exc):
+        self.cursor.execute('SELECT RELEASE_LOCK(%s)', (self.name,))
+
+def _applied(cursor) -> Dict[int, Dict[str, Any]]:
+    cursor.execute(SCHEMA_VERSION_DDL)
+    cursor.execute('SELECT version, name, checksum, duration_ms, applied_at FROM schema_version')
+    return {row['version']: row for row in cursor.fetchall()}
+
+def _run(direction: str, target: Optional[int] = None,
+         migrations: Optional[List[Migration]] = None) -> List[Migration]:
+    migrations = load_migrations() if migrations is None else migrations
+    connection = get_pool().acquire()
+    done = []
+    try:
+        with connection.cursor() as cursor, _MigrationLock(cursor):
+            cursor.execute('SET SESSION lock_wait_timeout = %s', (Config.MIGRATION_LOCK_WAIT_TIMEOUT,))
+            applied = _applied(cursor)
+            if direction == 'up':
+                steps = [m for m in migrations
+                         if m.version not in applied and (target is None or m.version <= target)]
+            else:
+                steps = [m for m in reversed(migrations) if m.version in applied and m.version > target]
+            for migration in steps:
+                label = f'{migration.version:04d}_{migration.name}'
+                logger.info(f"{'执行' if direction == 'up' else '回滚'}迁移 {label}: {migration.description}")
+                started = time.perf_counter()
+                try:
+                    if direction == 'up':
+                        migration.up(cursor)
+                        cursor.execute(
+                            'INSERT INTO schema_version (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)',
+                            (migration.version, migration.name, migration.checksum,
+                             int((time.perf_counter() - started) * 1000)))
+                    else:
+                        migration.down(cursor)
+                        cursor.execute('DELETE FROM schema_version WHERE version = %s', (migration.version,))
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+                done.append(migration)
+    finally:
+        # 连接的会话变量被改过，不放回连接池
+        connection.invalidate()
+        # 索引可能刚刚建立或删除，让搜索重新检测全文索引
+        StudentSearch.fulltext_available = None
+    return done
+
+def upgrade(target: Optional[int] = None) -> List[Migration]:
+    """执行尚未执行的迁移（到 target 版本为止，默认全部），返回本次执行的迁移"""
+    return _run('up', target)
+
+def downgrade(target: int) -> List[Migration]:
+    """按版本号从大到小回滚，直到当前版本为 target（0 表示全部回滚），返回本次回滚的迁移"""
+    if target < 0:
+        raise MigrationError('目标版本不能小于 0')
+    return _run('down', target)
+
+def status() -> List[Dict[str, Any]]:
+    """每个迁移脚本的执行情况；脚本在执行后被修改过时 modified 为 True"""
+    migrations = load_migrations()
+    connection = get_pool().acquire()
+    try:
+        with connection.cursor() as cursor:
+            applied = _applied(cursor)
+        connection.commit()
+    finally:
+        connection.close()
+    return [{
+        'version': m.version,
+        'name': m.name,
+        'description': m.description,
+        'applied_at': applied[m.version]['applied_at'] if m.version in applied else None,
+        'duration_ms': applied[m.version]['duration_ms'] if m.version in applied else None,
+        'modified': m.version in applied and applied[m.version]['checksum'] != m.checksum,
+    } for m in migrations]
+
+def init_db():
+    """初始化（升级）数据库结构到最新版本"""
+    try:
+        upgrade()
+        logger.info("数据库表初始化成功")
+        return True
+    except Exception as e:
+        logger.error(f"初始化数据库表失败: {e}")
+        return False
@@ -0,0 +1,78 @@
+# models/pagination.py
+"""键集（seek）分页工具
+
+列表按 (排序列, student_id) 排序，游标记录上一页边界行的这两个值，
+下一页用 WHERE 条件直接定位到边界之后，不再使用 OFFSET，
+因此无论翻到第几页、表有多大，每页的查询代价都相同。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# 允许排序的列；student_id 是主键，作为所有排序的最终决胜列保证顺序稳定
+SORTABLE_COLUMNS = ('student_id', 'name', 'age', 'major', 'created_at')
+NULLABLE_COLUMNS = ('age', 'major')
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def normalize_sort(sort: Optional[str], order: Optional[str]) -> Tuple[str, str]:
+    """校验排序参数，非法值回退到按学号升序"""
+    if sort not in SORTABLE_COLUMNS:
+        sort = 'student_id'
+    if order not in ('asc', 'desc'):
+        order = 'asc'
+    return sort, order
+
+def normalize_limit(limit: Any, default: int = DEFAULT_PAGE_SIZE) -> int:
+    """校验每页条数"""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def encode_cursor(row: Dict[str, Any], sort: str) -> str:
+    """把边界行编码为 URL 安全的游标字符串"""
+    value = row[sort]
+    if isinstance(value, datetime):
+        value = value.strftime('%Y-%m-%d %H:%M:%S')
+    payload = json.dumps([value, row['student_id']], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, student_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except Exception as e:
+        raise ValueError(f'无效的分页游标: {cursor}') from e
+    if not isinstance(student_id, str):
+        raise ValueError(f'无效的分页游标: {cursor}')
+    return value, student_id
+
+def keyset_condition(sort: str, value: Any, student_id: str, ascending: bool) -> Tuple[str, List[Any]]:
+    """生成“位于游标之后”的 WHERE 条件
+
+    MySQL 中 NULL 在升序时排在最前、降序时排在最后，可为空的列需要单独处理。
+    """
+    op = '>' if ascending else '<'
+    if sort == 'student_id':
+        return f'student_id {op} %s', [student_id]
+
+    if sort not in NULLABLE_COLUMNS:
+        return (f'({sort} {op} %s OR ({sort} = %s AND student_id {op} %s))',
+                [value, value, student_id])
+
+    if value is None:
+        if ascending:
+            # NULL 组内剩余的行，然后是所有非 NULL 的行
+            return f'(({sort} IS NULL AND student_id > %s) OR {sort} IS NOT NULL)', [student_id]
+        # 降序时 NULL 组在最后，只剩组内的行
+        return f'({sort} IS NULL AND student_id < %s)', [student_id]
+
+    condition = f'{sort} {op} %s OR ({sort} = %s AND student_id {op} %s)'
+    if not ascending:
+        condition += f' OR {sort} IS NULL'
+    return f'({condition})', [value, value, student_id]
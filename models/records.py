@@ -0,0 +1,101 @@
+# models/records.py
+"""紧凑行对象：用元组游标读取大结果集
+
+DictCursor 为每一行建一个 dict（8 列的学生行约 360 字节，还不含值本身），
+百万行的导出或全表读取时，这些 dict 占了大部分内存和构造时间。
+这里按查询实际返回的列生成带 __slots__ 的记录类，从普通元组游标（pymysql.cursors.Cursor）
+读出的元组直接构造记录：每行只有对象头和每列一个指针。
+
+记录同时支持属性访问（student.name，模板中的写法不变）和只读的映射访问
+（student['name']、student.get('name')、dict(student)），原来按 dict 使用行的代码不用修改；
+可以给已有的列重新赋值（record['gpa'] = ...），但不能增加新列。
+"""
+import keyword
+from collections.abc import Mapping
+from itertools import starmap
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+class Record(Mapping):
+    """紧凑记录的基类（由 record_class 生成具体的列）"""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _field_set = frozenset()
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._field_set:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self._field_set
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def get(self, key, default=None):
+        if key not in self._field_set:
+            return default
+        return getattr(self, key)
+
+    def _asdict(self) -> Dict[str, object]:
+        """转换成普通 dict"""
+        return {field: getattr(self, field) for field in self._fields}
+
+    def __reduce__(self):
+        return _rebuild, (self._fields, tuple(getattr(self, field) for field in self._fields))
+
+    def __repr__(self):
+        values = ', '.join(f'{field}={getattr(self, field)!r}' for field in self._fields)
+        return f'{type(self).__name__}({values})'
+
+_record_classes: Dict[Tuple[str, ...], type] = {}
+
+def record_class(columns: Sequence[str]) -> type:
+    """返回有这些列的记录类（同样的列只生成一次）"""
+    fields = tuple(columns)
+    cls = _record_classes.get(fields)
+    if cls is not None:
+        return cls
+    for field in fields:
+        if not field.isidentifier() or keyword.iskeyword(field) or field.startswith('_'):
+            raise ValueError(f'不能作为记录字段的列名: {field}')
+    if len(set(fields)) != len(fields):
+        raise ValueError(f'列名重复: {", ".join(fields)}')
+
+    # 与 namedtuple 相同，用生成的 __init__ 按位置赋值，比逐列 setattr 快
+    arguments = ', '.join(fields)
+    body = ''.join(f'\n    self.{field} = {field}' for field in fields) or '\n    pass'
+    namespace = {}
+    exec(f'def __init__(self, {arguments}):{body}', namespace)
+    cls = type('StudentRecord', (Record,), {
+        '__slots__': fields,
+        '__init__': namespace['__init__'],
+        '_fields': fields,
+        '_field_set': frozenset(fields),
+    })
+    _record_classes[fields] = cls
+    return cls
+
+def _rebuild(fields, values):
+    return record_class(fields)(*values)
+
+def cursor_record_class(cursor) -> type:
+    """元组游标当前结果集对应的记录类"""
+    return record_class([column[0] for column in cursor.description])
+
+def to_records(cls: type, rows: Iterable[Tuple]) -> Iterator[Record]:
+    """把元组行转换为记录"""
+    return starmap(cls, rows)
+
+def fetch_records(cursor) -> List[Record]:
+    """读取元组游标的全部结果行，返回记录列表"""
+    return list(starmap(cursor_record_class(cursor), cursor.fetchall()))
@@ -0,0 +1,282 @@
+# models/score_model.py
+"""成绩与绩点（GPA）计算
+
+绩点按下表把百分制成绩换算为 4 分制，GPA 为按学分加权的平均绩点（学分为 0 的课程不计入 GPA）。
+
+一个学期的全部结果（每个学生的 GPA、平均分，每门课程的排名和百分位）
+用一次查询读出该学期的全部成绩，在进程内一遍计算完成，不逐个学生查询；
+结果按学期缓存 GPA_CACHE_TTL 秒，删除学生（级联删除成绩）后整体失效。
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymysql.cursors import SSCursor
+from config import Config
+from models.database import get_read_connection
+
+logger = logging.getLogger(__name__)
+
+# (最低分, 绩点)，从高到低
+GRADE_POINTS = (
+    (90, 4.0), (85, 3.7), (82, 3.3), (78, 3.0), (75, 2.7),
+    (72, 2.3), (68, 2.0), (64, 1.5), (60, 1.0),
+)
+
+# 与 grade_point() 相同规则的 SQL 表达式，用于分组查询
+GRADE_POINT_SQL = ('CASE ' + ' '.join(f'WHEN score >= {low} THEN {point}' for low, point in GRADE_POINTS)
+                   + ' ELSE 0 END')
+
+def grade_point(score: float) -> float:
+    """百分制成绩对应的绩点"""
+    for low, point in GRADE_POINTS:
+        if score >= low:
+            return point
+    return 0.0
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 2)
+
+def compute_semester(rows: Iterable[Sequence[Any]]) -> Dict[str, Any]:
+    """计算一个学期的全部结果
+
+    rows 为 (成绩记录 id, 学号, 课程名, 分数, 学分)，分数为空的记录不参与计算。
+    返回：
+        students  学号 -> {'gpa', 'average', 'credits', 'courses', 'points'}
+        courses   课程名 -> {'count', 'average', 'max', 'min'}
+        ranks     成绩记录 id -> (名次, 人数, 百分位)
+    名次按分数从高到低，同分同名次；百分位为分数低于该成绩的人数占其他人数的百分比。
+    """
+    accumulators = {}
+    course_scores = defaultdict(list)
+    for row_id, student_id, course_name, score, credit in rows:
+        if score is None:
+            continue
+        score = float(score)
+        credit = credit or 0
+        # [加权绩点和, 计入 GPA 的学分, 分数和, 课程数]
+        acc = accumulators.get(student_id)
+        if acc is None:
+            acc = accumulators[student_id] = [0.0, 0, 0.0, 0]
+        if credit > 0:
+            acc[0] += grade_point(score) * credit
+            acc[1] += credit
+        acc[2] += score
+        acc[3] += 1
+        course_scores[course_name].append((score, row_id))
+
+    students = {
+        student_id: {
+            'gpa': _round(points / credits) if credits else None,
+            'average': _round(total / count),
+            'credits': credits,
+            'courses': count,
+            'points': points,
+        }
+        for student_id, (points, credits, total, count) in accumulators.items()
+    }
+
+    courses, ranks = {}, {}
+    for course_name, scored in course_scores.items():
+        scored.sort(key=lambda item: item[0], reverse=True)
+        count = len(scored)
+        position = 0
+        while position < count:
+            # 同分的一组：名次相同，也互不计入“低于”
+            end = position
+            while end < count and scored[end][0] == scored[position][0]:
+                end += 1
+            percentile = 100.0 if count == 1 else round((count - end) * 100 / (count - 1), 1)
+            for _, row_id in scored[position:end]:
+                ranks[row_id] = (position + 1, count, percentile)
+            position = end
+        values = [score for score, _ in scored]
+        courses[course_name] = {
+            'count': count,
+            'average': _round(sum(values) / count),
+            'max': values[0],
+            'min': values[-1],
+        }
+
+    return {'students': students, 'courses': courses, 'ranks': ranks}
+
+class _SemesterCache:
+    """按学期缓存计算结果（线程安全，同一学期同时只计算一次）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self._computing = {}
+        self._generation = 0
+
+    def get(self, semester: str, compute, ttl: float) -> Dict[str, Any]:
+        while True:
+            with self._lock:
+                cached = self._results.get(semester)
+                if cached is not None and (not ttl or time.monotonic() - cached['computed_at'] < ttl):
+                    return cached
+                event = self._computing.get(semester)
+                if event is None:
+                    event = self._computing[semester] = threading.Event()
+                    generation = self._generation
+                    break
+            # 其他线程正在计算这个学期，等它完成后读取
+            event.wait()
+
+        try:
+            result = compute(semester)
+            result['semester'] = semester
+            result['computed_at'] = time.monotonic()
+            with self._lock:
+                # 计算期间缓存被清空时，结果可能已经过时，只返回不保存
+                if generation == self._generation:
+                    self._results[semester] = result
+            return result
+        finally:
+            with self._lock:
+                self._computing.pop(semester, None)
+            event.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._generation += 1
+
+class ScoreModel:
+    """成绩模型 - 成绩单、GPA 和课程排名"""
+
+    _cache = _SemesterCache()
+
+    @staticmethod
+    def get_semesters() -> List[str]:
+        """有成绩的学期（从新到旧）"""
+        connection = get_read_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('''
+                    SELECT DISTINCT semester FROM scores
+                    WHERE semester IS NOT NULL
+                    ORDER BY semester DESC
+                ''')
+                return [row['semester'] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+
+    @staticmethod
+    def get_semester_results(semester: str) -> Dict[str, Any]:
+        """一个学期的全部计算结果（见 compute_semester，按学期缓存）"""
+        return ScoreModel._cache.get(semester, ScoreModel.compute_semester, Config.GPA_CACHE_TTL)
+
+    @staticmethod
+    def compute_semester(semester: str) -> Dict[str, Any]:
+        """重新计算一个学期：一次查询读出该学期全部成绩，在进程内计算"""
+        started = time.perf_counter()
+        connection = get_read_connection()
+        try:
+            # 使用服务端游标按元组流式读取，避免一次性生成大量字典
+            cursor = connection.cursor(SSCursor)
+            try:
+                cursor.execute('''
+                    SELECT id, student_id, course_name, score, credit FROM scores
+                    WHERE semester = %s
+                ''', (semester,))
+                result = compute_semester(_iter_batches(cursor))
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+        result['elapsed'] = round(time.perf_counter() - started, 3)
+        logger.info(f"已计算 {semester} 学期绩点：{len(result['students'])} 名学生，"
+                    f"{len(result['courses'])} 门课程，用时 {result['elapsed']} 秒")
+        return result
+
+    @staticmethod
+    def invalidate() -> None:
+        """清空全部学期的缓存（成绩被修改或删除后调用）"""
+        ScoreModel._cache.clear()
+
+    @staticmethod
+    def get_transcript(student_id: str) -> Dict[str, Any]:
+        """学生成绩单：按学期分组的成绩、绩点、课程排名，以及累计 GPA
+
+        返回 {'semesters': [{'semester', 'gpa', 'average', 'credits', 'scores': [...]}],
+              'gpa', 'average', 'credits'}
+        """
+        connection = get_read_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('''
+                    SELECT id, course_name, score, credit, semester, exam_date FROM scores
+                    WHERE student_id = %s
+                    ORDER BY semester, course_name
+                ''', (student_id,))
+                rows = list(cursor.fetchall())
+        finally:
+            connection.close()
+
+        semesters = []
+        points = credits = total = count = 0
+        for semester in dict.fromkeys(row['semester'] for row in rows):
+            results = ScoreModel.get_semester_results(semester) if semester else None
+            summary = (results or {}).get('students', {}).get(student_id, {})
+            scores = []
+            for row in rows:
+                if row['semester'] != semester:
+                    continue
+                rank = (results or {}).get('ranks', {}).get(row['id'])
+                scores.append({
+                    **row,
+                    'grade_point': None if row['score'] is None else grade_point(float(row['score'])),
+                    'rank': rank[0] if rank else None,
+                    'rank_total': rank[1] if rank else None,
+                    'percentile': rank[2] if rank else None,
+                })
+                if row['score'] is not None:
+                    total += float(row['score'])
+                    count += 1
+            semesters.append({
+                'semester': semester,
+                'gpa': summary.get('gpa'),
+                'average': summary.get('average'),
+                'credits': summary.get('credits', 0),
+                'scores': scores,
+            })
+            points += summary.get('points', 0)
+            credits += summary.get('credits', 0)
+
+        return {
+            'semesters': semesters,
+            'gpa': _round(points / credits) if credits else None,
+            'average': _round(total / count) if count else None,
+            'credits': credits,
+        }
+
+    @staticmethod
+    def get_gpa_map(student_ids: List[str]) -> Dict[str, float]:
+        """一组学生（例如列表的一页）的累计 GPA，一次分组查询"""
+        if not student_ids:
+            return {}
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        connection = get_read_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'''
+                    SELECT student_id,
+                           SUM(({GRADE_POINT_SQL}) * credit) / SUM(credit) AS gpa
+                    FROM scores
+                    WHERE student_id IN ({placeholders}) AND score IS NOT NULL AND credit > 0
+                    GROUP BY student_id
+                ''', list(student_ids))
+                return {row['student_id']: _round(float(row['gpa'])) for row in cursor.fetchall()
+                        if row['gpa'] is not None}
+        finally:
+            connection.close()
+
+def _iter_batches(cursor, size: int = 5000) -> Iterable[Tuple[Any, ...]]:
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
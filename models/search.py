@@ -0,0 +1,139 @@
+# models/search.py
+"""学生搜索
+
+搜索使用两条都能走索引的查询，再在内存中合并排序：
+1. 学号前缀：student_id LIKE 'kw%'，走主键范围扫描；
+2. 姓名/专业/学号全文检索：students 表上的 FULLTEXT 索引（ngram 分词器，支持中文），
+   按 MATCH ... AGAINST 的相关度排序。
+
+关键词短于 ngram 分词长度（例如只输入一个字）时，全文索引查不到，
+仍按原来的子串语义在学号、姓名、专业中匹配（LIKE '%kw%'，全表扫描），姓名以关键词开头的排在前面。
+数据库中没有全文索引（未执行初始化或 MySQL 版本不支持 ngram）时，
+同样回退到 LIKE '%kw%' 全表扫描。
+所有方法都在调用方传入的游标上执行，不自行管理连接。
+"""
+import logging
+from typing import Any, Dict, List, Tuple
+
+import pymysql
+from pymysql.constants import ER
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+FULLTEXT_INDEX = 'ft_students_search'
+FULLTEXT_COLUMNS = 'student_id, name, major'
+
+# MySQL 对“没有可用的全文索引”报告的错误码
+_NO_FULLTEXT_ERRORS = (ER.FT_MATCHING_KEY_NOT_FOUND, ER.KEY_DOES_NOT_EXITS)
+
+class StudentSearch:
+    """基于索引的学生搜索"""
+
+    # None 表示尚未检测
+    fulltext_available = None
+
+    @staticmethod
+    def escape_like(keyword: str) -> str:
+        """转义 LIKE 通配符"""
+        return keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @staticmethod
+    def boolean_phrase(keyword: str) -> str:
+        """把关键词转换为 BOOLEAN MODE 的短语查询，ngram 下近似于子串匹配"""
+        return '"' + keyword.replace('"', ' ').strip() + '"'
+
+    @staticmethod
+    def detect(cursor) -> bool:
+        """检测 students 表上是否有全文索引（每个进程只查一次）"""
+        if StudentSearch.fulltext_available is None:
+            cursor.execute('''
+                SELECT COUNT(*) as count FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'students' AND INDEX_NAME = %s
+            ''', (FULLTEXT_INDEX,))
+            StudentSearch.fulltext_available = cursor.fetchone()['count'] > 0
+            if not StudentSearch.fulltext_available:
+                logger.warning("没有可用的全文索引，搜索使用 LIKE 查询（请初始化数据库）")
+        return StudentSearch.fulltext_available
+
+    @staticmethod
+    def use_fulltext(keyword: str) -> bool:
+        return (StudentSearch.fulltext_available is not False
+                and len(keyword) >= Config.SEARCH_NGRAM_SIZE)
+
+    @staticmethod
+    def conditions(keyword: str) -> Tuple[str, List[Any]]:
+        """与搜索结果一致的 WHERE 条件（用于导出等需要完整结果集的场景，调用前先 detect()）"""
+        prefix = StudentSearch.escape_like(keyword) + '%'
+        if StudentSearch.use_fulltext(keyword):
+            return (f'student_id LIKE %s OR MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)',
+                    [prefix, StudentSearch.boolean_phrase(keyword)])
+        pattern = '%' + StudentSearch.escape_like(keyword) + '%'
+        return 'student_id LIKE %s OR name LIKE %s OR major LIKE %s', [pattern, pattern, pattern]
+
+    @staticmethod
+    def search(cursor, keyword: str, limit: int) -> List[Dict[str, Any]]:
+        """在调用方的连接上执行搜索，按相关度返回最多 limit 条结果
+
+        排序：学号完全匹配 > 学号前缀匹配 > 全文相关度（短关键词为姓名前缀匹配 > 其他子串匹配）
+        """
+        if not StudentSearch.detect(cursor):
+            return StudentSearch._search_like(cursor, keyword, limit)
+        try:
+            return StudentSearch._search_indexed(cursor, keyword, limit)
+        except pymysql.err.MySQLError as e:
+            if e.args[0] not in _NO_FULLTEXT_ERRORS:
+                raise
+            logger.warning(f"没有可用的全文索引，搜索回退到 LIKE 查询（请初始化数据库）: {e}")
+            StudentSearch.fulltext_available = False
+            return StudentSearch._search_like(cursor, keyword, limit)
+
+    @staticmethod
+    def _search_indexed(cursor, keyword: str, limit: int) -> List[Dict[str, Any]]:
+        prefix = StudentSearch.escape_like(keyword) + '%'
+        ranked = {}
+
+        cursor.execute('''
+            SELECT * FROM students
+            WHERE student_id LIKE %s
+            ORDER BY student_id
+            LIMIT %s
+        ''', (prefix, limit))
+        for row in cursor.fetchall():
+            exact = row['student_id'].lower() == keyword.lower()
+            ranked[row['student_id']] = ((2 if exact else 1, 0.0), row)
+
+        if len(ranked) < limit:
+            if StudentSearch.use_fulltext(keyword):
+                cursor.execute(f'''
+                    SELECT *, MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE) AS relevance
+                    FROM students
+                    WHERE MATCH({FULLTEXT_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)
+                    ORDER BY relevance DESC
+                    LIMIT %s
+                ''', (StudentSearch.boolean_phrase(keyword), StudentSearch.boolean_phrase(keyword), limit))
+            else:
+                conditions, params = StudentSearch.conditions(keyword)
+                cursor.execute(f'''
+                    SELECT *, name LIKE %s AS relevance FROM students
+                    WHERE {conditions}
+                    ORDER BY relevance DESC, student_id
+                    LIMIT %s
+                ''', (prefix, *params, limit))
+            for row in cursor.fetchall():
+                relevance = float(row.pop('relevance') or 0)
+                ranked.setdefault(row['student_id'], ((0, relevance), row))
+
+        results = sorted(ranked.values(), key=lambda item: item[0], reverse=True)
+        return [row for _, row in results[:limit]]
+
+    @staticmethod
+    def _search_like(cursor, keyword: str, limit: int) -> List[Dict[str, Any]]:
+        conditions, params = StudentSearch.conditions(keyword)
+        cursor.execute(f'''
+            SELECT * FROM students
+            WHERE {conditions}
+            ORDER BY student_id
+            LIMIT %s
+        ''', (*params, limit))
+        return list(cursor.fetchall())
@@ -0,0 +1,331 @@
+# models/statistics.py
+"""学生统计汇总
+
+统计数据保存在 student_stats 汇总表中，每行是一个计数器 (dimension, bucket, count)：
+
+    total  / ''        学生总数
+    gender / 性别       各性别人数
+    major  / 专业       各专业人数
+    age    / 年龄       各年龄人数（平均、最小、最大年龄都由它推出）
+    meta   / built     汇总表已经建立的标记
+    meta   / version   数据版本：每次写入学生表都加 1（页面的 ETag 由它和成绩的版本生成，见 controllers.conditional）
+    meta   / scores    成绩行数：只由 reconcile() 更新，外部直接删除成绩时让数据版本加 1
+
+所有写入学生表的路径都在同一个事务里调用 apply_changes() 更新计数器，
+首页读取统计只需要读这张小表；reconcile() 用真实的聚合查询校正计数器，
+由后台线程定期执行（校正了计数器时数据版本也加 1）。
+
+数据版本不在写入事务中更新：所有写入都要更新同一行，放在事务里会让全部写入在这一行上排队
+（导入的一次提交期间其他写入都要等待），还会与行锁交叉形成死锁。写入事务提交后，
+由提交后回调在同一连接上用一条单独提交的语句把版本加 1，一个事务只加一次，行锁只持有这一条语句的时间。
+先提交数据、后更新版本，读到新版本时数据一定已经可见，页面缓存不会把旧数据当作新版本保存；
+进程恰好在两者之间退出时版本不变，页面缓存要等到下一次写入才失效。
+"""
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import pymysql
+from pymysql.constants import ER
+from models.changes import ChangeFeed
+from models.database import after_commit, get_pool, get_read_connection, STUDENT_STATS_DDL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATISTICS = {
+    'total_students': 0,
+    'gender_distribution': [],
+    'major_distribution': [],
+    'age_stats': {'avg_age': 0, 'min_age': 0, 'max_age': 0}
+}
+
+# 专业分布只展示人数最多的几个
+TOP_MAJORS = 5
+
+# 数据版本计数器
+VERSION_KEY = ('meta', 'version')
+# 成绩行数（只由校正更新）
+SCORES_KEY = ('meta', 'scores')
+# 连接上缓存的数据版本回调
+_BUMP_ATTR = '_bump_data_version'
+
+_UPSERT_SQL = '''
+    INSERT INTO student_stats (dimension, bucket, count)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+'''
+
+# 数据版本的组成部分：学生（数据版本计数器）、成绩（最大 ID 和最后修改时间）
+_VERSION_QUERIES = (
+    ('''
+        SELECT count, UNIX_TIMESTAMP(updated_at) AS updated_at FROM student_stats
+        WHERE dimension = %s AND bucket = %s
+    ''', VERSION_KEY),
+    ('''
+        SELECT MAX(id) AS max_id, UNIX_TIMESTAMP(MAX(updated_at)) AS updated_at,
+               FLOOR(UNIX_TIMESTAMP(MAX(updated_at)) * 1000000) AS updated_us
+        FROM scores
+    ''', ()),
+)
+
+class StatisticsModel:
+    """统计模型 - 维护和读取学生统计汇总表"""
+
+    @staticmethod
+    def counters_for(student: Mapping[str, Any]) -> List[Tuple[str, str]]:
+        """一个学生对应的计数器"""
+        keys = [('total', ''), ('gender', student['gender'])]
+        if student.get('major'):
+            keys.append(('major', student['major']))
+        if student.get('age') is not None:
+            keys.append(('age', str(student['age'])))
+        return keys
+
+    @staticmethod
+    def compute_delta(before: Iterable[Mapping[str, Any]],
+                      after: Iterable[Mapping[str, Any]]) -> Dict[Tuple[str, str], int]:
+        """根据写入前、后的学生数据计算计数器增量（已去掉为 0 的项）"""
+        delta = Counter()
+        for student in before:
+            delta.subtract(StatisticsModel.counters_for(student))
+        for student in after:
+            delta.update(StatisticsModel.counters_for(student))
+        return {key: value for key, value in delta.items() if value}
+
+    @staticmethod
+    def apply_changes(cursor, before: Iterable[Mapping[str, Any]],
+                      after: Iterable[Mapping[str, Any]]) -> None:
+        """在调用方的事务中按增量更新计数器，事务提交后把数据版本加 1（见模块说明）
+
+        计数器按主键顺序更新，使并发事务加锁顺序一致，减少死锁。
+        计数不变的修改（例如只改姓名）也会改变数据版本。
+        """
+        delta = StatisticsModel.compute_delta(before, after)
+        if delta:
+            cursor.executemany(_UPSERT_SQL, [
+                (dimension, bucket, count) for (dimension, bucket), count in sorted(delta.items())
+            ])
+        raw = getattr(cursor.connection, '_raw_connection', cursor.connection)
+        bump = raw.__dict__.get(_BUMP_ATTR)
+        if bump is None:
+            # 每个连接固定一个回调对象，同一事务多次写入时 after_commit 只登记一次
+            bump = raw.__dict__[_BUMP_ATTR] = lambda: StatisticsModel._bump_version(raw)
+        after_commit(raw, bump)
+
+    @staticmethod
+    def _bump_version(connection) -> None:
+        """在刚提交的连接上用一条单独的短事务把数据版本加 1"""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(_UPSERT_SQL, (*VERSION_KEY, 1))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    @staticmethod
+    def get_statistics() -> Dict[str, Any]:
+        """读取统计信息（汇总表尚未建立时先建立）"""
+        try:
+            rows = StatisticsModel._read_counters()
+        except pymysql.err.ProgrammingError as e:
+            if e.args[0] != ER.NO_SUCH_TABLE:
+                raise
+            rows = []
+        if not any(row['dimension'] == 'meta' and row['bucket'] == 'built' for row in rows):
+            logger.warning("统计汇总表尚未建立，正在根据学生表生成")
+            actual, _ = StatisticsModel._reconcile()
+            # 当前请求的事务快照看不到刚提交的汇总数据，直接使用校正结果
+            rows = [{'dimension': dimension, 'bucket': bucket, 'count': count}
+                    for (dimension, bucket), count in actual.items()]
+        return StatisticsModel._summarize(rows)
+
+    @staticmethod
+    def get_version() -> Tuple[str, Optional[float], float]:
+        """数据版本、最后一次写入的时间和数据库的当前时间（Unix 时间戳）
+
+        数据版本由学生的数据版本计数器和成绩的版本（MAX(id)、MAX(updated_at)，迁移 0004）组成：
+        页面上的 GPA 由成绩计算，教务系统写入成绩后页面也要变化。
+        只读一个主键行和两个索引的一端，用于在执行列表查询之前判断页面是否变化。
+        汇总表或成绩表尚未建立时对应部分为 0。
+        """
+        connection = get_read_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT UNIX_TIMESTAMP(NOW(6)) AS now')
+                now = float(cursor.fetchone()['now'])
+                rows = []
+                for sql, params in _VERSION_QUERIES:
+                    try:
+                        cursor.execute(sql, params)
+                        rows.append(cursor.fetchone() or {})
+                    except pymysql.err.ProgrammingError as e:
+                        if e.args[0] != ER.NO_SUCH_TABLE:
+                            raise
+                        rows.append({})
+        finally:
+            connection.close()
+        students, scores = rows
+        version = f"{students.get('count') or 0}.{scores.get('max_id') or 0}.{scores.get('updated_us') or 0}"
+        updated_at = [float(row['updated_at']) for row in rows if row.get('updated_at') is not None]
+        return version, max(updated_at) if updated_at else None, now
+
+    @staticmethod
+    def _read_counters() -> List[Dict[str, Any]]:
+        connection = get_read_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT dimension, bucket, count FROM student_stats')
+                return list(cursor.fetchall())
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _summarize(rows: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+        total = 0
+        genders, majors, ages = [], [], []
+        for row in rows:
+            count = row['count']
+            if count <= 0:
+                continue
+            dimension = row['dimension']
+            if dimension == 'total':
+                total = count
+            elif dimension == 'gender':
+                genders.append({'gender': row['bucket'], 'count': count})
+            elif dimension == 'major':
+                majors.append({'major': row['bucket'], 'count': count})
+            elif dimension == 'age':
+                ages.append((int(row['bucket']), count))
+
+        majors.sort(key=lambda item: item['count'], reverse=True)
+        if ages:
+            age_total = sum(count for _, count in ages)
+            age_stats = {
+                'avg_age': sum(age * count for age, count in ages) / age_total,
+                'min_age': min(age for age, _ in ages),
+                'max_age': max(age for age, _ in ages)
+            }
+        else:
+            age_stats = dict(DEFAULT_STATISTICS['age_stats'])
+
+        return {
+            'total_students': total,
+            'gender_distribution': genders,
+            'major_distribution': majors[:TOP_MAJORS],
+            'age_stats': age_stats
+        }
+
+    @staticmethod
+    def compute_actual(cursor) -> Dict[Tuple[str, str], int]:
+        """用聚合查询计算真实的计数器"""
+        actual = {}
+        cursor.execute('SELECT COUNT(*) as count FROM students')
+        actual[('total', '')] = cursor.fetchone()['count']
+
+        cursor.execute('SELECT gender, COUNT(*) as count FROM students GROUP BY gender')
+        for row in cursor.fetchall():
+            actual[('gender', row['gender'])] = row['count']
+
+        cursor.execute('''
+            SELECT major, COUNT(*) as count
+            FROM students
+            WHERE major IS NOT NULL AND major != ''
+            GROUP BY major
+        ''')
+        for row in cursor.fetchall():
+            actual[('major', row['major'])] = row['count']
+
+        cursor.execute('''
+            SELECT age, COUNT(*) as count
+            FROM students
+            WHERE age IS NOT NULL
+            GROUP BY age
+        ''')
+        for row in cursor.fetchall():
+            actual[('age', str(row['age']))] = row['count']
+
+        # 成绩行数：教务系统直接删除成绩时 MAX(id)、MAX(updated_at) 不一定变化，由校正发现并更新数据版本
+        cursor.execute('SELECT COUNT(*) as count FROM scores')
+        actual[SCORES_KEY] = cursor.fetchone()['count']
+
+        actual[('meta', 'built')] = 1
+        return actual
+
+    @staticmethod
+    def reconcile() -> Dict[Tuple[str, str], int]:
+        """用真实聚合结果校正汇总表，返回被修正的计数器及其偏差"""
+        _, drift = StatisticsModel._reconcile()
+        return drift
+
+    @staticmethod
+    def _reconcile() -> Tuple[Dict[Tuple[str, str], int], Dict[Tuple[str, str], int]]:
+        """校正汇总表，返回 (真实计数器, 偏差)
+
+        先锁住汇总表的全部行（含间隙），再做聚合查询：
+        已提交的写入都包含在聚合结果里；尚未提交的写入会在更新计数器时等待本事务结束，
+        然后把它们的增量加在校正后的值上，因此校正过程中的并发写入不会被重复或遗漏计算。
+        """
+        connection = get_pool().acquire()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(STUDENT_STATS_DDL)
+                cursor.execute('SELECT dimension, bucket, count FROM student_stats FOR UPDATE')
+                current = {(row['dimension'], row['bucket']): row['count'] for row in cursor.fetchall()}
+                actual = StatisticsModel.compute_actual(cursor)
+
+                drift = {}
+                for key in (set(current) | set(actual)) - {VERSION_KEY}:
+                    difference = actual.get(key, 0) - current.get(key, 0)
+                    if difference:
+                        drift[key] = difference
+                if drift:
+                    # 绕过模型层的写入（例如直接执行 SQL）被校正时，数据版本也加 1，页面缓存随之失效
+                    changes = {**drift, VERSION_KEY: 1}
+                    cursor.executemany(_UPSERT_SQL, [
+                        (dimension, bucket, count) for (dimension, bucket), count in sorted(changes.items())
+                    ])
+                cursor.execute('DELETE FROM student_stats WHERE count <= 0')
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        # 成绩行数不由写入路径维护（删除学生时级联删除的成绩也会让它变化），不算作计数器偏差
+        drift.pop(SCORES_KEY, None)
+        if drift:
+            logger.warning(f"统计汇总表已校正 {len(drift)} 个计数器")
+        return actual, drift
+
+_reconciler = None
+_reconciler_lock = threading.Lock()
+
+def start_reconciler(interval: Optional[float]) -> Optional[threading.Thread]:
+    """启动后台线程，每隔 interval 秒校正一次统计汇总表、压缩一次变更流（interval 为 0 时不启动）"""
+    global _reconciler
+    if not interval or interval <= 0:
+        return None
+    with _reconciler_lock:
+        if _reconciler is not None and _reconciler.is_alive():
+            return _reconciler
+
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    StatisticsModel.reconcile()
+                except Exception as e:
+                    logger.error(f"统计汇总表校正失败: {e}")
+                try:
+                    ChangeFeed.compact()
+                except Exception as e:
+                    logger.error(f"变更流压缩失败: {e}")
+
+        _reconciler = threading.Thread(target=run, name='stats-reconciler', daemon=True)
+        _reconciler.stop = stop
+        _reconciler.start()
+        return _reconciler
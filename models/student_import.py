@@ -0,0 +1,215 @@
+# models/student_import.py
+"""学生批量导入
+
+文件按行流式解析，每 batch_size 行为一批：
+1. 用与表单相同的规则（models.validators）逐行校验；
+2. 用一次 IN 查询找出批内已存在于数据库的学号，文件内重复的学号直接在内存中发现；
+3. 用 executemany 多行 INSERT 写入整批数据，每 commit_size 行提交一次事务。
+"""
+import codecs
+import csv
+import logging
+import time
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+import pymysql
+from config import Config
+from models.database import get_pool
+from models.student_model import StudentModel
+from models.validators import validate_student_data, build_student_data
+
+logger = logging.getLogger(__name__)
+
+# 表头别名：既支持英文列名，也支持导出文件中的中文列名
+HEADER_ALIASES = {
+    'student_id': 'student_id', '学号': 'student_id',
+    'name': 'name', '姓名': 'name',
+    'gender': 'gender', '性别': 'gender',
+    'age': 'age', '年龄': 'age',
+    'major': 'major', '专业': 'major',
+    'phone': 'phone', '电话': 'phone',
+}
+REQUIRED_COLUMNS = ('student_id', 'name', 'gender')
+
+# 报告中最多保留的错误条数，避免错误文件把内存撑满
+MAX_REPORTED_ERRORS = 1000
+
+class ImportFormatError(ValueError):
+    """导入文件格式错误（无法识别的文件类型、缺少必要的列等）"""
+
+class ImportAbortedError(RuntimeError):
+    """导入因数据库错误中断（未提交的部分已回滚，committed 为此前已提交的行数）"""
+
+    def __init__(self, message: str, committed: int):
+        super().__init__(message)
+        self.committed = committed
+
+def _cell_to_text(value: Any) -> str:
+    """把单元格的值统一转换为表单那样的字符串"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Excel 中的纯数字学号、年龄会被读成浮点数
+        value = int(value)
+    return str(value).strip()
+
+def _map_header(header: List[Any]) -> List[Optional[str]]:
+    columns = [HEADER_ALIASES.get(_cell_to_text(title).lower()) for title in header]
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ImportFormatError(f"缺少必要的列: {', '.join(missing)}")
+    return columns
+
+def _rows_to_records(rows: Iterator[List[Any]]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """把原始行转换为 (行号, 字段字典)，行号从表头之后的第一行 2 开始，跳过空行"""
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ImportFormatError('文件为空')
+    columns = _map_header(list(header))
+
+    for line_no, row in enumerate(rows, start=2):
+        record = {}
+        for column, value in zip(columns, row):
+            if column:
+                record[column] = _cell_to_text(value)
+        if any(record.values()):
+            yield line_no, record
+
+def iter_csv_records(stream: IO[bytes], encoding: str = 'utf-8-sig') -> Iterator[Tuple[int, Dict[str, str]]]:
+    """流式解析 CSV（默认兼容带 BOM 的 UTF-8）"""
+    yield from _rows_to_records(csv.reader(codecs.iterdecode(stream, encoding)))
+
+def iter_xlsx_records(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """流式解析 xlsx 的第一个工作表（需要安装 openpyxl）"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('导入 Excel 文件需要安装 openpyxl：pip install openpyxl')
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from _rows_to_records(workbook.worksheets[0].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+def iter_file_records(stream: IO[bytes], filename: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """根据扩展名选择解析器"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return iter_csv_records(stream)
+    if extension == 'xlsx':
+        return iter_xlsx_records(stream)
+    raise ImportFormatError('只支持 .csv 和 .xlsx 文件')
+
+class StudentImporter:
+    """学生批量导入器"""
+
+    def __init__(self, batch_size: Optional[int] = None, commit_size: Optional[int] = None):
+        self.batch_size = max(1, batch_size or Config.IMPORT_BATCH_SIZE)
+        self.commit_size = max(self.batch_size, commit_size or Config.IMPORT_COMMIT_SIZE)
+
+    def import_file(self, stream: IO[bytes], filename: str) -> Dict[str, Any]:
+        """导入上传的文件，返回导入报告"""
+        return self.import_records(iter_file_records(stream, filename))
+
+    def import_records(self, records: Iterator[Tuple[int, Dict[str, str]]]) -> Dict[str, Any]:
+        """导入 (行号, 字段字典) 序列，返回导入报告
+
+        报告格式：{'total', 'inserted', 'failed', 'errors': [{'row', 'student_id', 'error'}],
+        'errors_truncated', 'elapsed'}
+        """
+        report = {'total': 0, 'inserted': 0, 'failed': 0, 'errors': [],
+                  'errors_truncated': False, 'elapsed': 0.0}
+        started = time.perf_counter()
+        # 数据库使用不区分大小写的排序规则，学号按小写判重
+        seen = set()
+
+        committed = 0
+        connection = get_pool().acquire()
+        try:
+            with connection.cursor() as cursor:
+                uncommitted = 0
+                batch = []
+                for line_no, record in records:
+                    report['total'] += 1
+                    batch.append((line_no, record))
+                    if len(batch) >= self.batch_size:
+                        uncommitted += self._import_batch(cursor, batch, seen, report)
+                        batch = []
+                        if uncommitted >= self.commit_size:
+                            connection.commit()
+                            committed += uncommitted
+                            uncommitted = 0
+                if batch:
+                    uncommitted += self._import_batch(cursor, batch, seen, report)
+            connection.commit()
+        except ImportFormatError:
+            connection.rollback()
+            raise
+        except pymysql.err.MySQLError as e:
+            connection.rollback()
+            logger.error(f"批量导入中断: {e}，此前已提交 {committed} 行")
+            raise ImportAbortedError(f'数据库错误（{e}），此前已提交的 {committed} 行已写入，其余未导入', committed) from e
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        report['elapsed'] = round(time.perf_counter() - started, 3)
+        logger.info(f"批量导入完成: 共 {report['total']} 行，成功 {report['inserted']} 行，"
+                    f"失败 {report['failed']} 行，用时 {report['elapsed']} 秒")
+        return report
+
+    def _import_batch(self, cursor, batch: List[Tuple[int, Dict[str, str]]],
+                      seen: set, report: Dict[str, Any]) -> int:
+        """校验并写入一批数据，返回写入的行数"""
+        candidates = []
+        for line_no, record in batch:
+            error = validate_student_data(record)
+            if error:
+                self._record_error(report, line_no, record.get('student_id'), error)
+                continue
+            student = build_student_data(record)
+            key = student['student_id'].lower()
+            if key in seen:
+                self._record_error(report, line_no, student['student_id'], '文件中学号重复')
+                continue
+            seen.add(key)
+            candidates.append((line_no, student))
+
+        existing = {student_id.lower() for student_id in
+                    StudentModel.find_existing_ids(cursor, [s['student_id'] for _, s in candidates])}
+        students = []
+        for line_no, student in candidates:
+            if student['student_id'].lower() in existing:
+                self._record_error(report, line_no, student['student_id'], '学号已存在')
+            else:
+                students.append((line_no, student))
+
+        try:
+            StudentModel.insert_many(cursor, [student for _, student in students])
+            inserted = len(students)
+        except pymysql.err.IntegrityError:
+            # 违反唯一约束（例如并发写入了相同学号）只回滚这一条语句，逐行重试以找出冲突的行。
+            # 死锁、锁等待超时等其他错误可能已经回滚了整个事务（包括本事务中此前写入的批次），
+            # 不能继续，由 import_records 中断导入
+            inserted = 0
+            for line_no, student in students:
+                try:
+                    StudentModel.insert_many(cursor, [student])
+                    inserted += 1
+                except pymysql.err.IntegrityError:
+                    self._record_error(report, line_no, student['student_id'], '学号已存在')
+
+        report['inserted'] += inserted
+        return inserted
+
+    @staticmethod
+    def _record_error(report: Dict[str, Any], line_no: int, student_id: Optional[str], error: str):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': line_no, 'student_id': student_id or '', 'error': error})
+        else:
+            report['errors_truncated'] = True
@@ -1,72 +1,415 @@
 # models/student_model.py
-from typing import List, Dict, Optional, Any
-from models.database import get_db_connection
+import copy
+import logging
+import threading
+from typing import List, Dict, Optional, Any, Iterator, Sequence, Tuple
+import pymysql
+from pymysql.constants import ER
+from pymysql.cursors import Cursor, SSCursor, SSDictCursor
+from config import Config
+from models import suggest
+from models.database import (
+    acquire_read_connection,
+    after_commit,
+    get_db_connection,
+    get_read_connection,
+    has_uncommitted_writes,
+    record_external_write
+)
+from models.changes import ChangeFeed
+from models.score_model import ScoreModel
+from models.search import StudentSearch
+from models.statistics import StatisticsModel, DEFAULT_STATISTICS
+from models.records import fetch_records, to_records, cursor_record_class
+from models.pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_condition,
+    normalize_limit,
+    normalize_sort
+)
+from models.write_queue import (
+    WriteQueue,
+    WRITE_DUPLICATE,
+    WRITE_FAILED,
+    WRITE_NOT_FOUND,
+    WRITE_OK
+)
+
+logger = logging.getLogger(__name__)
+
+# 导出的列（顺序即导出文件中的列顺序）
+STUDENT_EXPORT_COLUMNS = ('student_id', 'name', 'gender', 'age', 'major', 'phone', 'created_at', 'updated_at')
+SCORE_EXPORT_COLUMNS = ('student_id', 'name', 'major', 'course_name', 'score', 'credit', 'semester', 'exam_date')
+
+def _check_columns(columns: Sequence[str]) -> List[str]:
+    """校验要读取的列（列名会拼进 SQL，只允许学生表的导出列）"""
+    unknown = [column for column in columns if column not in STUDENT_EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"未知的列: {', '.join(unknown)}")
+    return list(columns)
+
+_INSERT_SQL = '''
+    INSERT INTO students (student_id, name, gender, age, major, phone)
+    VALUES (%s, %s, %s, %s, %s, %s)
+'''
+
+def _student_row(student: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        student['student_id'],
+        student['name'],
+        student['gender'],
+        student.get('age'),
+        student.get('major'),
+        student.get('phone')
+    )
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue() -> Optional[WriteQueue]:
+    """合并写入队列（首次调用时创建；WRITE_QUEUE_ENABLED 为 False 时返回 None）"""
+    global _write_queue
+    if not Config.WRITE_QUEUE_ENABLED:
+        return None
+    if _write_queue is None:
+        with _write_queue_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(
+                    StudentModel.flush_writes,
+                    max_batch=Config.WRITE_QUEUE_MAX_BATCH,
+                    max_delay=Config.WRITE_QUEUE_MAX_DELAY_MS / 1000,
+                    max_pending=Config.WRITE_QUEUE_MAX_PENDING,
+                    timeout=Config.WRITE_QUEUE_TIMEOUT
+                )
+    return _write_queue
+
+def close_write_queue(timeout: Optional[float] = None) -> None:
+    """写完队列中剩余的写入并停止写入线程（进程退出前调用）"""
+    global _write_queue
+    with _write_queue_lock:
+        write_queue, _write_queue = _write_queue, None
+    if write_queue is not None:
+        write_queue.close(timeout)
+
+def reset_after_fork() -> None:
+    """在 fork 出的子进程中丢弃继承的写入队列（写入线程没有被复制到子进程）"""
+    global _write_queue, _write_queue_lock
+    _write_queue, _write_queue_lock = None, threading.Lock()
+
+def _submit_write(operation: str, student_id: str, data: Dict[str, Any]) -> Optional[str]:
+    """通过合并写入队列写入，返回处理结果；未启用、队列已满，或本请求有尚未提交的写入
+    （写入线程会等待这些写入持有的行锁）时返回 None，由调用方同步写入"""
+    write_queue = get_write_queue()
+    if write_queue is None or has_uncommitted_writes():
+        return None
+    result = write_queue.submit(operation, student_id, data)
+    if result == WRITE_OK:
+        record_external_write()
+    return result
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    """把列表切成每块最多 size 个元素"""
+    size = max(1, size)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
 class StudentModel:
     """学生模型 - 处理所有学生相关的数据操作"""
     
     @staticmethod
-    def get_all_students() -> List[Dict[str, Any]]:
-        """获取所有学生"""
-        connection = get_db_connection()
+    def get_all_students(compact: bool = False) -> List[Dict[str, Any]]:
+        """获取所有学生（compact 为 True 时返回紧凑记录，见 models/records.py）"""
+        connection = get_read_connection()
         try:
-            with connection.cursor() as cursor:
+            with connection.cursor(Cursor if compact else None) as cursor:
                 cursor.execute('SELECT * FROM students ORDER BY student_id')
+                if compact:
+                    return fetch_records(cursor)
                 students = cursor.fetchall()
                 return students
         except Exception as e:
-            print(f"❌ 数据库查询错误: {e}")
+            logger.error(f"数据库查询错误: {e}")
             return []
         finally:
             connection.close()
     
+    @staticmethod
+    def get_students_page(sort: str = 'student_id', order: str = 'asc',
+                          after: Optional[str] = None, before: Optional[str] = None,
+                          limit: int = 20, columns: Optional[Sequence[str]] = None,
+                          compact: bool = False) -> Dict[str, Any]:
+        """键集分页获取学生列表
+        
+        after/before 为上一页返回的 next_cursor/prev_cursor，分别向后、向前翻页；
+        每页只按索引定位并读取 limit + 1 行，耗时与翻到第几页无关。
+        columns 指定只读取哪些列（STUDENT_EXPORT_COLUMNS 中的列，排序列和学号总会读取，用于生成游标）。
+        compact 为 True 时每行是只含所读列的紧凑记录（见 models/records.py），而不是 dict。
+        """
+        sort, order = normalize_sort(sort, order)
+        select = '*' if not columns else ', '.join(dict.fromkeys([*_check_columns(columns), sort, 'student_id']))
+        limit = normalize_limit(limit)
+        backward = bool(before) and not after
+        cursor = before if backward else after
+        
+        conditions, params = '', []
+        if cursor:
+            try:
+                value, key = decode_cursor(cursor)
+            except ValueError as e:
+                logger.warning(f"{e}，返回第一页")
+                cursor, backward = None, False
+            else:
+                # 向前翻页时按相反方向查询，取回后再倒序
+                condition, params = keyset_condition(sort, value, key, (order == 'asc') != backward)
+                conditions = f'WHERE {condition}'
+        
+        direction = 'ASC' if (order == 'asc') != backward else 'DESC'
+        connection = get_read_connection()
+        try:
+            with connection.cursor(Cursor if compact else None) as db_cursor:
+                db_cursor.execute(f'''
+                    SELECT {select} FROM students
+                    {conditions}
+                    ORDER BY {sort} {direction}, student_id {direction}
+                    LIMIT %s
+                ''', (*params, limit + 1))
+                students = fetch_records(db_cursor) if compact else list(db_cursor.fetchall())
+        except Exception as e:
+            logger.error(f"数据库查询错误: {e}")
+            students = []
+        finally:
+            connection.close()
+        
+        has_more = len(students) > limit
+        students = students[:limit]
+        if backward:
+            students.reverse()
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, bool(cursor)
+        
+        return {
+            'students': students,
+            'sort': sort,
+            'order': order,
+            'limit': limit,
+            'has_next': has_next and bool(students),
+            'has_prev': has_prev and bool(students),
+            'next_cursor': encode_cursor(students[-1], sort) if has_next and students else None,
+            'prev_cursor': encode_cursor(students[0], sort) if has_prev and students else None
+        }
+    
     @staticmethod
     def get_student_by_id(student_id: str) -> Optional[Dict[str, Any]]:
         """根据ID获取单个学生"""
-        connection = get_db_connection()
+        connection = get_read_connection()
         try:
             with connection.cursor() as cursor:
                 cursor.execute('SELECT * FROM students WHERE student_id = %s', (student_id,))
                 student = cursor.fetchone()
                 return student
         except Exception as e:
-            print(f"❌ 数据库查询错误: {e}")
+            logger.error(f"数据库查询错误: {e}")
             return None
         finally:
             connection.close()
     
     @staticmethod
     def add_student(student_data: Dict[str, Any]) -> bool:
-        """添加学生"""
+        """添加学生（启用 WRITE_QUEUE_ENABLED 时与并发请求的写入合并提交）"""
+        result = _submit_write('insert', student_data['student_id'], student_data)
+        if result is not None:
+            return result == WRITE_OK
         connection = get_db_connection()
         try:
             with connection.cursor() as cursor:
-                cursor.execute('''
-                    INSERT INTO students (student_id, name, gender, age, major, phone)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                ''', (
-                    student_data['student_id'],
-                    student_data['name'],
-                    student_data['gender'],
-                    student_data.get('age'),
-                    student_data.get('major'),
-                    student_data.get('phone')
-                ))
+                cursor.execute(_INSERT_SQL, _student_row(student_data))
+                StudentModel._record_changes(cursor, [], [student_data])
             connection.commit()
             return True
         except Exception as e:
             connection.rollback()
-            print(f"❌ 添加学生错误: {e}")
+            logger.error(f"添加学生错误: {e}")
             return False
         finally:
             connection.close()
     
+    @staticmethod
+    def create_student(student_data: Dict[str, Any]) -> str:
+        """添加学生并区分失败原因，返回 WRITE_OK / WRITE_DUPLICATE / WRITE_FAILED
+        （合并写入时等待超时返回 WRITE_TIMEOUT）
+        
+        合并写入时由写入线程在同一事务中查重，不再单独执行 check_student_exists。
+        """
+        result = _submit_write('insert', student_data['student_id'], student_data)
+        if result is not None:
+            return result
+        if StudentModel.check_student_exists(student_data['student_id']):
+            return WRITE_DUPLICATE
+        return WRITE_OK if StudentModel.add_student(student_data) else WRITE_FAILED
+    
+    @staticmethod
+    def insert_many(cursor, students: List[Dict[str, Any]]) -> int:
+        """在调用方的事务中批量插入学生
+        
+        pymysql 会把 executemany 的 INSERT ... VALUES 改写为多行 INSERT，
+        一条语句写入一整批数据。
+        """
+        if not students:
+            return 0
+        cursor.executemany(_INSERT_SQL, [_student_row(student) for student in students])
+        inserted = cursor.rowcount
+        StudentModel._record_changes(cursor, [], students)
+        return inserted
+    
+    @staticmethod
+    def _lock_students(cursor, student_ids: List[str]) -> List[Dict[str, Any]]:
+        """锁定并读取即将修改的学生（写入前的数据用于增量维护统计）"""
+        if not student_ids:
+            return []
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        cursor.execute(f'''
+            SELECT student_id, name, gender, age, major FROM students
+            WHERE student_id IN ({placeholders})
+            FOR UPDATE
+        ''', list(student_ids))
+        return list(cursor.fetchall())
+    
+    @staticmethod
+    def _lock_targets(cursor, student_ids: Optional[List[str]] = None,
+                      filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """锁定并读取批量操作的目标学生
+        
+        按学号列表时分块执行 IN 查询（学号排序后加锁，使并发事务加锁顺序一致）；
+        按筛选条件（keyword 搜索关键词、major 专业、gender 性别）时用一条语句锁定全部匹配的行。
+        """
+        if student_ids:
+            before = []
+            for chunk in _chunks(sorted(set(student_ids)), Config.BATCH_CHUNK_SIZE):
+                before.extend(StudentModel._lock_students(cursor, chunk))
+            return before
+        
+        clauses, params = [], []
+        keyword = ((filters or {}).get('keyword') or '').strip()
+        if keyword:
+            StudentSearch.detect(cursor)
+            condition, condition_params = StudentSearch.conditions(keyword)
+            clauses.append(f'({condition})')
+            params.extend(condition_params)
+        for column in ('major', 'gender'):
+            if (filters or {}).get(column):
+                clauses.append(f'{column} = %s')
+                params.append(filters[column])
+        if not clauses:
+            raise ValueError('批量操作需要指定学号或筛选条件')
+        
+        cursor.execute(f'''
+            SELECT student_id, name, gender, age, major FROM students
+            WHERE {' AND '.join(clauses)}
+            ORDER BY student_id
+            FOR UPDATE
+        ''', params)
+        return list(cursor.fetchall())
+    
+    @staticmethod
+    def _record_changes(cursor, before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> None:
+        """所有写路径在同一事务内调用
+        
+        - 按写入前后的数据增量更新统计汇总表（同一事务），事务提交后数据版本加 1；
+        - 追加变更流记录（同一事务）；
+        - 事务提交后更新进程内的联想索引；
+        - 删除学生会级联删除成绩，事务提交后清空学期绩点缓存。
+        """
+        StatisticsModel.apply_changes(cursor, before, after)
+        
+        remaining = {student['student_id'] for student in after}
+        removed = [student['student_id'] for student in before if student['student_id'] not in remaining]
+        ChangeFeed.record(cursor, removed, [student['student_id'] for student in after])
+        upserted = [dict(student) for student in after]
+        after_commit(cursor.connection, lambda: suggest.record_changes(removed, upserted))
+        if removed:
+            after_commit(cursor.connection, ScoreModel.invalidate)
+    
+    @staticmethod
+    def find_existing_ids(cursor, student_ids: List[str]) -> set:
+        """在调用方的事务中查询哪些学号已经存在（一次 IN 查询）"""
+        if not student_ids:
+            return set()
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        cursor.execute(f'SELECT student_id FROM students WHERE student_id IN ({placeholders})',
+                       list(student_ids))
+        return {row['student_id'] for row in cursor.fetchall()}
+    
+    @staticmethod
+    def update_many(cursor, students: List[Dict[str, Any]]) -> set:
+        """在调用方的事务中批量修改学生（每个学号最多一条），返回实际存在并被修改的学号
+        
+        先按学号顺序锁定目标行，再用一条多行 INSERT ... ON DUPLICATE KEY UPDATE 写入；
+        不存在的学号被跳过（目标行已锁定，不会插入新行）。
+        """
+        before = StudentModel._lock_targets(cursor, [student['student_id'] for student in students])
+        found = {row['student_id'] for row in before}
+        students = [student for student in students if student['student_id'] in found]
+        if students:
+            cursor.executemany(_INSERT_SQL.rstrip() + '''
+                ON DUPLICATE KEY UPDATE name = VALUES(name), gender = VALUES(gender), age = VALUES(age),
+                    major = VALUES(major), phone = VALUES(phone)
+            ''', [_student_row(student) for student in students])
+            StudentModel._record_changes(cursor, before, students)
+        return found
+    
+    @staticmethod
+    def flush_writes(cursor, batch) -> None:
+        """合并写入队列的提交回调：在一个事务中处理一批添加（insert）和修改（update）
+        
+        批内学号互不相同。添加时先一次查出已存在的学号（结果为 WRITE_DUPLICATE），其余用一条多行 INSERT 写入；
+        查重之后其他连接又插入了相同学号导致整条语句失败时，回到保存点逐行插入。
+        """
+        inserts = [write for write in batch if write.operation == 'insert']
+        updates = [write for write in batch if write.operation == 'update']
+        
+        if inserts:
+            existing = StudentModel.find_existing_ids(cursor, [write.key for write in inserts])
+            fresh = []
+            for write in inserts:
+                if write.key in existing:
+                    write.result = WRITE_DUPLICATE
+                else:
+                    fresh.append(write)
+            cursor.execute('SAVEPOINT write_queue_batch')
+            try:
+                StudentModel.insert_many(cursor, [write.data for write in fresh])
+                for write in fresh:
+                    write.result = WRITE_OK
+            except pymysql.err.IntegrityError:
+                cursor.execute('ROLLBACK TO SAVEPOINT write_queue_batch')
+                for write in fresh:
+                    cursor.execute('SAVEPOINT write_queue_row')
+                    try:
+                        StudentModel.insert_many(cursor, [write.data])
+                        write.result = WRITE_OK
+                    except pymysql.err.IntegrityError as e:
+                        cursor.execute('ROLLBACK TO SAVEPOINT write_queue_row')
+                        write.result = WRITE_DUPLICATE if e.args[0] == ER.DUP_ENTRY else WRITE_FAILED
+        
+        if updates:
+            found = StudentModel.update_many(cursor, [{**write.data, 'student_id': write.key} for write in updates])
+            for write in updates:
+                write.result = WRITE_OK if write.key in found else WRITE_NOT_FOUND
+    
     @staticmethod
     def update_student(student_id: str, student_data: Dict[str, Any]) -> bool:
-        """更新学生信息"""
+        """更新学生信息（启用 WRITE_QUEUE_ENABLED 时与并发请求的写入合并提交）"""
+        result = _submit_write('update', student_id, student_data)
+        if result is not None:
+            return result == WRITE_OK
         connection = get_db_connection()
         try:
             with connection.cursor() as cursor:
+                before = StudentModel._lock_students(cursor, [student_id])
+                if not before:
+                    return False
                 cursor.execute('''
                     UPDATE students 
                     SET name=%s, gender=%s, age=%s, major=%s, phone=%s
@@ -79,11 +422,13 @@ class StudentModel:
                     student_data.get('phone'),
                     student_id
                 ))
+                StudentModel._record_changes(cursor, before, [{**student_data, 'student_id': student_id}])
             connection.commit()
-            return cursor.rowcount > 0
+            # 数据未变化时 rowcount 为 0，以学生是否存在作为更新结果
+            return True
         except Exception as e:
             connection.rollback()
-            print(f"❌ 更新学生错误: {e}")
+            logger.error(f"更新学生错误: {e}")
             return False
         finally:
             connection.close()
@@ -94,98 +439,180 @@ class StudentModel:
         connection = get_db_connection()
         try:
             with connection.cursor() as cursor:
-                cursor.execute('DELETE FROM students WHERE student_id = %s', (student_id,))
+                before = StudentModel._lock_students(cursor, [student_id])
+                if not before:
+                    return False
+                deleted = cursor.execute('DELETE FROM students WHERE student_id = %s', (student_id,))
+                if deleted:
+                    StudentModel._record_changes(cursor, before, [])
             connection.commit()
-            return cursor.rowcount > 0
+            return deleted > 0
         except Exception as e:
             connection.rollback()
-            print(f"❌ 删除学生错误: {e}")
+            logger.error(f"删除学生错误: {e}")
             return False
         finally:
             connection.close()
     
     @staticmethod
-    def search_students(keyword: str) -> List[Dict[str, Any]]:
-        """搜索学生"""
+    def delete_students(student_ids: Optional[List[str]] = None,
+                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """批量删除学生（按学号列表或筛选条件）
+        
+        先锁定目标学生，再按 BATCH_CHUNK_SIZE 分块执行 DELETE ... WHERE student_id IN (...)，
+        全部在一个事务中完成、只提交一次。
+        返回 {'matched': 匹配的学生数, 'deleted': 删除的学生数, 'scores_deleted': 删除的成绩数}
+        """
         connection = get_db_connection()
         try:
             with connection.cursor() as cursor:
-                pattern = f"%{keyword}%"
-                cursor.execute('''
-                    SELECT * FROM students 
-                    WHERE student_id LIKE %s OR name LIKE %s OR major LIKE %s
-                    ORDER BY student_id
-                ''', (pattern, pattern, pattern))
-                return cursor.fetchall()
-        except Exception as e:
-            print(f"❌ 搜索错误: {e}")
-            return []
+                before = StudentModel._lock_targets(cursor, student_ids, filters)
+                summary = {'matched': len(before), 'deleted': 0, 'scores_deleted': 0}
+                for chunk in _chunks([student['student_id'] for student in before], Config.BATCH_CHUNK_SIZE):
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    # 成绩会被外键级联删除，先显式删除以便统计删除的成绩数
+                    cursor.execute(f'DELETE FROM scores WHERE student_id IN ({placeholders})', chunk)
+                    summary['scores_deleted'] += cursor.rowcount
+                    cursor.execute(f'DELETE FROM students WHERE student_id IN ({placeholders})', chunk)
+                    summary['deleted'] += cursor.rowcount
+                StudentModel._record_changes(cursor, before, [])
+            connection.commit()
+            return summary
+        except Exception:
+            connection.rollback()
+            raise
         finally:
             connection.close()
     
     @staticmethod
-    def get_statistics() -> Dict[str, Any]:
-        """获取统计信息"""
+    def update_students(changes: Dict[str, Any], student_ids: Optional[List[str]] = None,
+                        filters: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """批量修改学生（按学号列表或筛选条件）
+        
+        changes 支持：major 设置专业、gender 设置性别、age_delta 年龄增减（未填写年龄的学生不变）。
+        按 BATCH_CHUNK_SIZE 分块执行 UPDATE ... WHERE student_id IN (...)，在一个事务中完成。
+        返回 {'matched': 匹配的学生数, 'updated': 数据有变化的学生数}
+        """
+        assignments, values = [], []
+        for column in ('major', 'gender'):
+            if column in changes:
+                assignments.append(f'{column} = %s')
+                values.append(changes[column])
+        age_delta = changes.get('age_delta')
+        if age_delta:
+            assignments.append('age = age + %s')
+            values.append(age_delta)
+        if not assignments:
+            raise ValueError('没有要修改的内容')
+        
         connection = get_db_connection()
         try:
             with connection.cursor() as cursor:
-                # 总学生数
-                cursor.execute('SELECT COUNT(*) as total FROM students')
-                result = cursor.fetchone()
-                total = result['total'] if result else 0
-                
-                # 性别分布
-                cursor.execute('''
-                    SELECT gender, COUNT(*) as count 
-                    FROM students 
-                    GROUP BY gender
-                ''')
-                gender_stats = cursor.fetchall()
-                
-                # 专业分布
-                cursor.execute('''
-                    SELECT major, COUNT(*) as count 
-                    FROM students 
-                    WHERE major IS NOT NULL AND major != ''
-                    GROUP BY major
-                    ORDER BY count DESC
-                    LIMIT 5
-                ''')
-                major_stats = cursor.fetchall()
-                
-                # 年龄统计 - 使用 COALESCE 处理 NULL 值
-                cursor.execute('''
-                    SELECT 
-                        COALESCE(AVG(age), 0) as avg_age,
-                        COALESCE(MIN(age), 0) as min_age,
-                        COALESCE(MAX(age), 0) as max_age
-                    FROM students 
-                    WHERE age IS NOT NULL
-                ''')
-                age_stats = cursor.fetchone()
+                before = StudentModel._lock_targets(cursor, student_ids, filters)
+                after = []
+                for student in before:
+                    updated = {**student, **{key: value for key, value in changes.items() if key != 'age_delta'}}
+                    if age_delta and student['age'] is not None:
+                        updated['age'] = student['age'] + age_delta
+                        if not 1 <= updated['age'] <= 150:
+                            raise ValueError(f"学生 {student['student_id']} 调整后的年龄超出 1-150")
+                    after.append(updated)
                 
-                # 确保 age_stats 有默认值
-                if not age_stats:
-                    age_stats = {'avg_age': 0, 'min_age': 0, 'max_age': 0}
-                
-                return {
-                    'total_students': total,
-                    'gender_distribution': gender_stats if gender_stats else [],
-                    'major_distribution': major_stats if major_stats else [],
-                    'age_stats': age_stats
-                }
+                summary = {'matched': len(before), 'updated': 0}
+                for chunk in _chunks([student['student_id'] for student in before], Config.BATCH_CHUNK_SIZE):
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    cursor.execute(f'UPDATE students SET {", ".join(assignments)} WHERE student_id IN ({placeholders})',
+                                   [*values, *chunk])
+                    summary['updated'] += cursor.rowcount
+                StudentModel._record_changes(cursor, before, after)
+            connection.commit()
+            return summary
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+    
+    @staticmethod
+    def search_students(keyword: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """搜索学生（按相关度排序，最多返回 limit 条，默认 SEARCH_RESULT_LIMIT）"""
+        connection = get_read_connection()
+        try:
+            with connection.cursor() as cursor:
+                return StudentSearch.search(cursor, keyword, limit or Config.SEARCH_RESULT_LIMIT)
         except Exception as e:
-            print(f"❌ 统计错误: {e}")
-            # 返回默认值
-            return {
-                'total_students': 0,
-                'gender_distribution': [],
-                'major_distribution': [],
-                'age_stats': {'avg_age': 0, 'min_age': 0, 'max_age': 0}
-            }
+            logger.error(f"搜索错误: {e}")
+            return []
         finally:
             connection.close()
     
+    @staticmethod
+    def iter_students(keyword: Optional[str] = None, include_scores: bool = False,
+                      batch_size: int = 1000, columns: Optional[Sequence[str]] = None,
+                      compact: bool = True) -> Iterator[Dict[str, Any]]:
+        """流式遍历学生（可选连同成绩），用于导出和 NDJSON 接口
+        
+        使用服务端游标逐批读取，内存占用与结果行数无关。
+        columns 指定只读取学生表的哪些列（不含成绩时有效）。
+        默认用元组游标读取、逐行构造紧凑记录（见 models/records.py），compact 为 False 时返回 dict。
+        生成器可能在请求结束后才被消费，因此单独借出一条连接（从库优先），
+        而不使用请求级工作单元的连接。
+        """
+        if include_scores:
+            columns = SCORE_EXPORT_COLUMNS
+            source = 'student_scores_view'
+            order_by = 'student_id, semester'
+        else:
+            columns = _check_columns(columns) if columns else STUDENT_EXPORT_COLUMNS
+            source = 'students'
+            order_by = 'student_id'
+        
+        connection = acquire_read_connection()
+        finished = False
+        try:
+            conditions, params = '', []
+            if keyword:
+                with connection.cursor() as cursor:
+                    StudentSearch.detect(cursor)
+                conditions, params = StudentSearch.conditions(keyword)
+                if include_scores:
+                    # 视图上不能使用全文索引，先在学生表上过滤
+                    conditions = f'WHERE student_id IN (SELECT student_id FROM students WHERE {conditions})'
+                else:
+                    conditions = f'WHERE {conditions}'
+            
+            # 不使用 with：服务端游标的 close() 会把剩余的行全部读完
+            cursor = connection.cursor(SSCursor if compact else SSDictCursor)
+            cursor.execute(f'''
+                SELECT {', '.join(columns)} FROM {source}
+                {conditions}
+                ORDER BY {order_by}
+            ''', params)
+            record = cursor_record_class(cursor) if compact else None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from (to_records(record, rows) if compact else rows)
+            cursor.close()
+            finished = True
+        finally:
+            if finished:
+                connection.close()
+            else:
+                # 结果集没有读完（出错或客户端中途断开），直接丢弃连接，避免把剩余的行读完
+                connection.invalidate()
+    
+    @staticmethod
+    def get_statistics() -> Dict[str, Any]:
+        """获取统计信息（读取增量维护的统计汇总表）"""
+        try:
+            return StatisticsModel.get_statistics()
+        except Exception as e:
+            logger.error(f"统计错误: {e}")
+            # 返回默认值
+            return copy.deepcopy(DEFAULT_STATISTICS)
+    
     @staticmethod
     def check_student_exists(student_id: str) -> bool:
         """检查学生是否存在"""
@@ -196,7 +623,7 @@ class StudentModel:
                 result = cursor.fetchone()
                 return result['count'] > 0
         except Exception as e:
-            print(f"❌ 检查学生错误: {e}")
+            logger.error(f"检查学生错误: {e}")
             return False
         finally:
             connection.close()
\ No newline at end of file
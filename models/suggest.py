@@ -0,0 +1,235 @@
+# models/suggest.py
+"""搜索框联想（typeahead）使用的内存前缀索引
+
+学号、姓名、姓名拼音首字母各维护一个有序数组 [(key, student_id), ...]，
+查询时用 bisect 定位到前缀的起点顺序读取，不访问数据库。
+
+- 首次查询时从数据库加载全部学生的 (学号, 姓名, 专业)：读取数据库时不持有索引的锁，
+  期间提交的写入记入日志，在新索引建好后重放；
+- 本进程内的增删改在事务提交后增量更新索引（StudentModel._record_changes）；
+- 其他进程的写入通过定期后台重建（SUGGEST_REFRESH_INTERVAL 秒）同步。
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from config import Config
+from models.database import acquire_read_connection
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pypinyin 是可选依赖，没有安装时使用 GB2312 编码顺序推算首字母
+    lazy_pinyin = None
+
+# GB2312 一级汉字按拼音排序，每个声母第一个字的编码（减去 65536）
+_GB2312_INITIALS = (
+    (-20319, 'a'), (-20283, 'b'), (-19775, 'c'), (-19218, 'd'), (-18710, 'e'),
+    (-18526, 'f'), (-18239, 'g'), (-17922, 'h'), (-17417, 'j'), (-16474, 'k'),
+    (-16212, 'l'), (-15640, 'm'), (-15165, 'n'), (-14922, 'o'), (-14914, 'p'),
+    (-14630, 'q'), (-14149, 'r'), (-14090, 's'), (-13318, 't'), (-12838, 'w'),
+    (-12556, 'x'), (-11847, 'y'), (-11055, 'z'),
+)
+_GB2312_CODES = [code for code, _ in _GB2312_INITIALS]
+_GB2312_LAST = -10247
+
+def _char_initial(char: str) -> str:
+    if char.isascii():
+        return char.lower() if char.isalnum() else ''
+    try:
+        encoded = char.encode('gb2312')
+    except UnicodeEncodeError:
+        return ''
+    if len(encoded) != 2:
+        return ''
+    code = encoded[0] * 256 + encoded[1] - 65536
+    if code < _GB2312_CODES[0] or code > _GB2312_LAST:
+        # 二级汉字不按拼音排序，无法推算
+        return ''
+    return _GB2312_INITIALS[bisect_left(_GB2312_CODES, code + 1) - 1][1]
+
+def pinyin_initials(name: str) -> str:
+    """姓名的拼音首字母，例如 张三 -> zs"""
+    if lazy_pinyin is not None:
+        return ''.join(lazy_pinyin(name, style=Style.FIRST_LETTER, errors='ignore')).lower()
+    return ''.join(_char_initial(char) for char in name)
+
+class SuggestIndex:
+    """内存前缀索引（线程安全）"""
+
+    FIELDS = ('student_id', 'name', 'initials')
+
+    def __init__(self, refresh_interval: Optional[float] = None):
+        self.refresh_interval = (Config.SUGGEST_REFRESH_INTERVAL
+                                 if refresh_interval is None else refresh_interval)
+        self._lock = threading.RLock()
+        # 首次加载只由一个线程读取数据库
+        self._load_lock = threading.Lock()
+        self._arrays = {field: [] for field in self.FIELDS}
+        self._students = {}
+        self._loaded_at = None
+        self._rebuilding = False
+        self._journal = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @staticmethod
+    def _keys(student_id: str, name: str) -> Dict[str, str]:
+        return {
+            'student_id': student_id.lower(),
+            'name': name.lower(),
+            'initials': pinyin_initials(name),
+        }
+
+    def load(self, students: Iterable[Mapping[str, Any]]) -> None:
+        """用完整的学生列表重建索引"""
+        arrays = {field: [] for field in self.FIELDS}
+        records = {}
+        for student in students:
+            student_id, name = student['student_id'], student['name']
+            keys = self._keys(student_id, name)
+            records[student_id] = (name, student.get('major'), keys)
+            for field, key in keys.items():
+                if key:
+                    arrays[field].append((key, student_id))
+        for array in arrays.values():
+            array.sort()
+
+        with self._lock:
+            self._arrays, self._students = arrays, records
+            self._loaded_at = time.monotonic()
+            # 重建期间本进程的写入在新索引上重放；之后的写入直接更新索引，不再记入日志
+            journal, self._journal = self._journal, []
+            for operation in journal:
+                operation()
+            self._rebuilding = False
+
+    def upsert(self, student: Mapping[str, Any]) -> None:
+        """新增或更新一个学生"""
+        with self._lock:
+            if self._rebuilding:
+                self._journal.append(lambda: self._upsert(student))
+            if self.loaded:
+                self._upsert(student)
+
+    def remove(self, student_id: str) -> None:
+        """删除一个学生"""
+        with self._lock:
+            if self._rebuilding:
+                self._journal.append(lambda: self._remove(student_id))
+            if self.loaded:
+                self._remove(student_id)
+
+    def invalidate(self) -> None:
+        """标记索引过期，下一次查询时在后台重建"""
+        with self._lock:
+            if self.loaded:
+                self._loaded_at = float('-inf')
+
+    def _upsert(self, student: Mapping[str, Any]) -> None:
+        student_id = student['student_id']
+        self._remove(student_id)
+        keys = self._keys(student_id, student['name'])
+        self._students[student_id] = (student['name'], student.get('major'), keys)
+        for field, key in keys.items():
+            if key:
+                insort(self._arrays[field], (key, student_id))
+
+    def _remove(self, student_id: str) -> None:
+        record = self._students.pop(student_id, None)
+        if record is None:
+            return
+        for field, key in record[2].items():
+            array = self._arrays[field]
+            position = bisect_left(array, (key, student_id))
+            if position < len(array) and array[position] == (key, student_id):
+                del array[position]
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """按前缀查找，学号匹配优先，其次姓名、拼音首字母"""
+        self._ensure_fresh()
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            for field in self.FIELDS:
+                array = self._arrays[field]
+                position = bisect_left(array, (prefix,))
+                while position < len(array) and len(results) < limit:
+                    key, student_id = array[position]
+                    if not key.startswith(prefix):
+                        break
+                    if student_id not in seen:
+                        seen.add(student_id)
+                        name, major, _ = self._students[student_id]
+                        results.append({'student_id': student_id, 'name': name, 'major': major})
+                    position += 1
+                if len(results) >= limit:
+                    break
+        return results
+
+    def _ensure_fresh(self) -> None:
+        """首次使用时同步加载，过期后在后台重建"""
+        if not self.loaded:
+            with self._load_lock:
+                if not self.loaded:
+                    with self._lock:
+                        self._rebuilding = True
+                    self._rebuild(raise_errors=True)
+            return
+        if time.monotonic() - self._loaded_at > (self.refresh_interval or float('inf')):
+            with self._lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            threading.Thread(target=self._rebuild, name='suggest-rebuild', daemon=True).start()
+
+    def _rebuild(self, raise_errors: bool = False) -> None:
+        """在不持有索引锁的情况下读取数据库并重建（调用方已设置 _rebuilding）"""
+        try:
+            self.load(self._fetch_students())
+        except Exception as e:
+            with self._lock:
+                self._journal = []
+                if raise_errors:
+                    raise
+                logger.error(f"联想索引重建失败: {e}")
+                # 稍后再试，不在每个请求上重复触发
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    @staticmethod
+    def _fetch_students() -> List[Dict[str, Any]]:
+        connection = acquire_read_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT student_id, name, major FROM students')
+                return list(cursor.fetchall())
+        finally:
+            connection.close()
+
+# 进程内共享的联想索引
+suggest_index = SuggestIndex()
+
+# 一次写入超过这么多行时不再逐条更新，改为后台重建
+BULK_CHANGE_THRESHOLD = 1000
+
+def record_changes(removed_ids: List[str], upserted: List[Mapping[str, Any]]) -> None:
+    """把一次已提交的写入应用到联想索引"""
+    if len(removed_ids) + len(upserted) > BULK_CHANGE_THRESHOLD:
+        suggest_index.invalidate()
+        return
+    for student_id in removed_ids:
+        suggest_index.remove(student_id)
+    for student in upserted:
+        suggest_index.upsert(student)
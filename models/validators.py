@@ -0,0 +1,109 @@
+# models/validators.py
+"""学生数据校验（表单添加/编辑和批量导入共用同一套规则）"""
+import re
+from typing import Any, Dict, Mapping, Optional
+
+PHONE_PATTERN = re.compile(r'^[\d\s\-+()]{7,20}$')
+GENDERS = ('男', '女', '其他')
+
+# 与 students 表的列宽一致（migrations/0001），超长的值在严格模式下会让整条语句失败
+STUDENT_ID_MAX_LENGTH = 20
+NAME_MAX_LENGTH = 50
+MAJOR_MAX_LENGTH = 100
+
+def validate_student_data(form_data: Mapping[str, Any], edit_mode: bool = False) -> Optional[str]:
+    """验证学生数据，返回错误信息，验证通过时返回 None"""
+    if not edit_mode and not form_data.get('student_id'):
+        return '学号不能为空'
+
+    if not edit_mode and len(form_data.get('student_id', '').strip()) < 3:
+        return '学号至少需要3个字符'
+
+    if not edit_mode and len(form_data.get('student_id', '').strip()) > STUDENT_ID_MAX_LENGTH:
+        return f'学号不能超过{STUDENT_ID_MAX_LENGTH}个字符'
+
+    if not form_data.get('name'):
+        return '姓名不能为空'
+
+    if len(form_data.get('name', '').strip()) < 2:
+        return '姓名至少需要2个字符'
+
+    if len(form_data.get('name', '').strip()) > NAME_MAX_LENGTH:
+        return f'姓名不能超过{NAME_MAX_LENGTH}个字符'
+
+    if not form_data.get('gender'):
+        return '请选择性别'
+
+    if form_data.get('gender') not in GENDERS:
+        return '性别只能是男、女或其他'
+
+    # 验证年龄
+    age = form_data.get('age')
+    if age:
+        try:
+            age_int = int(age)
+            if age_int < 1 or age_int > 150:
+                return '年龄必须在1-150之间'
+        except ValueError:
+            return '年龄必须是数字'
+
+    if len((form_data.get('major') or '').strip()) > MAJOR_MAX_LENGTH:
+        return f'专业不能超过{MAJOR_MAX_LENGTH}个字符'
+
+    # 验证电话（如果填写）
+    phone = form_data.get('phone')
+    if phone:
+        # 简单的电话验证
+        if not PHONE_PATTERN.match(phone.strip()):
+            return '电话号码格式不正确'
+
+    return None
+
+def build_student_data(form_data: Mapping[str, Any], edit_mode: bool = False) -> Dict[str, Any]:
+    """把已通过验证的表单数据整理成模型层使用的字典"""
+    student_data = {
+        'name': form_data['name'].strip(),
+        'gender': form_data['gender'],
+        'age': int(form_data['age']) if form_data.get('age') else None,
+        'major': (form_data.get('major') or '').strip() or None,
+        'phone': (form_data.get('phone') or '').strip() or None
+    }
+    if not edit_mode:
+        student_data = {'student_id': form_data['student_id'].strip(), **student_data}
+    return student_data
+
+def validate_batch_update(form_data: Mapping[str, Any]) -> Optional[str]:
+    """验证批量修改的字段（专业、性别、年龄增减至少填写一项），验证通过时返回 None"""
+    major = (form_data.get('major') or '').strip()
+    gender = form_data.get('gender')
+    age_delta = (form_data.get('age_delta') or '').strip()
+    if not major and not gender and not age_delta:
+        return '请至少填写一项要修改的内容'
+
+    if len(major) > MAJOR_MAX_LENGTH:
+        return f'专业不能超过{MAJOR_MAX_LENGTH}个字符'
+
+    if gender and gender not in GENDERS:
+        return '性别只能是男、女或其他'
+
+    if age_delta:
+        try:
+            delta = int(age_delta)
+        except ValueError:
+            return '年龄增减必须是整数'
+        if delta == 0 or abs(delta) > 149:
+            return '年龄增减必须在 -149 到 149 之间且不为 0'
+
+    return None
+
+def build_batch_update(form_data: Mapping[str, Any]) -> Dict[str, Any]:
+    """把已通过验证的批量修改表单整理成 StudentModel.update_students 使用的字典"""
+    changes = {}
+    major = (form_data.get('major') or '').strip()
+    if major:
+        changes['major'] = major
+    if form_data.get('gender'):
+        changes['gender'] = form_data['gender']
+    if (form_data.get('age_delta') or '').strip():
+        changes['age_delta'] = int(form_data['age_delta'])
+    return changes
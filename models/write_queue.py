@@ -0,0 +1,147 @@
+# models/write_queue.py
+"""合并写入队列（write-behind + group commit）
+
+并发请求的写入先放进进程内的队列，由一个后台写入线程取出：
+从第一条开始最多等待 max_delay 秒或凑满 max_batch 条，然后交给 flush 回调
+在同一个事务中用多行语句写入，只提交（fsync）一次。
+每个请求在 submit() 中等待自己那一条的结果（成功、学号重复等），与同步写入的接口一致。
+
+- 同一批中不会出现两条相同键的写入：遇到重复的键就提前结束本批，这一条留到下一批，
+  保证同一学号的写入按提交顺序执行；
+- 队列已满（超过 max_pending 条）时 submit() 返回 None，调用方改用同步写入；
+- 事务失败时整批的结果都是 WRITE_FAILED；等待超过 timeout 秒返回 WRITE_TIMEOUT
+  （此时这条写入仍可能在稍后完成）。
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from models.database import get_pool
+from models.metrics import WRITE_BATCH_ROWS, WRITE_QUEUE_RESULTS
+
+logger = logging.getLogger(__name__)
+
+# 每条写入的处理结果
+WRITE_OK = 'ok'
+WRITE_DUPLICATE = 'duplicate'
+WRITE_NOT_FOUND = 'not_found'
+WRITE_FAILED = 'error'
+WRITE_TIMEOUT = 'timeout'
+
+_STOP = object()
+
+class PendingWrite:
+    """队列中的一条写入，flush 回调把处理结果写到 result"""
+
+    __slots__ = ('operation', 'key', 'data', 'result', 'done')
+
+    def __init__(self, operation: str, key: Any, data: Any):
+        self.operation = operation
+        self.key = key
+        self.data = data
+        self.result = None
+        self.done = threading.Event()
+
+class WriteQueue:
+    """合并写入队列
+
+    flush(cursor, batch) 在写入线程的事务中处理一批 PendingWrite，为每一条设置 result；
+    它返回后事务提交，抛出异常时事务回滚。
+    """
+
+    def __init__(self, flush: Callable[[Any, List[PendingWrite]], None],
+                 max_batch: int = 200, max_delay: float = 0.005, max_pending: int = 5000,
+                 timeout: float = 5.0, name: str = 'write-queue'):
+        self._flush = flush
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0.0, max_delay)
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: str, key: Any, data: Any, timeout: Optional[float] = None) -> Optional[str]:
+        """提交一条写入并等待结果；队列已满或已关闭时返回 None（由调用方同步写入）"""
+        if self._closed:
+            return None
+        write = PendingWrite(operation, key, data)
+        try:
+            self._queue.put_nowait(write)
+        except queue.Full:
+            return None
+        if not write.done.wait(self.timeout if timeout is None else timeout):
+            logger.warning(f"写入队列等待超时: {operation} {key}")
+            return WRITE_TIMEOUT
+        return write.result
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """停止接收新的写入，写完已在队列中的写入后结束写入线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def pending(self) -> int:
+        """队列中等待写入的条数"""
+        return self._queue.qsize()
+
+    def _run(self):
+        carry, stopping = None, False
+        while True:
+            if carry is not None:
+                first, carry = carry, None
+            elif stopping:
+                # 已经关闭：写完队列中剩余的写入后退出
+                try:
+                    first = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+            else:
+                first = self._queue.get()
+            if first is _STOP:
+                stopping = True
+                continue
+
+            batch, keys = [first], {first.key}
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                if item.key in keys:
+                    carry = item
+                    break
+                batch.append(item)
+                keys.add(item.key)
+            self._write(batch)
+
+    def _write(self, batch: List[PendingWrite]) -> None:
+        try:
+            connection = get_pool().acquire()
+            try:
+                with connection.cursor() as cursor:
+                    self._flush(cursor, batch)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.close()
+        except Exception as e:
+            logger.error(f"写入队列提交 {len(batch)} 条写入失败: {e}")
+            for write in batch:
+                write.result = WRITE_FAILED
+        WRITE_BATCH_ROWS.observe(len(batch))
+        for write in batch:
+            if write.result is None:
+                write.result = WRITE_FAILED
+            WRITE_QUEUE_RESULTS.inc(1, write.operation, write.result)
+            write.done.set()
@@ -0,0 +1,26 @@
+-- sample_data.sql
+-- 示例数据（先执行 python migrate.py up 创建表结构）
+
+-- 插入示例数据
+INSERT INTO students (student_id, name, gender, age, major, phone) VALUES
+('2024001', '张三', '男', 20, '计算机科学', '13800138001'),
+('2024002', '李四', '女', 19, '软件工程', '13800138002'),
+('2024003', '王五', '男', 21, '人工智能', '13800138003'),
+('2024004', '赵六', '女', 20, '数据科学', '13800138004'),
+('2024005', '钱七', '男', 22, '计算机科学', '13800138005');
+
+-- 示例学生写入变更流（直接执行的 SQL 不经过模型层，迁移 0003 只为迁移时已有的学生补记录）
+INSERT INTO student_changes (student_id, operation) VALUES
+('2024001', 'upsert'),
+('2024002', 'upsert'),
+('2024003', 'upsert'),
+('2024004', 'upsert'),
+('2024005', 'upsert');
+
+-- 插入示例成绩
+INSERT INTO scores (student_id, course_name, score, credit, semester, exam_date) VALUES
+('2024001', '高等数学', 85.5, 4, '2024-2025-1', '2024-12-20'),
+('2024001', 'Python编程', 92.0, 3, '2024-2025-1', '2024-12-25'),
+('2024002', '高等数学', 78.0, 4, '2024-2025-1', '2024-12-20'),
+('2024003', '数据结构', 88.5, 4, '2024-2025-1', '2024-12-22'),
+('2024004', '数据库系统', 91.0, 3, '2024-2025-1', '2024-12-23');
@@ -0,0 +1,391 @@
+# server.py
+"""生产环境多进程服务（python app.py serve）
+
+开发服务器（app.run）一次只处理一个请求，一条慢查询就会挡住所有用户，也只能用到一个 CPU 核。
+serve 在主进程中创建应用、编译模板，然后预先 fork 出多个 worker 进程（共享内存中的代码和模板），
+所有 worker 从同一个监听套接字接受连接，每个 worker 用固定数量的线程处理请求：
+
+- 安装了 gunicorn 时使用 gunicorn（gthread worker），否则使用内置的 fork + werkzeug 实现，两者行为相同；
+- fork 之后每个 worker 丢弃继承的连接池、从库连接池、查询线程池和合并写入队列，按需重新创建
+  （见 init_worker），退出前写完合并写入队列、关闭连接池（见 close_worker）；
+- 统计校正线程只在一个 worker 中运行：抢到锁文件的 worker 负责，它退出后由其他 worker 接替；
+- 信号（发给主进程）：TERM / INT 平滑退出（停止接受新连接，等处理中的请求完成，最多 SERVER_GRACEFUL_TIMEOUT 秒），
+  QUIT 立即退出，HUP 平滑重启全部 worker（先启动新的 worker，再让旧的处理完后退出，期间不拒绝连接）；
+- worker 处理 SERVER_MAX_REQUESTS 个请求后（加上最多 SERVER_MAX_REQUESTS_JITTER 的随机数，避免同时重启）
+  平滑退出，由主进程补上新的 worker，防止内存缓慢增长。
+
+HUP 重启的 worker 从主进程 fork，仍然使用主进程启动时加载的代码和配置；更新代码或 .env 后需要重启主进程。
+"""
+import fcntl
+import logging
+import os
+import random
+import re
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from config import Config
+from models import database, executor, student_model
+from models.statistics import start_reconciler
+
+logger = logging.getLogger(__name__)
+
+# 内置实现的主进程检查 worker 状态的间隔（秒）
+MASTER_POLL_INTERVAL = 0.2
+# worker 启动后这么快就异常退出时，等待一下再补上，避免反复 fork
+CRASH_BACKOFF = 1.0
+# 主进程处理的信号
+MASTER_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGQUIT, signal.SIGHUP)
+# 抢不到校正任务锁的 worker 隔多久再试（秒）
+LEADER_RETRY_INTERVAL = 30
+
+def parse_bind(bind):
+    """解析 host:port（IPv6 写作 [::1]:8000），返回 (host, port)"""
+    match = re.fullmatch(r'\[?([^\[\]]*?)\]?:(\d+)', bind.strip())
+    if not match:
+        raise ValueError(f'监听地址格式应为 host:port: {bind}')
+    return match.group(1) or '0.0.0.0', int(match.group(2))
+
+def init_worker():
+    """fork 之后在 worker 进程中调用：丢弃继承的数据库连接、查询线程池和合并写入队列，之后按需重新创建；
+    启动本进程的数据库健康检查（每个 worker 有自己的熔断器）"""
+    database.reset_after_fork()
+    executor.reset_after_fork()
+    student_model.reset_after_fork()
+    database.start_health_monitor()
+
+def close_worker():
+    """worker 退出前调用：写完合并写入队列中的写入，关闭查询线程池和连接池"""
+    try:
+        student_model.close_write_queue(Config.SERVER_GRACEFUL_TIMEOUT)
+        executor.close_executor()
+        database.stop_health_monitor()
+        database.close_pool()
+    except Exception as e:
+        logger.error(f"worker {os.getpid()} 释放资源失败: {e}")
+
+_leader_lock_file = None
+
+def start_background_leader(bind, interval=None):
+    """在后台竞争校正任务锁，抢到锁的 worker 启动统计校正线程（锁随进程退出释放）"""
+    interval = Config.STATS_RECONCILE_INTERVAL if interval is None else interval
+    if not interval or interval <= 0:
+        return None
+    path = os.path.join(tempfile.gettempdir(), 'student-app-{}.lock'.format(re.sub(r'\W', '_', bind)))
+
+    def run():
+        global _leader_lock_file
+        handle = open(path, 'a')
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                time.sleep(min(interval, LEADER_RETRY_INTERVAL))
+        # 保持文件打开，锁一直持有到进程退出
+        _leader_lock_file = handle
+        logger.info(f"worker {os.getpid()} 负责统计校正")
+        start_reconciler(interval)
+
+    thread = threading.Thread(target=run, name='background-leader', daemon=True)
+    thread.start()
+    return thread
+
+class _WorkerRequestHandler(WSGIRequestHandler):
+    # 每个连接只处理一个请求：长连接会一直占用一个线程，客户端长连接由前面的反向代理（nginx）维持
+    protocol_version = 'HTTP/1.0'
+
+class WorkerServer(BaseWSGIServer):
+    """worker 进程内的 WSGI 服务：从继承的监听套接字接受连接，交给固定大小的线程池处理"""
+
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, app, listener, threads, max_requests=0):
+        host, port = listener.getsockname()[:2]
+        super().__init__(host, port, app, handler=_WorkerRequestHandler, fd=listener.fileno())
+        self.threads = max(1, threads)
+        self.max_requests = max_requests
+        self.handled = 0
+        self._slots = threading.BoundedSemaphore(self.threads)
+        self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix='http')
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def get_request(self):
+        # 监听套接字是非阻塞的（几个 worker 同时被唤醒时只有一个能 accept 成功），接受的连接恢复为阻塞
+        connection, address = self.socket.accept()
+        connection.setblocking(True)
+        return connection, address
+
+    def process_request(self, request, client_address):
+        # 线程都忙时不再 accept，新连接留在内核的队列里，由空闲的 worker 接受
+        self._slots.acquire()
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+            with self._lock:
+                self.handled += 1
+                recycle = bool(self.max_requests) and self.handled == self.max_requests
+            if recycle:
+                self.stop(f'已处理 {self.handled} 个请求')
+
+    def stop(self, reason):
+        """停止接受新连接（信号处理函数和请求线程中都可以调用）"""
+        with self._lock:
+            if self._stopping:
+                return
+            self._stopping = True
+        logger.info(f"worker {os.getpid()} 停止接受新连接: {reason}")
+        # shutdown() 会等待 serve_forever 返回，不能在运行 serve_forever 的线程中直接调用
+        threading.Thread(target=self.shutdown, name='worker-shutdown', daemon=True).start()
+
+    def drain(self, timeout):
+        """等待处理中的请求完成，超时返回 False"""
+        deadline = time.monotonic() + timeout
+        for _ in range(self.threads):
+            if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                return False
+        self._pool.shutdown(wait=False)
+        return True
+
+def _quit_worker(signum, frame):
+    """QUIT：不等处理中的请求，立即退出（默认处理方式会产生 core dump）"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
+
+def _run_worker(app, listener, threads, max_requests, graceful_timeout, bind):
+    """worker 进程的主函数，返回退出码"""
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGQUIT, _quit_worker)
+    init_worker()
+    server = WorkerServer(app, listener, threads, max_requests)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: server.stop(f'收到信号 {signal.Signals(signum).name}'))
+    # fork 前屏蔽的信号在装好 worker 自己的处理函数之后才递送
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+    start_background_leader(bind)
+    logger.info(f"worker {os.getpid()} 已启动（{server.threads} 个线程）")
+
+    server.serve_forever(poll_interval=0.5)
+    if not server.drain(graceful_timeout):
+        logger.warning(f"worker {os.getpid()} 等待处理中的请求超时（{graceful_timeout:g} 秒）")
+    close_worker()
+    logger.info(f"worker {os.getpid()} 退出，共处理 {server.handled} 个请求")
+    return 0
+
+class Arbiter:
+    """内置实现的主进程：维持 worker 数量，处理信号"""
+
+    def __init__(self, app, listener, bind, workers, threads, max_requests=0, max_requests_jitter=0,
+                 graceful_timeout=30.0):
+        self.app = app
+        self.listener = listener
+        self.bind = bind
+        self.size = workers
+        self.threads = threads
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}      # pid -> 启动时间
+        self.retiring = {}     # 正在平滑退出的 pid -> 强制结束的时间
+        self._signals = []
+        self._spawn_after = 0.0
+
+    def run(self):
+        for signum in MASTER_SIGNALS:
+            signal.signal(signum, self._on_signal)
+        logger.info(f"主进程 {os.getpid()} 监听 {self.bind}，{self.size} 个 worker × {self.threads} 个线程")
+        while True:
+            self._reap()
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum == signal.SIGHUP:
+                    self._reload()
+                else:
+                    return self._stop(graceful=signum != signal.SIGQUIT)
+            self._kill_overdue()
+            self._spawn_missing()
+            time.sleep(MASTER_POLL_INTERVAL)
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def _spawn_missing(self):
+        if time.monotonic() < self._spawn_after:
+            return
+        while len(self.workers) - len(self.retiring) < self.size:
+            self._spawn()
+
+    def _spawn(self):
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        # fork 之后、worker 装好自己的信号处理函数之前，子进程仍使用主进程的处理函数，
+        # 这期间收到的 TERM 会被丢掉；先屏蔽信号，由 worker 在装好处理函数后解除
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, MASTER_SIGNALS)
+        pid = None
+        try:
+            pid = os.fork()
+        finally:
+            if pid != 0:
+                signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(self.app, self.listener, self.threads, max_requests,
+                                   self.graceful_timeout, self.bind)
+            except BaseException:
+                logger.exception(f"worker {os.getpid()} 异常退出")
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                # 不执行从主进程继承的 atexit 回调
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            retired = self.retiring.pop(pid, None) is not None
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0 and not retired:
+                logger.error(f"worker {pid} 异常退出（退出码 {code}）")
+                if started is not None and time.monotonic() - started < CRASH_BACKOFF:
+                    self._spawn_after = time.monotonic() + CRASH_BACKOFF
+            elif not retired:
+                logger.info(f"worker {pid} 已退出，启动新的 worker")
+
+    def _reload(self):
+        """平滑重启：先启动一组新的 worker，再让旧的处理完请求后退出"""
+        old = [pid for pid in self.workers if pid not in self.retiring]
+        logger.info(f"收到 HUP，平滑重启 {len(old)} 个 worker")
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in old:
+            self.retiring[pid] = deadline
+        self._spawn_missing()
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+
+    def _kill_overdue(self):
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                logger.warning(f"worker {pid} 超过 {self.graceful_timeout:g} 秒仍未退出，强制结束")
+                self._signal(pid, signal.SIGKILL)
+                self.retiring[pid] = float('inf')
+
+    def _stop(self, graceful=True):
+        logger.info('平滑退出' if graceful else '立即退出')
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM if graceful else signal.SIGQUIT)
+        deadline = time.monotonic() + (self.graceful_timeout if graceful else 1.0)
+        while self.workers and time.monotonic() < deadline:
+            self.retiring.update({pid: deadline for pid in self.workers})
+            self._reap()
+            time.sleep(MASTER_POLL_INTERVAL)
+        for pid in list(self.workers):
+            logger.warning(f"worker {pid} 未能按时退出，强制结束")
+            self._signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.listener.close()
+        return 0
+
+    @staticmethod
+    def _signal(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+def _serve_builtin(app, bind, workers, threads, max_requests, max_requests_jitter, graceful_timeout):
+    host, port = parse_bind(bind)
+    listener = socket.create_server((host, port), family=socket.AF_INET6 if ':' in host else socket.AF_INET,
+                                    backlog=2048)
+    listener.setblocking(False)
+    arbiter = Arbiter(app, listener, bind, workers, threads, max_requests, max_requests_jitter, graceful_timeout)
+    return arbiter.run()
+
+def _serve_gunicorn(app, bind, workers, threads, max_requests, max_requests_jitter, graceful_timeout):
+    from gunicorn.app.base import BaseApplication
+
+    def post_fork(server, worker):
+        init_worker()
+        start_background_leader(bind)
+
+    def worker_exit(server, worker):
+        close_worker()
+
+    options = {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'max_requests': max_requests,
+        'max_requests_jitter': max_requests_jitter,
+        'graceful_timeout': graceful_timeout,
+        'preload_app': True,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
+    return 0
+
+def serve(app, bind=None, workers=None, threads=None, max_requests=None, max_requests_jitter=None,
+          graceful_timeout=None, engine='auto'):
+    """以多进程方式运行应用（参数默认取 SERVER_* 配置），返回退出码"""
+    if not hasattr(os, 'fork'):
+        logger.error("当前系统不支持 fork，请使用 python app.py 或 waitress 等服务器")
+        return 1
+    bind = bind or Config.SERVER_BIND
+    workers = workers or Config.SERVER_WORKERS or os.cpu_count() or 1
+    threads = threads or Config.SERVER_THREADS
+    max_requests = Config.SERVER_MAX_REQUESTS if max_requests is None else max_requests
+    max_requests_jitter = Config.SERVER_MAX_REQUESTS_JITTER if max_requests_jitter is None else max_requests_jitter
+    graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT if graceful_timeout is None else graceful_timeout
+
+    capacity = Config.MYSQL_POOL_MAX_SIZE + Config.MYSQL_POOL_MAX_OVERFLOW
+    if threads > capacity:
+        logger.warning(f"每个 worker 的线程数 {threads} 超过连接池容量 {capacity}，部分请求会等待连接")
+
+    if engine == 'auto':
+        try:
+            import gunicorn  # noqa: F401
+            engine = 'gunicorn'
+        except ImportError:
+            engine = 'builtin'
+    run = _serve_gunicorn if engine == 'gunicorn' else _serve_builtin
+    return run(app, bind, workers, threads, max_requests, max_requests_jitter, graceful_timeout)
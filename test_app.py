@@ -1,4 +1,8 @@
 # test_app.py
+import contextlib
+import os
+import threading
+import time
 import unittest
 import pymysql
 from config import Config
@@ -57,5 +61,1429 @@ class TestStudentModel(unittest.TestCase):
         student = StudentModel.get_student_by_id('TEST001')
         self.assertIsNone(student)
 
+class TestQueryPlans(unittest.TestCase):
+    """用 EXPLAIN 检查常用查询都能使用索引
+    
+    需要写入测试数据，只在专用的测试库中执行：设置 MYSQL_TEST_DB（不能与 MYSQL_DB 相同，
+    不存在时自动创建并执行迁移），没有设置或连接不上数据库时跳过。测试数据留在测试库中，下次直接复用。
+    """
+    
+    # 数据量太小时优化器可能直接选择全表扫描，先补齐一批测试数据
+    SCALE = 2000
+    
+    @classmethod
+    def setUpClass(cls):
+        from unittest import mock
+        from benchmarks import dataset
+        from models import database
+        test_db = os.getenv('MYSQL_TEST_DB')
+        if not test_db:
+            raise unittest.SkipTest('没有设置 MYSQL_TEST_DB（专用的测试库）')
+        if test_db == Config.MYSQL_DB:
+            raise unittest.SkipTest('MYSQL_TEST_DB 不能与 MYSQL_DB 相同')
+        
+        cls.patcher = mock.patch.multiple(Config, MYSQL_DB=test_db, MYSQL_REPLICAS='')
+        cls.patcher.start()
+        database.close_pool()
+        try:
+            connection = pymysql.connect(host=Config.MYSQL_HOST, port=Config.MYSQL_PORT, user=Config.MYSQL_USER,
+                                         password=Config.MYSQL_PASSWORD, charset='utf8mb4', connect_timeout=5)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'CREATE DATABASE IF NOT EXISTS `{test_db}` '
+                                   'DEFAULT CHARSET utf8mb4 COLLATE utf8mb4_unicode_ci')
+            finally:
+                connection.close()
+            dataset.build(cls.SCALE, courses=2, semesters=1)
+        except pymysql.Error as e:
+            cls.tearDownClass()
+            raise unittest.SkipTest(f'数据库不可用: {e}')
+    
+    @classmethod
+    def tearDownClass(cls):
+        from models import database
+        database.close_pool()
+        cls.patcher.stop()
+    
+    def _record_queries(self, run):
+        """执行 run()，返回期间执行的 (SQL, 参数) 列表"""
+        from unittest import mock
+        from models.metrics import InstrumentedCursorMixin
+        original = InstrumentedCursorMixin.execute
+        queries = []
+        
+        def execute(cursor, query, args=None):
+            queries.append((query, args))
+            return original(cursor, query, args)
+        
+        with mock.patch.object(InstrumentedCursorMixin, 'execute', execute):
+            run()
+        return queries
+    
+    def test_hot_queries_use_indexes(self):
+        """列表各排序方式（含翻页）、按学号查询、统计聚合、成绩查询都不做全表扫描"""
+        from benchmarks.dataset import student_id
+        from models.database import get_pool
+        from models.pagination import SORTABLE_COLUMNS
+        from models.score_model import ScoreModel
+        from models.statistics import StatisticsModel
+        
+        def run():
+            for sort in SORTABLE_COLUMNS:
+                for order in ('asc', 'desc'):
+                    page = StudentModel.get_students_page(sort, order, limit=20)
+                    StudentModel.get_students_page(sort, order, after=page['next_cursor'], limit=20)
+            StudentModel.get_student_by_id(student_id(1))
+            StudentModel.check_student_exists(student_id(1))
+            ScoreModel.get_transcript(student_id(1))
+            ScoreModel.get_gpa_map([student_id(1), student_id(2)])
+            connection = get_pool().acquire()
+            try:
+                with connection.cursor() as cursor:
+                    StatisticsModel.compute_actual(cursor)
+            finally:
+                connection.close()
+        
+        queries = [(sql, args) for sql, args in self._record_queries(run)
+                   if sql.lstrip().upper().startswith('SELECT')]
+        self.assertGreater(len(queries), len(SORTABLE_COLUMNS) * 2)
+        
+        connection = get_pool().acquire()
+        try:
+            with connection.cursor() as cursor:
+                for sql, args in queries:
+                    cursor.execute('EXPLAIN ' + sql, args)
+                    full_scans = [row['table'] for row in cursor.fetchall()
+                                  if row['type'] == 'ALL' and row['table'] in ('students', 'scores')]
+                    self.assertEqual(full_scans, [], f'全表扫描: {" ".join(sql.split())}')
+        finally:
+            connection.close()
+
+class _FakeConnection:
+    """连接池测试用的假连接"""
+    
+    def __init__(self):
+        self.server_status = 0
+        self.closed = False
+        self.pings = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.queries = []
+    
+    def ping(self, reconnect=False):
+        self.pings += 1
+    
+    def query(self, sql):
+        self.queries.append(sql)
+    
+    def commit(self):
+        self.commits += 1
+        self.server_status = 0
+    
+    def rollback(self):
+        self.rollbacks += 1
+        self.server_status = 0
+    
+    def close(self):
+        self.closed = True
+
+class TestConnectionPool(unittest.TestCase):
+    """测试连接池（不需要数据库）"""
+    
+    def _make_pool(self, **kwargs):
+        from models.database import ConnectionPool
+        self.created = []
+        
+        def connect():
+            conn = _FakeConnection()
+            self.created.append(conn)
+            return conn
+        
+        return ConnectionPool(connect, **kwargs)
+    
+    def test_connection_is_reused(self):
+        """归还的连接会被再次借出"""
+        pool = self._make_pool(min_size=0, max_size=2)
+        conn = pool.acquire()
+        conn.close()
+        conn = pool.acquire()
+        conn.close()
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+    
+    def test_overflow_connections_are_closed(self):
+        """超出 max_size 的临时连接归还时关闭"""
+        pool = self._make_pool(min_size=0, max_size=1, max_overflow=1)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertEqual(pool.stats()['overflow'], 1)
+        second.close()
+        first.close()
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(sum(c.closed for c in self.created), 1)
+    
+    def test_checkout_timeout(self):
+        """连接耗尽时等待超时"""
+        from models.database import PoolTimeoutError
+        pool = self._make_pool(min_size=0, max_size=1, max_overflow=0, timeout=0.05)
+        conn = pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+        conn.close()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+    
+    def test_open_transaction_rolled_back_on_release(self):
+        """归还时回滚未提交的事务"""
+        from pymysql.constants import SERVER_STATUS
+        pool = self._make_pool(min_size=0, max_size=1)
+        conn = pool.acquire()
+        self.created[0].server_status = SERVER_STATUS.SERVER_STATUS_IN_TRANS
+        conn.close()
+        self.assertEqual(self.created[0].server_status, 0)
+    
+    def test_stale_connection_is_recycled(self):
+        """超过存活时间的连接在借出时重建"""
+        pool = self._make_pool(min_size=0, max_size=1, recycle=1)
+        conn = pool.acquire()
+        conn.close()
+        pool._idle[0].created_at -= 10
+        conn = pool.acquire()
+        conn.close()
+        self.assertEqual(len(self.created), 2)
+        self.assertTrue(self.created[0].closed)
+        self.assertEqual(pool.stats()['recycled'], 1)
+
+class TestCircuitBreaker(unittest.TestCase):
+    """测试主库熔断器与健康检查（不需要数据库）"""
+
+    def test_open_half_open_closed(self):
+        """连续失败后打开并直接失败，半开时只放行一个试探请求，成功后关闭"""
+        from models.database import (BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN,
+                                     CircuitBreaker, ConnectionPool, DatabaseUnavailableError)
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) <= 2:
+                raise pymysql.err.OperationalError(2003, "Can't connect")
+            return _FakeConnection()
+
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        pool = ConnectionPool(connect, min_size=0, max_size=1, breaker=breaker)
+        for _ in range(2):
+            with self.assertRaises(pymysql.err.OperationalError):
+                pool.acquire()
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+        with self.assertRaises(DatabaseUnavailableError):
+            pool.acquire()
+        self.assertEqual(len(attempts), 2)
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, BREAKER_HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker._trial_until = 0.0
+        pool.acquire().close()
+        self.assertEqual(breaker.state, BREAKER_CLOSED)
+        self.assertEqual(breaker.stats()['failures'], 0)
+
+    def test_health_probe(self):
+        """健康检查记录耗时，失败时关闭专用连接、下一次重新建立，成功时关闭熔断器"""
+        from models.database import BREAKER_CLOSED, BREAKER_OPEN, CircuitBreaker, HealthMonitor
+
+        class ProbeConnection(_FakeConnection):
+            fail = False
+
+            def autocommit(self, value):
+                pass
+
+            def cursor(self):
+                connection = self
+
+                class Cursor:
+                    def __enter__(self):
+                        return self
+
+                    def __exit__(self, *exc):
+                        return False
+
+                    def execute(self, query):
+                        if connection.fail:
+                            raise pymysql.err.OperationalError(2013, 'Lost connection')
+
+                    def fetchone(self):
+                        return (1,)
+
+                return Cursor()
+
+        connections = []
+
+        def connect():
+            connections.append(ProbeConnection())
+            return connections[-1]
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        monitor = HealthMonitor(breaker, connect, 0)
+        self.assertTrue(monitor.probe())
+        connections[0].fail = True
+        self.assertFalse(monitor.probe())
+        self.assertTrue(connections[0].closed)
+        self.assertEqual(breaker.state, BREAKER_OPEN)
+        self.assertFalse(breaker.stats()['probe_ok'])
+
+        self.assertTrue(monitor.probe())
+        self.assertEqual(len(connections), 2)
+        stats = breaker.stats()
+        self.assertEqual((stats['state'], stats['probe_ok']), (BREAKER_CLOSED, True))
+        self.assertIsNotNone(stats['probe_latency_ms'])
+        monitor.stop()
+        self.assertTrue(connections[1].closed)
+
+class TestUnitOfWork(unittest.TestCase):
+    """测试请求级工作单元（不需要数据库）"""
+    
+    def setUp(self):
+        from flask import Flask
+        from controllers import transaction
+        from models import database
+        self.database = database
+        self.transaction = transaction
+        self.created = []
+        
+        def connect():
+            conn = _FakeConnection()
+            self.created.append(conn)
+            return conn
+        
+        self._old_pool = database._pool
+        database._pool = database.ConnectionPool(connect, min_size=0, max_size=2)
+        self.app = Flask(__name__)
+        database.init_app(self.app)
+        transaction.init_app(self.app)
+    
+    def tearDown(self):
+        self.database._pool = self._old_pool
+    
+    def test_request_shares_one_connection(self):
+        """一个请求内多次获取连接只借出一条，请求结束时统一提交"""
+        with self.app.app_context():
+            first = self.database.get_db_connection()
+            first.commit()
+            first.close()
+            second = self.database.get_db_connection()
+            second.close()
+            self.assertEqual(len(self.created), 1)
+            self.assertEqual(self.created[0].commits, 0)
+        self.assertEqual(self.created[0].commits, 1)
+        self.assertEqual(self.database.get_pool_stats()['in_use'], 0)
+    
+    def test_request_error_rolls_back(self):
+        """请求出错时回滚"""
+        with self.assertRaises(RuntimeError):
+            with self.app.app_context():
+                self.database.get_db_connection()
+                raise RuntimeError('boom')
+        self.assertEqual(self.created[0].commits, 0)
+        self.assertEqual(self.created[0].rollbacks, 1)
+
+    def test_commit_failure_replaces_success_flash(self):
+        """响应发出前提交；提交失败时撤回成功提示，改为错误提示"""
+        from flask import flash, get_flashed_messages, redirect
+        self.app.secret_key = 'test'
+
+        @self.app.route('/save')
+        def save():
+            connection = self.database.get_db_connection()
+            connection.commit()
+            flash('添加成功', 'success')
+            return redirect('/done')
+
+        @self.app.route('/done')
+        def done():
+            return '|'.join(get_flashed_messages())
+
+        client = self.app.test_client()
+        client.get('/save')
+        self.assertEqual(self.created[0].commits, 1)
+        self.assertEqual(client.get('/done').get_data(as_text=True), '添加成功')
+
+        def fail():
+            raise pymysql.err.OperationalError(1213, 'Deadlock found')
+        self.created[0].commit = fail
+        self.assertEqual(client.get('/save').status_code, 302)
+        self.assertEqual(client.get('/done').get_data(as_text=True), self.transaction.COMMIT_FAILED_MESSAGE)
+        self.assertEqual(self.database.get_pool_stats()['in_use'], 0)
+
+    def test_rollback_keeps_earlier_writes(self):
+        """已有写入之后的回滚只回滚到保存点"""
+        with self.app.app_context():
+            first = self.database.get_db_connection()
+            first.commit()
+            second = self.database.get_db_connection()
+            second.rollback()
+        self.assertEqual(self.created[0].queries, ['SAVEPOINT uow_1', 'ROLLBACK TO SAVEPOINT uow_1'])
+        self.assertEqual((self.created[0].rollbacks, self.created[0].commits), (0, 1))
+
+    def test_no_unit_of_work_after_commit(self):
+        """请求事务提交之后，迟到的并发查询不再创建工作单元，借出的连接由自己归还"""
+        from flask import g
+        with self.app.test_request_context('/'):
+            self.app.preprocess_request()
+            self.database.get_db_connection().commit()
+            self.database.commit_unit_of_work(200)
+            self.assertEqual(self.created[0].commits, 1)
+            self.assertIsNone(self.database._get_unit_of_work())
+            late = self.database.get_db_connection()
+            self.assertNotIn('_unit_of_work', g)
+            late.close()
+            self.assertEqual(self.database.get_pool_stats()['in_use'], 0)
+
+    def test_rollback_to_savepoint_drops_callbacks(self):
+        """回滚到保存点时丢弃之后登记的提交后回调，保留之前登记的"""
+        ran = []
+        with self.app.app_context():
+            first = self.database.get_db_connection()
+            self.database.after_commit(first, lambda: ran.append('first'))
+            first.commit()
+            second = self.database.get_db_connection()
+            self.database.after_commit(second, lambda: ran.append('second'))
+            second.rollback()
+        self.assertEqual(ran, ['first'])
+
+class TestReadReplicas(unittest.TestCase):
+    """测试读写分离与从库故障回退（不需要数据库）"""
+    
+    def setUp(self):
+        from unittest import mock
+        from models import database
+        self.database = database
+        self.lags = {}
+        self.down = set()
+        
+        def make_pool(name):
+            def connect():
+                if name in self.down:
+                    raise pymysql.err.OperationalError(2003, f'无法连接 {name}')
+                conn = _FakeConnection()
+                conn.name = name
+                return conn
+            return database.ConnectionPool(connect, min_size=0, max_size=2)
+        
+        self.make_pool = make_pool
+        patcher = mock.patch.object(database, 'replication_lag',
+                                    side_effect=lambda conn: self.lags.get(conn.name, 0.0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def _acquire_names(self, replicas, times):
+        names = []
+        for _ in range(times):
+            conn = replicas.acquire()
+            names.append(conn.name if conn is not None else None)
+            if conn is not None:
+                conn.close()
+        return names
+    
+    def test_round_robin_and_fallback(self):
+        """轮询可用的从库，跳过连接失败和延迟过大的从库，全部不可用时返回 None"""
+        replicas = self.database.ReplicaSet({name: self.make_pool(name) for name in ('a', 'b', 'c')},
+                                            max_lag=5, check_interval=60, retry_interval=60)
+        self.assertEqual(sorted(self._acquire_names(replicas, 3)), ['a', 'b', 'c'])
+        
+        replicas = self.database.ReplicaSet({name: self.make_pool(name) for name in ('a', 'b', 'c')},
+                                            max_lag=5, check_interval=60, retry_interval=60)
+        self.down.add('b')
+        self.lags['c'] = 30.0
+        self.assertEqual(self._acquire_names(replicas, 4), ['a'] * 4)
+        stats = {replica['name']: replica for replica in replicas.stats()}
+        self.assertFalse(stats['b']['up'])
+        self.assertTrue(stats['c']['lagging'])
+        
+        self.down.add('a')
+        replicas = self.database.ReplicaSet({name: self.make_pool(name) for name in ('a', 'b', 'c')})
+        self.assertEqual(self._acquire_names(replicas, 1), [None])
+    
+    def test_reads_follow_own_writes(self):
+        """请求写入后，本请求和本会话随后的只读查询走主库；工作线程不共用请求的连接"""
+        import contextvars
+        import threading
+        from flask import Flask
+        database = self.database
+        primary = database.ConnectionPool(self.make_pool('primary')._connect, min_size=0, max_size=4)
+        old_pool, old_replicas = database._pool, database._replicas
+        database._pool = primary
+        database._replicas = database.ReplicaSet({'replica': self.make_pool('replica')})
+        self.addCleanup(setattr, database, '_pool', old_pool)
+        self.addCleanup(setattr, database, '_replicas', old_replicas)
+        
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        database.init_app(app)
+        
+        with app.test_request_context('/'):
+            app.preprocess_request()
+            self.assertEqual(database.get_read_connection().name, 'replica')
+            
+            # 并发查询的工作线程继承了应用上下文，但从连接池借出自己的连接
+            shared = database.get_db_connection()
+            result = {}
+            context = contextvars.copy_context()
+            worker = threading.Thread(target=lambda: result.update(conn=context.run(database.get_db_connection)))
+            worker.start()
+            worker.join()
+            self.assertIsNot(result['conn']._raw_connection, shared._raw_connection)
+            result['conn'].close()
+            
+            shared.commit()
+            conn = database.get_read_connection()
+            self.assertEqual(conn.name, 'primary')
+            self.assertIs(conn._raw_connection, shared._raw_connection)
+            from flask import session
+            self.assertIn(database._PRIMARY_UNTIL_KEY, session)
+
+class TestPagination(unittest.TestCase):
+    """测试键集分页工具（不需要数据库）"""
+    
+    def test_cursor_round_trip(self):
+        """游标可以还原排序值和学号"""
+        from models.pagination import encode_cursor, decode_cursor
+        cursor = encode_cursor({'student_id': '2024001', 'name': '张三'}, 'name')
+        self.assertEqual(decode_cursor(cursor), ('张三', '2024001'))
+    
+    def test_invalid_cursor(self):
+        """非法游标抛出 ValueError"""
+        from models.pagination import decode_cursor
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+    
+    def test_nullable_column_condition(self):
+        """可为空的列在降序翻页时包含 NULL 组"""
+        from models.pagination import keyset_condition
+        condition, params = keyset_condition('age', 20, '2024001', ascending=False)
+        self.assertIn('age IS NULL', condition)
+        self.assertEqual(params, [20, 20, '2024001'])
+
+class TestStudentImportParsing(unittest.TestCase):
+    """测试导入文件解析（不需要数据库）"""
+    
+    def test_csv_with_chinese_header(self):
+        """支持导出文件中的中文表头和 BOM，跳过空行"""
+        import io
+        from models.student_import import iter_csv_records
+        data = '\ufeff学号,姓名,性别,年龄\n2024001,张三,男,20\n,,,\n2024002,李四,女,\n'.encode('utf-8')
+        records = list(iter_csv_records(io.BytesIO(data)))
+        self.assertEqual([line_no for line_no, _ in records], [2, 4])
+        self.assertEqual(records[0][1], {'student_id': '2024001', 'name': '张三', 'gender': '男', 'age': '20'})
+    
+    def test_missing_required_column(self):
+        """缺少必要的列时报错"""
+        import io
+        from models.student_import import iter_csv_records, ImportFormatError
+        with self.assertRaises(ImportFormatError):
+            list(iter_csv_records(io.BytesIO('学号,姓名\n2024001,张三\n'.encode('utf-8'))))
+
+    def test_only_integrity_errors_retry_row_by_row(self):
+        """唯一约束冲突逐行重试；死锁等其他错误中断导入，不继续写入"""
+        from unittest import mock
+        from models import student_import
+        records = [(2, {'student_id': '2024001', 'name': '张三', 'gender': '男'}),
+                   (3, {'student_id': '2024002', 'name': '李四', 'gender': '女'})]
+        connection = mock.MagicMock()
+
+        def run(insert_many):
+            with mock.patch.object(student_import, 'get_pool') as get_pool, \
+                    mock.patch.object(StudentModel, 'find_existing_ids', return_value=set()), \
+                    mock.patch.object(StudentModel, 'insert_many', side_effect=insert_many):
+                get_pool.return_value.acquire.return_value = connection
+                return student_import.StudentImporter().import_records(iter(records))
+
+        def duplicate(cursor, students):
+            if len(students) > 1 or students[0]['student_id'] == '2024002':
+                raise pymysql.err.IntegrityError(1062, 'Duplicate entry')
+        report = run(duplicate)
+        self.assertEqual((report['inserted'], report['failed']), (1, 1))
+
+        calls = []
+
+        def deadlock(cursor, students):
+            calls.append(len(students))
+            raise pymysql.err.OperationalError(1213, 'Deadlock found')
+        with self.assertRaises(student_import.ImportAbortedError):
+            run(deadlock)
+        self.assertEqual(calls, [2])
+        connection.rollback.assert_called()
+
+    def test_overlong_values_fail_per_row(self):
+        """超过列宽的值在校验阶段按行报错，不会让数据库语句失败而中断导入"""
+        from unittest import mock
+        from models import student_import
+        records = [(2, {'student_id': '2024001', 'name': '张' * 51, 'gender': '男'}),
+                   (3, {'student_id': '2' * 21, 'name': '李四', 'gender': '女'}),
+                   (4, {'student_id': '2024003', 'name': '王五', 'gender': '男', 'major': '专' * 101}),
+                   (5, {'student_id': '2024004', 'name': '赵六', 'gender': '女'})]
+        inserted = []
+        with mock.patch.object(student_import, 'get_pool'), \
+                mock.patch.object(StudentModel, 'find_existing_ids', return_value=set()), \
+                mock.patch.object(StudentModel, 'insert_many',
+                                  side_effect=lambda cursor, students: inserted.extend(students)):
+            report = student_import.StudentImporter().import_records(iter(records))
+        self.assertEqual((report['inserted'], report['failed']), (1, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3, 4])
+        self.assertEqual([student['student_id'] for student in inserted], ['2024004'])
+
+class TestStatistics(unittest.TestCase):
+    """测试统计汇总的增量计算（不需要数据库）"""
+    
+    def test_update_delta(self):
+        """修改专业和年龄只调整对应的计数器"""
+        from models.statistics import StatisticsModel
+        before = [{'gender': '男', 'age': 20, 'major': '软件工程'}]
+        after = [{'gender': '男', 'age': 21, 'major': '人工智能'}]
+        self.assertEqual(StatisticsModel.compute_delta(before, after), {
+            ('major', '软件工程'): -1, ('major', '人工智能'): 1,
+            ('age', '20'): -1, ('age', '21'): 1
+        })
+    
+    def test_summarize(self):
+        """汇总表的计数器还原为首页统计结构"""
+        from models.statistics import StatisticsModel
+        rows = [
+            {'dimension': 'total', 'bucket': '', 'count': 3},
+            {'dimension': 'gender', 'bucket': '男', 'count': 2},
+            {'dimension': 'gender', 'bucket': '女', 'count': 1},
+            {'dimension': 'major', 'bucket': '软件工程', 'count': 0},
+            {'dimension': 'age', 'bucket': '19', 'count': 1},
+            {'dimension': 'age', 'bucket': '22', 'count': 1},
+        ]
+        stats = StatisticsModel._summarize(rows)
+        self.assertEqual(stats['total_students'], 3)
+        self.assertEqual(stats['major_distribution'], [])
+        self.assertEqual(stats['age_stats'], {'avg_age': 20.5, 'min_age': 19, 'max_age': 22})
+
+class _FakeSearchCursor:
+    """按 SQL 内容返回预设结果的假游标"""
+    
+    def __init__(self, prefix_rows, fulltext_rows):
+        self.prefix_rows = prefix_rows
+        self.fulltext_rows = fulltext_rows
+        self.queries = []
+        self.params = []
+        self._result = []
+    
+    def execute(self, query, params=None):
+        self.queries.append(query)
+        self.params.append(tuple(params or ()))
+        if 'information_schema' in query:
+            self._result = [{'count': 1}]
+        elif 'MATCH' in query:
+            self._result = [dict(row) for row in self.fulltext_rows]
+        else:
+            self._result = [dict(row) for row in self.prefix_rows]
+    
+    def fetchone(self):
+        return self._result[0]
+    
+    def fetchall(self):
+        return self._result
+
+class TestStudentSearch(unittest.TestCase):
+    """测试搜索结果合并与排序（不需要数据库）"""
+    
+    def setUp(self):
+        from models.search import StudentSearch
+        self.StudentSearch = StudentSearch
+        StudentSearch.fulltext_available = None
+    
+    def tearDown(self):
+        self.StudentSearch.fulltext_available = None
+    
+    def test_exact_id_ranks_first(self):
+        """学号完全匹配排在最前，其后按全文相关度排序，结果去重"""
+        cursor = _FakeSearchCursor(
+            prefix_rows=[{'student_id': '2024001'}, {'student_id': '20240010'}],
+            fulltext_rows=[{'student_id': 'A1', 'relevance': 0.5},
+                           {'student_id': '2024001', 'relevance': 3.0},
+                           {'student_id': 'A2', 'relevance': 1.5}]
+        )
+        results = self.StudentSearch.search(cursor, '2024001', limit=10)
+        self.assertEqual([row['student_id'] for row in results], ['2024001', '20240010', 'A2', 'A1'])
+    
+    def test_short_keyword_matches_substring(self):
+        """单字关键词不使用全文索引，仍在学号、姓名、专业中按子串匹配（与导出等使用的条件一致）"""
+        cursor = _FakeSearchCursor(prefix_rows=[], fulltext_rows=[])
+        self.StudentSearch.search(cursor, '张', limit=10)
+        self.assertFalse(any('MATCH' in query for query in cursor.queries))
+        condition, params = self.StudentSearch.conditions('张')
+        self.assertEqual(params, ['%张%', '%张%', '%张%'])
+        self.assertTrue(any(condition in query for query in cursor.queries))
+        self.assertIn(('张%', *params, 10), cursor.params)
+
+class TestSuggestIndex(unittest.TestCase):
+    """测试搜索联想的内存前缀索引（不需要数据库）"""
+    
+    def setUp(self):
+        from models.suggest import SuggestIndex
+        self.index = SuggestIndex(refresh_interval=0)
+        self.index.load([
+            {'student_id': '2024001', 'name': '张三', 'major': '计算机科学'},
+            {'student_id': '2024002', 'name': '李四', 'major': '数学'},
+            {'student_id': '2023001', 'name': '张伟', 'major': None},
+        ])
+    
+    def test_pinyin_initials(self):
+        """拼音首字母（未安装 pypinyin 时按 GB2312 编码推算）"""
+        from models.suggest import _char_initial, pinyin_initials
+        self.assertEqual(''.join(_char_initial(char) for char in '张三'), 'zs')
+        self.assertEqual(pinyin_initials('李四'), 'ls')
+    
+    def test_first_load_does_not_hold_lock(self):
+        """首次加载读取数据库时不持有索引锁，期间其他线程提交的写入在新索引上重放"""
+        from models.suggest import SuggestIndex
+        index = SuggestIndex(refresh_interval=0)
+        
+        def fetch():
+            writer = threading.Thread(target=index.upsert, args=({'student_id': '2024009', 'name': '王五'},))
+            writer.start()
+            writer.join(timeout=5)
+            self.assertFalse(writer.is_alive())
+            return [{'student_id': '2024001', 'name': '张三', 'major': None}]
+        
+        index._fetch_students = fetch
+        self.assertEqual([item['student_id'] for item in index.suggest('2024')], ['2024001', '2024009'])
+        self.assertEqual(index._journal, [])
+    
+    def test_prefix_lookup(self):
+        """按学号、姓名、拼音首字母前缀查找，学号匹配优先"""
+        ids = lambda results: [item['student_id'] for item in results]
+        self.assertEqual(ids(self.index.suggest('2024')), ['2024001', '2024002'])
+        self.assertEqual(ids(self.index.suggest('张')), ['2024001', '2023001'])
+        self.assertEqual(ids(self.index.suggest('ZS')), ['2024001'])
+        self.assertEqual(ids(self.index.suggest('20', limit=1)), ['2023001'])
+    
+    def test_incremental_changes(self):
+        """增删改后立即生效"""
+        self.index.upsert({'student_id': '2024002', 'name': '王五', 'major': '数学'})
+        self.index.remove('2024001')
+        self.assertEqual(self.index.suggest('李'), [])
+        self.assertEqual(self.index.suggest('ww'), [{'student_id': '2024002', 'name': '王五', 'major': '数学'}])
+        self.assertEqual(self.index.suggest('zs'), [])
+
+class _FakeBatchCursor:
+    """记录批量操作执行的语句，FOR UPDATE 查询返回预置的学生"""
+    
+    def __init__(self, students):
+        self.students = students
+        self.statements = []
+        self.connection = _FakeConnection()
+        self.rowcount = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), list(params or [])))
+        if 'FOR UPDATE' in query:
+            self._result = [dict(s) for s in self.students if s['student_id'] in (params or [])]
+        self.rowcount = len([p for p in params or [] if isinstance(p, str) and p.startswith('S')])
+        return self.rowcount
+    
+    def executemany(self, query, rows):
+        self.statements.append((' '.join(query.split()), list(rows)))
+        self.rowcount = len(rows)
+    
+    def fetchall(self):
+        return self._result
+
+class TestBatchOperations(unittest.TestCase):
+    """测试批量删除、修改的分块执行（不需要数据库）"""
+    
+    def setUp(self):
+        from unittest import mock
+        self.students = [{'student_id': f'S{i:03d}', 'name': '学生', 'gender': '男', 'age': 20, 'major': '数学'}
+                         for i in range(5)]
+        self.cursor = _FakeBatchCursor(self.students)
+        self.cursor.connection.cursor = lambda *args: self.cursor
+        patcher = mock.patch('models.student_model.get_db_connection', return_value=self.cursor.connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        chunk = mock.patch.object(Config, 'BATCH_CHUNK_SIZE', 2)
+        chunk.start()
+        self.addCleanup(chunk.stop)
+    
+    def test_delete_in_chunks(self):
+        """按学号删除：分块 IN 语句、一次提交"""
+        summary = StudentModel.delete_students(['S004', 'S000', 'S001', 'S003', 'S002', 'S000'])
+        deletes = [params for query, params in self.cursor.statements if query.startswith('DELETE FROM students')]
+        self.assertEqual(deletes, [['S000', 'S001'], ['S002', 'S003'], ['S004']])
+        self.assertEqual(summary['matched'], 5)
+        self.assertEqual(summary['deleted'], 5)
+        self.assertEqual(self.cursor.connection.commits, 1)
+    
+    def test_delete_student_uses_delete_rowcount(self):
+        """删除单个学生的结果取 DELETE 语句的影响行数，而不是之后写统计、变更记录的语句"""
+        self.assertTrue(StudentModel.delete_student('S001'))
+        self.assertTrue(any(query.startswith('INSERT INTO student_changes') for query, _ in self.cursor.statements))
+        
+        self.cursor.statements.clear()
+        execute = self.cursor.execute
+        self.cursor.execute = lambda query, params=None: 0 if query.startswith('DELETE') else execute(query, params)
+        self.assertFalse(StudentModel.delete_student('S002'))
+        self.assertFalse(any(query.startswith('INSERT INTO student_changes') for query, _ in self.cursor.statements))
+    
+    def test_update_validates_age_range(self):
+        """年龄调整超出范围时整批回滚"""
+        from models.validators import validate_batch_update, build_batch_update
+        self.assertIsNotNone(validate_batch_update({}))
+        self.assertEqual(build_batch_update({'major': ' 物理 ', 'age_delta': '1'}), {'major': '物理', 'age_delta': 1})
+        with self.assertRaises(ValueError):
+            StudentModel.update_students({'age_delta': 140}, ['S000'])
+        self.assertEqual(self.cursor.connection.commits, 0)
+        self.assertEqual(self.cursor.connection.rollbacks, 1)
+    
+    def test_version_bumped_after_commit(self):
+        """批量删除在同一事务中为每个学生追加 delete 变更；数据版本在提交之后用单独的语句加 1，且只加一次"""
+        from models import database
+        from models.statistics import VERSION_KEY
+        StudentModel.delete_students(['S001', 'S002'])
+        changes = [params for query, params in self.cursor.statements if query.startswith('INSERT INTO student_changes')]
+        self.assertEqual(changes, [[('S001', 'delete'), ('S002', 'delete')]])
+        stats = [row for query, params in self.cursor.statements
+                 if query.startswith('INSERT INTO student_stats') for row in params]
+        self.assertNotIn(VERSION_KEY, [row[:2] for row in stats])
+        
+        # 假连接提交时不执行回调：两次写入登记的是同一个回调对象，只执行一次
+        StudentModel.delete_students(['S003'])
+        self.cursor.statements.clear()
+        database._run_after_commit(self.cursor.connection)
+        self.assertEqual([(query.split()[2], params) for query, params in self.cursor.statements],
+                         [('student_stats', [*VERSION_KEY, 1])])
+        self.assertEqual(self.cursor.connection.commits, 3)
+
+class TestChangeFeed(unittest.TestCase):
+    """测试变更流的游标和分页压缩（不需要数据库）"""
+    
+    def test_cursor_and_page_compaction(self):
+        """同一学生在一页中只返回最后一次变更；学生已不存在时返回 tombstone"""
+        import datetime
+        from models.changes import ChangeFeed, CHANGE_FIELDS
+        self.assertEqual(ChangeFeed.parse_cursor(None), 0)
+        self.assertIsNone(ChangeFeed.parse_cursor('latest'))
+        self.assertEqual(ChangeFeed.parse_cursor('42'), 42)
+        with self.assertRaises(ValueError):
+            ChangeFeed.parse_cursor('-1')
+        
+        at = datetime.datetime(2025, 9, 1, 8, 0)
+        def row(change_id, student_id, exists):
+            values = {f's_{field}': None for field in CHANGE_FIELDS}
+            if exists:
+                values.update(s_student_id=student_id, s_name='张三')
+            return {'change_id': change_id, 'student_id': student_id, 'changed_at': at, **values}
+        
+        items = ChangeFeed.compact_page([row(5, 'S1', True), row(6, 'S2', False), row(7, 'S1', True)])
+        self.assertEqual([(item['cursor'], item['op'], item['student_id']) for item in items],
+                         [('6', 'delete', 'S2'), ('7', 'upsert', 'S1')])
+        self.assertIsNone(items[0]['student'])
+        self.assertEqual(items[1]['student']['name'], '张三')
+    
+    def test_stops_before_recent_gap(self):
+        """ID 序列中的空缺之后是刚写入的记录时停下（较小的 ID 可能还没有提交），空缺足够旧时跳过"""
+        from models.changes import ChangeFeed
+        rows = [{'change_id': change_id, 'settled': settled}
+                for change_id, settled in ((11, 1), (12, 1), (15, 1), (16, 0), (18, 0), (19, 0))]
+        self.assertEqual([row['change_id'] for row in ChangeFeed.visible_prefix(rows, 10)], [11, 12, 15, 16])
+        self.assertEqual(ChangeFeed.visible_prefix(rows[3:], 15), rows[3:4])
+        # auto_increment_increment 为 2 时间隔 2 不算空缺
+        self.assertEqual(ChangeFeed.visible_prefix(rows[3:], 15, step=2), rows[3:])
+
+    def test_feed_is_not_conditional(self):
+        """数据版本不变时空缺也可能被越过：变更流不带 ETag，每次请求都重新查询"""
+        from unittest import mock
+        from app import create_app
+        from models.changes import ChangeFeed
+        from models.statistics import StatisticsModel
+        pages = [{'items': [], 'next': '12', 'has_more': False},
+                 {'items': [{'cursor': '15'}], 'next': '15', 'has_more': False}]
+        with mock.patch.object(StatisticsModel, 'get_version', return_value=('7.0.0', 1700000000.0, 1700000050.0)), \
+                mock.patch.object(ChangeFeed, 'changes_since', side_effect=pages) as changes_since:
+            client = create_app(fast_start=True, warmup_in_background=False).test_client()
+            response = client.get('/api/changes?since=12')
+            self.assertNotIn('ETag', response.headers)
+            response = client.get('/api/changes?since=12', headers={'If-None-Match': '*'})
+            self.assertEqual((response.status_code, response.get_json()['next']), (200, '15'))
+        self.assertEqual(changes_since.call_count, 2)
+
+class TestScoreEngine(unittest.TestCase):
+    """测试学期绩点计算（不需要数据库）"""
+    
+    def test_weighted_gpa(self):
+        """GPA 按学分加权，学分为 0 的课程只计入平均分，缺考不计入"""
+        from models.score_model import compute_semester, grade_point
+        self.assertEqual(grade_point(92), 4.0)
+        self.assertEqual(grade_point(59.5), 0.0)
+        result = compute_semester([
+            (1, 'A', '高等数学', 92, 4),
+            (2, 'A', 'Python编程', 76, 2),
+            (3, 'A', '体育', 60, 0),
+            (4, 'A', '英语', None, 3),
+        ])
+        student = result['students']['A']
+        self.assertEqual(student['gpa'], round((4.0 * 4 + 2.7 * 2) / 6, 2))
+        self.assertEqual(student['average'], round((92 + 76 + 60) / 3, 2))
+        self.assertEqual(student['credits'], 6)
+    
+    def test_rank_and_percentile(self):
+        """同分同名次，百分位为分数低于本人的其他人所占比例"""
+        from models.score_model import compute_semester
+        result = compute_semester([
+            (1, 'A', '高等数学', 90, 4),
+            (2, 'B', '高等数学', 95, 4),
+            (3, 'C', '高等数学', 90, 4),
+            (4, 'D', '高等数学', 70, 4),
+        ])
+        self.assertEqual(result['ranks'][2], (1, 4, 100.0))
+        self.assertEqual(result['ranks'][1], (2, 4, round(100 / 3, 1)))
+        self.assertEqual(result['ranks'][3], (2, 4, round(100 / 3, 1)))
+        self.assertEqual(result['ranks'][4], (4, 4, 0.0))
+        self.assertEqual(result['courses']['高等数学']['max'], 95)
+
+class TestQueryExecutor(unittest.TestCase):
+    """测试并发查询执行器（不需要数据库）"""
+    
+    def test_gather_with_fallbacks(self):
+        """并发执行；超时或出错的任务使用降级值"""
+        import threading
+        import time
+        from models.executor import QueryExecutor
+        executor = QueryExecutor(4)
+        self.addCleanup(executor.shutdown, False)
+        release = threading.Event()
+        
+        def fail():
+            raise RuntimeError('boom')
+        
+        started = time.monotonic()
+        results, failed = executor.gather({
+            'fast': (lambda value: value, (1,), 0),
+            'slow': (release.wait, (5,), 'fallback'),
+            'error': (fail, (), []),
+        }, timeout=0.2)
+        release.set()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(results, {'fast': 1, 'slow': 'fallback', 'error': []})
+        self.assertEqual(sorted(failed), ['error', 'slow'])
+    
+    def test_inline_task_runs_on_caller(self):
+        """inline 任务在调用线程上执行（使用请求自己的连接），出错时同样使用降级值"""
+        from models.executor import QueryExecutor
+        executor = QueryExecutor(1)
+        self.addCleanup(executor.shutdown, False)
+        results, failed = executor.gather({
+            'page': (threading.get_ident, (), None),
+            'stats': (threading.get_ident, (), None),
+        }, timeout=1, inline='stats')
+        self.assertEqual(results['stats'], threading.get_ident())
+        self.assertNotEqual(results['page'], threading.get_ident())
+        self.assertEqual(failed, [])
+        
+        results, failed = executor.gather({'stats': (int, ('x',), 0)}, timeout=1, inline='stats')
+        self.assertEqual((results, failed), ({'stats': 0}, ['stats']))
+
+class TestAdmission(unittest.TestCase):
+    """测试准入控制与过载拒绝（不需要数据库）"""
+
+    def test_priority_queue_and_eviction(self):
+        """名额先交给优先级高的请求；队列满时挤掉优先级低的，同级的直接拒绝；等待超时拒绝"""
+        from controllers import admission
+        limiter = admission.AdmissionLimiter(1, 2, 5)
+        self.assertIsNone(limiter.acquire(admission.PRIORITY_LOW))
+        results = {}
+
+        def wait(name, priority):
+            results[name] = limiter.acquire(priority)
+
+        threads = [threading.Thread(target=wait, args=('low', admission.PRIORITY_LOW)),
+                   threading.Thread(target=wait, args=('low2', admission.PRIORITY_LOW))]
+        for thread in threads:
+            thread.start()
+            while limiter.stats()['waiting'] < threads.index(thread) + 1:
+                time.sleep(0.001)
+        high = threading.Thread(target=wait, args=('high', admission.PRIORITY_HIGH))
+        high.start()
+        threads[1].join(5)
+        self.assertEqual(results, {'low2': admission.SHED_EVICTED})
+        self.assertEqual(limiter.acquire(admission.PRIORITY_LOW), admission.SHED_QUEUE_FULL)
+
+        limiter.release()
+        high.join(5)
+        self.assertIsNone(results['high'])
+        self.assertEqual(limiter.stats(), {'limit': 1, 'active': 1, 'waiting': 1})
+        limiter.release()
+        threads[0].join(5)
+        self.assertIsNone(results['low'])
+        self.assertEqual(limiter.acquire(admission.PRIORITY_HIGH, timeout=0.01), admission.SHED_TIMEOUT)
+        limiter.release()
+        self.assertEqual(limiter.stats(), {'limit': 1, 'active': 0, 'waiting': 0})
+
+    def test_shed_with_retry_after(self):
+        """名额用完时立即返回 503 和 Retry-After 并计数，/metrics 不受限制"""
+        from unittest import mock
+        from app import create_app
+        from controllers import admission
+        from models import metrics
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        limiter = admission.AdmissionLimiter(1, 0, 0.01)
+        self.assertIsNone(limiter.acquire(admission.PRIORITY_HIGH))
+        with mock.patch.object(admission, '_limiter', limiter), \
+                mock.patch.object(Config, 'ADMISSION_ENABLED', True):
+            client = create_app(fast_start=True, warmup_in_background=False, background_tasks=False).test_client()
+            response = client.get('/api/v1/students/2024001')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers['Retry-After'], str(Config.ADMISSION_RETRY_AFTER))
+            self.assertIn('error', response.get_json())
+
+            text = client.get('/metrics').get_data(as_text=True)
+            self.assertIn('http_requests_shed_total{route="student.get_student",reason="queue_full"} 1', text)
+            self.assertIn('http_admission_active 1', text)
+        self.assertEqual(limiter.stats()['active'], 1)
+
+    def test_default_limit_fits_pool(self):
+        """默认名额数按一个请求占用的连接数计算：名额全部用上时连接池不会被耗尽"""
+        from unittest import mock
+        from controllers import admission
+        from models.executor import CONNECTIONS_PER_REQUEST
+        for size, overflow in ((10, 5), (1, 0), (4, 0)):
+            with mock.patch.multiple(Config, MYSQL_POOL_MAX_SIZE=size, MYSQL_POOL_MAX_OVERFLOW=overflow,
+                                     ADMISSION_MAX_CONCURRENT=0), \
+                    mock.patch.object(admission, '_limiter', None):
+                limit = admission.get_limiter().limit
+                self.assertEqual(limit, admission.default_limit())
+                self.assertGreaterEqual(limit, 1)
+                if size + overflow >= CONNECTIONS_PER_REQUEST:
+                    self.assertLessEqual(limit * CONNECTIONS_PER_REQUEST, size + overflow)
+        self.assertEqual(CONNECTIONS_PER_REQUEST, 2)
+
+class TestMetrics(unittest.TestCase):
+    """测试性能指标与慢查询归一化（不需要数据库）"""
+    
+    def setUp(self):
+        from models import metrics
+        self.metrics = metrics
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+    
+    def test_normalize_sql(self):
+        """字面量替换为 ?，IN 列表和多行 VALUES 折叠"""
+        self.assertEqual(
+            self.metrics.normalize_sql("SELECT * FROM students\n WHERE student_id IN ('a', 'b', 'c') AND age > 18"),
+            'SELECT * FROM students WHERE student_id IN (...) AND age > ?'
+        )
+        self.assertEqual(
+            self.metrics.normalize_sql("INSERT INTO t (a, b) VALUES ('x', 1), ('y', 2), ('z', 3)"),
+            'INSERT INTO t (a, b) VALUES (?, ?), ...'
+        )
+        # 参数化的语句模板：IN 列表的长度不同也归为同一条
+        for count in (1, 3):
+            placeholders = ', '.join(['%s'] * count)
+            self.assertEqual(
+                self.metrics.normalize_sql(f'SELECT * FROM students WHERE student_id IN ({placeholders}) LIMIT %(limit)s'),
+                'SELECT * FROM students WHERE student_id IN (...) LIMIT ?'
+            )
+    
+    def test_instrumented_cursor(self):
+        """游标的查询数、读取行数计入当前请求，/metrics 输出累计直方图"""
+        class FakeCursor:
+            def execute(self, query, args=None):
+                return 2
+            
+            def fetchall(self):
+                return [{'id': 1}, {'id': 2}]
+        
+        cursor = self.metrics.instrumented_cursor_class(FakeCursor)()
+        stats = self.metrics.RequestStats('student.index')
+        token = self.metrics._current_request.set(stats)
+        try:
+            cursor.execute('SELECT id FROM students')
+            cursor.fetchall()
+        finally:
+            self.metrics._current_request.reset(token)
+        self.assertEqual((stats.queries, stats.rows), (1, 2))
+        
+        text = self.metrics.render_prometheus({'size': 3})
+        self.assertIn('db_query_duration_seconds_count{statement="select"} 1', text)
+        self.assertIn('db_rows_fetched_total 2', text)
+        self.assertIn('db_pool_size 3', text)
+
+class TestLoadTestReport(unittest.TestCase):
+    """测试负载测试的合成数据与结果统计（不需要数据库）"""
+    
+    def test_generated_students_are_valid(self):
+        """合成学生可重复生成，并能通过表单校验"""
+        from benchmarks import dataset
+        from models.validators import validate_student_data
+        self.assertEqual(dataset.generate_student(42), dataset.generate_student(42))
+        for index in range(200):
+            student = dataset.generate_student(index)
+            form = {key: '' if value is None else str(value) for key, value in student.items()}
+            self.assertIsNone(validate_student_data(form), student)
+        scores = dataset.generate_scores(7, courses=4, semesters=2)
+        self.assertEqual(len(scores), 8)
+        self.assertTrue(all(row[0] == dataset.student_id(7) for row in scores))
+    
+    def test_summarize_and_compare(self):
+        """分位数按最近秩法计算，p95 变慢超过允许比例时报告退化"""
+        from benchmarks.load_test import compare, summarize
+        stats = summarize([i / 1000 for i in range(100, 0, -1)], errors=1, elapsed=2.0)
+        self.assertEqual((stats['count'], stats['errors'], stats['throughput']), (100, 1, 50.0))
+        self.assertEqual((stats['p50_ms'], stats['p95_ms'], stats['p99_ms'], stats['max_ms']),
+                         (50.0, 95.0, 99.0, 100.0))
+        
+        baseline = {'operations': {'GET /': stats}}
+        self.assertEqual(compare(baseline, baseline, 0.2), [])
+        slower = {'operations': {'GET /': {**stats, 'p95_ms': 120.0}}}
+        self.assertEqual(len(compare(slower, baseline, 0.2)), 1)
+
+class TestConditionalGet(unittest.TestCase):
+    """测试页面的 ETag / Last-Modified（不需要数据库）"""
+    
+    def setUp(self):
+        from unittest import mock
+        from flask import Flask, flash
+        from controllers.conditional import conditional_get
+        from models.statistics import StatisticsModel
+        self.version = ('7.0.0', 1700000000.0, 1700000050.0)
+        patcher = mock.patch.object(StatisticsModel, 'get_version', side_effect=lambda: self.version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.calls = 0
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        
+        @app.route('/')
+        @conditional_get
+        def index():
+            self.calls += 1
+            return 'page'
+        
+        @app.route('/flash')
+        def add_flash():
+            flash('学生添加成功！', 'success')
+            return 'ok'
+        
+        self.client = app.test_client()
+    
+    def test_not_modified_skips_view(self):
+        """ETag 或 Last-Modified 仍然有效时返回 304，不执行视图"""
+        response = self.client.get('/')
+        self.assertEqual((response.status_code, self.calls), (200, 1))
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+        self.assertTrue(etag.startswith('W/"7.0.0-'))
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual((response.status_code, self.calls), (304, 1))
+        response = self.client.get('/', headers={'If-Modified-Since': last_modified})
+        self.assertEqual((response.status_code, self.calls), (304, 1))
+        
+        # 数据写入后版本变化，重新渲染；只有成绩变化时同样如此
+        self.version = ('8.0.0', 1700000100.0, 1700000150.0)
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual((response.status_code, self.calls), (200, 2))
+        etag = response.headers['ETag']
+        self.version = ('8.3.1700000200000000', 1700000200.0, 1700000250.0)
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual((response.status_code, self.calls), (200, 3))
+    
+    def test_no_last_modified_within_write_second(self):
+        """最后一次写入所在的那一秒还没有过去时不发送 Last-Modified，只用 ETag 验证"""
+        written = int(time.time()) + 3600  # 晚于模板、代码文件的修改时间
+        self.version = ('8.0.0', written + 0.2, written + 0.7)
+        response = self.client.get('/')
+        self.assertIn('ETag', response.headers)
+        self.assertNotIn('Last-Modified', response.headers)
+        
+        # 那一秒过去之后恢复发送；同一秒内之后的写入不会被旧的 If-Modified-Since 掩盖
+        self.version = ('8.0.0', written + 0.2, written + 1.0)
+        last_modified = self.client.get('/').headers['Last-Modified']
+        self.version = ('9.0.0', written + 1.5, written + 2.0)
+        response = self.client.get('/', headers={'If-Modified-Since': last_modified})
+        self.assertEqual((response.status_code, self.calls), (200, 3))
+    
+    def test_pending_flash_disables_304(self):
+        """有待显示的提示信息时完整渲染页面"""
+        etag = self.client.get('/').headers['ETag']
+        self.client.get('/flash')
+        response = self.client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+
+class TestApiV1(unittest.TestCase):
+    """测试 /api/v1 的序列化、字段选择和压缩（不需要数据库）"""
+    
+    def test_serialization_and_fields(self):
+        """日期输出为 ISO 8601，Decimal 输出为数字；未知字段报错"""
+        import datetime
+        from decimal import Decimal
+        from controllers.api_v1_controller import dumps, parse_fields
+        self.assertEqual(
+            dumps({'name': '张三', 'at': datetime.datetime(2024, 1, 2, 3, 4, 5),
+                   'day': datetime.date(2024, 1, 2), 'score': Decimal('90.50')}),
+            '{"name":"张三","at":"2024-01-02T03:04:05","day":"2024-01-02","score":90.5}'
+        )
+        self.assertEqual(parse_fields(' name,student_id,name '), ['name', 'student_id'])
+        self.assertIn('phone', parse_fields(''))
+        with self.assertRaises(ValueError):
+            parse_fields('student_id,password')
+    
+    def test_compression_negotiation(self):
+        """按 Accept-Encoding 压缩普通响应和流式响应，小响应不压缩"""
+        import gzip
+        import zlib
+        from flask import Flask, Response
+        from controllers.compression import compressed
+        app = Flask(__name__)
+        
+        @app.route('/big')
+        @compressed
+        def big():
+            return 'x' * 5000
+        
+        @app.route('/stream')
+        @compressed
+        def stream():
+            return Response((f'{i}\n' for i in range(1000)), mimetype='application/x-ndjson')
+        
+        @app.route('/small')
+        @compressed
+        def small():
+            return 'ok'
+        
+        client = app.test_client()
+        response = client.get('/big', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), b'x' * 5000)
+        
+        response = client.get('/stream', headers={'Accept-Encoding': 'gzip;q=0.5, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(zlib.decompress(response.data).decode().splitlines()[-1], '999')
+        
+        self.assertNotIn('Content-Encoding', client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers)
+        self.assertNotIn('Content-Encoding', client.get('/big').headers)
+
+class _FakeSchemaCursor:
+    """迁移工具测试用的假游标：记录执行的语句，按 existing 回答索引是否存在"""
+    
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+        self._result = None
+    
+    def execute(self, query, args=None):
+        if 'information_schema.STATISTICS' in query:
+            self._result = {'count': int(args[1] in self.existing)}
+        else:
+            self.statements.append(query)
+    
+    def fetchone(self):
+        return self._result
+
+class TestWriteQueue(unittest.TestCase):
+    """测试合并写入队列（不需要数据库）"""
+    
+    def setUp(self):
+        from unittest import mock
+        from models import write_queue
+        self.write_queue = write_queue
+        self.connections = []
+        
+        def acquire():
+            connection = _FakeConnection()
+            connection.cursor = lambda: contextlib.nullcontext(None)
+            connection.close = lambda: None
+            self.connections.append(connection)
+            return connection
+        
+        patcher = mock.patch.object(write_queue, 'get_pool', lambda: mock.Mock(acquire=acquire))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def _submit_all(self, queue, writes):
+        results = {}
+        
+        def submit(index, operation, key):
+            results[index] = queue.submit(operation, key, {'index': index})
+        
+        threads = [threading.Thread(target=submit, args=(index, *write)) for index, write in enumerate(writes)]
+        for thread in threads:
+            thread.start()
+            # 保证按顺序入队
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        return results
+    
+    def test_group_commit(self):
+        """并发写入合并为一个事务，每个请求拿到自己的结果；同一学号的第二次写入进入下一批"""
+        batches = []
+        
+        def flush(cursor, batch):
+            batches.append([write.key for write in batch])
+            for write in batch:
+                write.result = 'duplicate' if write.key == 'S2' else 'ok'
+        
+        queue = self.write_queue.WriteQueue(flush, max_batch=10, max_delay=0.3)
+        self.addCleanup(queue.close)
+        results = self._submit_all(queue, [('insert', 'S1'), ('insert', 'S2'), ('update', 'S3'), ('update', 'S1')])
+        self.assertEqual(results, {0: 'ok', 1: 'duplicate', 2: 'ok', 3: 'ok'})
+        self.assertEqual(batches, [['S1', 'S2', 'S3'], ['S1']])
+        self.assertEqual([connection.commits for connection in self.connections], [1, 1])
+    
+    def test_failed_transaction(self):
+        """事务失败时整批回滚，每条写入的结果都是失败"""
+        def flush(cursor, batch):
+            for write in batch:
+                write.result = 'ok'
+            raise RuntimeError('deadlock')
+        
+        queue = self.write_queue.WriteQueue(flush, max_batch=2, max_delay=0.3)
+        self.addCleanup(queue.close)
+        results = self._submit_all(queue, [('insert', 'S1'), ('insert', 'S2')])
+        self.assertEqual(results, {0: 'error', 1: 'error'})
+        self.assertEqual((self.connections[0].commits, self.connections[0].rollbacks), (0, 1))
+
+class TestCompactRecords(unittest.TestCase):
+    """测试紧凑行记录（不需要数据库）"""
+
+    def test_record_access(self):
+        """记录没有 __dict__，属性访问和只读映射访问结果相同，同样的列共用一个记录类"""
+        import pickle
+        from jinja2 import Environment
+        from models.records import record_class
+
+        columns = ('student_id', 'name', 'age')
+        cls = record_class(columns)
+        self.assertIs(record_class(list(columns)), cls)
+        student = cls('S1', '张三', None)
+        self.assertFalse(hasattr(student, '__dict__'))
+        self.assertEqual((student.name, student['name'], student.get('phone', '-')), ('张三', '张三', '-'))
+        self.assertEqual(dict(student), {'student_id': 'S1', 'name': '张三', 'age': None})
+        self.assertEqual(pickle.loads(pickle.dumps(student)), student)
+        self.assertEqual(Environment().from_string('{{ s.name }}/{{ s.age }}').render(s=student), '张三/None')
+        student['age'] = 20
+        self.assertEqual(student.age, 20)
+        with self.assertRaises(KeyError):
+            student['gpa'] = 3.5
+        with self.assertRaises(ValueError):
+            record_class(('count(*)',))
+
+class TestMigrations(unittest.TestCase):
+    """测试迁移脚本的加载与在线建索引（不需要数据库）"""
+    
+    def test_load_migrations(self):
+        """迁移脚本按版本号排序、编号连续，都可以回滚"""
+        from models.migrations import load_migrations
+        migrations = load_migrations()
+        self.assertEqual([m.version for m in migrations], list(range(1, len(migrations) + 1)))
+        self.assertEqual(migrations[0].name, 'initial_schema')
+        for migration in migrations:
+            self.assertTrue(callable(getattr(migration.module, 'down', None)), migration.name)
+            self.assertEqual(len(migration.checksum), 40)
+    
+    def test_add_indexes_online(self):
+        """只创建缺少的索引，合并为一条在线执行的 ALTER；删除时同样在线执行"""
+        from models.migrations import add_indexes, drop_indexes
+        cursor = _FakeSchemaCursor({'idx_a'})
+        created = add_indexes(cursor, 'students', [
+            ('idx_a', 'INDEX idx_a (a)'), ('idx_b', 'INDEX idx_b (b)'), ('idx_c', 'INDEX idx_c (c)'),
+        ])
+        self.assertEqual(created, ['idx_b', 'idx_c'])
+        self.assertEqual(cursor.statements, [
+            'ALTER TABLE students ADD INDEX idx_b (b), ADD INDEX idx_c (c), ALGORITHM=INPLACE, LOCK=NONE'
+        ])
+        
+        cursor = _FakeSchemaCursor({'idx_a'})
+        self.assertEqual(add_indexes(cursor, 'students', [('idx_a', 'INDEX idx_a (a)')]), [])
+        self.assertEqual(drop_indexes(cursor, 'students', ['idx_a', 'idx_b']), ['idx_a'])
+        self.assertEqual(cursor.statements, ['ALTER TABLE students DROP INDEX idx_a, ALGORITHM=INPLACE, LOCK=NONE'])
+
+class TestStartup(unittest.TestCase):
+    """测试冷启动优化（不需要数据库）"""
+    
+    def test_imports_have_no_side_effects(self):
+        """导入 config 不打印任何内容，导入 models 包不连带导入模型"""
+        import subprocess
+        import sys
+        result = subprocess.run(
+            [sys.executable, '-c', 'import sys, config, models; print("models.database" in sys.modules)'],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        )
+        self.assertEqual((result.stdout, result.stderr), ('False\n', ''))
+    
+    def test_fast_start_bytecode_cache(self):
+        """冷启动优化模式下预编译的模板写入字节码缓存，启动耗时记录在应用上"""
+        import tempfile
+        from unittest import mock
+        import threading
+        from app import create_app, precompile_templates
+        threads = set(threading.enumerate())
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(Config, 'JINJA_CACHE_DIR', directory):
+            app = create_app(fast_start=True, warmup_in_background=False)
+            # 默认不启动统计校正和健康检查等后台线程
+            self.assertEqual(set(threading.enumerate()) - threads, set())
+            count = precompile_templates(app)
+            self.assertEqual(count, len([name for name in app.jinja_env.list_templates() if name.endswith('.html')]))
+            self.assertEqual(len(os.listdir(directory)), count)
+        self.assertEqual(set(app.extensions['startup_timings']), {'imports', 'create_app'})
+
+class TestServer(unittest.TestCase):
+    """测试多进程服务的内置实现（不需要数据库）"""
+    
+    def test_prefork_recycle_and_graceful_stop(self):
+        """多个 worker 共同处理请求，达到请求数后重启；HUP 平滑重启、TERM 平滑退出期间请求都成功"""
+        import signal
+        import socket
+        import subprocess
+        import sys
+        import urllib.request
+        from server import parse_bind
+        self.assertEqual(parse_bind('[::1]:8000'), ('::1', 8000))
+        with self.assertRaises(ValueError):
+            parse_bind('localhost')
+        
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        process = subprocess.Popen(
+            [sys.executable, 'app.py', 'serve', '--engine', 'builtin', '--workers', '2', '--threads', '2',
+             '--bind', f'127.0.0.1:{port}', '--max-requests', '3'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.PIPE, text=True
+        )
+        self.addCleanup(process.kill)
+        
+        def get():
+            return urllib.request.urlopen(f'http://127.0.0.1:{port}/api/suggest', timeout=5).status
+        
+        for _ in range(100):
+            try:
+                get()
+                break
+            except OSError:
+                time.sleep(0.1)
+        self.assertEqual([get() for _ in range(10)], [200] * 10)
+        process.send_signal(signal.SIGHUP)
+        self.assertEqual([get() for _ in range(5)], [200] * 5)
+        process.send_signal(signal.SIGTERM)
+        self.assertEqual(process.wait(15), 0)
+        log = process.stderr.read()
+        self.assertIn('已处理 3 个请求', log)
+        self.assertIn('平滑退出', log)
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file